@@ -0,0 +1,161 @@
+"""
+Cache em disco das respostas da IA.
+
+Guarda cada resposta em um banco SQLite, identificada por modelo, versão do
+modelo de prompt, hash dos dados e pergunta. Repetir a mesma análise sobre os
+mesmos dados (por exemplo, "Analisar dados" depois de reabrir o visualizador)
+devolve a resposta na hora, sem chamar a API. Quando o tamanho total passa do
+limite, as respostas usadas há mais tempo são descartadas (LRU).
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+# Constantes
+ARQUIVO_CACHE_PADRAO = "ia_cache.db"
+LIMITE_MB_PADRAO = 50
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    chave TEXT PRIMARY KEY,
+    modelo TEXT NOT NULL,
+    versao_prompt TEXT NOT NULL,
+    hash_dados TEXT NOT NULL,
+    pergunta TEXT NOT NULL,
+    resposta TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    criado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def chave_resposta(modelo, versao_prompt, hash_dados, pergunta):
+    """
+    Calcula a chave de uma resposta.
+
+    A pergunta é comparada sem diferenças de espaços.
+
+    Returns:
+        str: Hash hexadecimal.
+    """
+    pergunta = " ".join(str(pergunta).split())
+    resumo = hashlib.blake2b(digest_size=16)
+    for parte in (modelo, versao_prompt, hash_dados, pergunta):
+        resumo.update(str(parte).encode("utf-8"))
+        resumo.update(b"\x00")
+    return resumo.hexdigest()
+
+
+class CacheRespostas:
+    """
+    Cache LRU de respostas da IA em SQLite, seguro para uso a partir de várias threads.
+    """
+
+    def __init__(self, caminho=ARQUIVO_CACHE_PADRAO, limite_mb=LIMITE_MB_PADRAO):
+        """
+        Abre (ou cria) o cache.
+
+        Args:
+            caminho (str): Arquivo do banco SQLite
+            limite_mb (float): Tamanho máximo das respostas guardadas, em MB
+        """
+        self.caminho = caminho
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def obter(self, modelo, versao_prompt, hash_dados, pergunta):
+        """
+        Busca uma resposta guardada.
+
+        Args:
+            modelo (str): Nome do modelo
+            versao_prompt (str): Versão do modelo de prompt
+            hash_dados (str): Hash dos dados enviados
+            pergunta (str): Pergunta (ou identificador da análise)
+
+        Returns:
+            str or None: Resposta guardada, ou None se não houver.
+        """
+        chave = chave_resposta(modelo, versao_prompt, hash_dados, pergunta)
+        with self._lock, self._conexao:
+            linha = self._conexao.execute("SELECT resposta FROM respostas WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+            self._conexao.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+        logger.info(f"Resposta da IA reaproveitada do cache ({modelo}, prompt {versao_prompt})")
+        return linha[0]
+
+    def gravar(self, modelo, versao_prompt, hash_dados, pergunta, resposta):
+        """
+        Guarda uma resposta e descarta as menos usadas se o limite de tamanho for ultrapassado.
+
+        Args:
+            modelo (str): Nome do modelo
+            versao_prompt (str): Versão do modelo de prompt
+            hash_dados (str): Hash dos dados enviados
+            pergunta (str): Pergunta (ou identificador da análise)
+            resposta (str): Texto da resposta
+        """
+        chave = chave_resposta(modelo, versao_prompt, hash_dados, pergunta)
+        tamanho = len(resposta.encode("utf-8")) + len(str(pergunta).encode("utf-8"))
+        agora = time.time()
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, modelo, str(versao_prompt), hash_dados, str(pergunta), resposta, tamanho, agora, agora),
+            )
+            self._descartar_excedente()
+
+    def _descartar_excedente(self):
+        """Remove as respostas acessadas há mais tempo até o total caber no limite (chamar com o lock)."""
+        total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        descartadas = []
+        for chave, tamanho in self._conexao.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado_em"):
+            if total <= self.limite_bytes:
+                break
+            descartadas.append((chave,))
+            total -= tamanho
+        self._conexao.executemany("DELETE FROM respostas WHERE chave = ?", descartadas)
+        logger.info(f"Cache da IA: {len(descartadas)} resposta(s) antiga(s) descartada(s)")
+
+    def limpar(self):
+        """Remove todas as respostas guardadas."""
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM respostas")
+
+    def estatisticas(self):
+        """
+        Resumo do cache.
+
+        Returns:
+            dict: Quantidade de respostas e tamanho total em bytes.
+        """
+        with self._lock:
+            quantidade, total = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()
+        return {"respostas": quantidade, "bytes": total}
@@ -0,0 +1,279 @@
+"""
+Montagem do contexto de dados enviado à IA dentro de um orçamento de tokens.
+
+Em vez de despejar todos os DataFrames em CSV e cortar o texto em um número
+fixo de caracteres (o que partia linhas ao meio), o construtor:
+
+- estima os tokens localmente, sem chamar a API;
+- prioriza linhas: primeiro as posições das carteiras, depois os mesmos papéis
+  e os tickers citados na pergunta nos conjuntos de ações e FIIs, depois o
+  restante na ordem original;
+- prioriza colunas: descarta colunas vazias, resume as constantes e ordena as
+  demais (as citadas na pergunta primeiro) pela taxa de preenchimento;
+- nunca corta uma linha: o que não cabe no orçamento entra como resumo
+  estatístico (ver ``statistics_engine``) e lista de tickers omitidos;
+- memoriza o contexto renderizado por versão dos dados (hash) e tickers citados.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from snapshot_db import identificar_coluna_ticker
+from statistics_engine import motor_compartilhado, resumo_texto
+
+# Constantes
+ORCAMENTO_TOKENS_PADRAO = 30000
+CARACTERES_POR_TOKEN = 4
+LIMITE_AUSENTES_COLUNA = 0.9  # colunas com mais ausentes que isso ficam de fora das linhas
+COLUNAS_IGNORADAS = ("Origem", "Erro")
+TICKERS_OMITIDOS_LISTADOS = 200
+CONTEXTOS_EM_CACHE = 16
+LINHAS_POR_BLOCO = 500
+FRACAO_RESERVA_RESUMOS = 0.3
+PADRAO_TICKER = re.compile(r"\b[A-Z]{4}\d{1,2}[A-Z]?\b")
+PADRAO_PEDACOS = re.compile(r"\w+|[^\w\s]")
+
+logger = logging.getLogger(__name__)
+
+
+def estimar_tokens(texto):
+    """
+    Estima quantos tokens um texto ocupa, sem tokenizador externo.
+
+    Conta palavras e sinais de pontuação; palavras longas (e números com muitos
+    dígitos) contam como vários tokens, na média de ``CARACTERES_POR_TOKEN``.
+
+    Args:
+        texto (str): Texto a estimar
+
+    Returns:
+        int: Número aproximado de tokens.
+    """
+    if not texto:
+        return 0
+    return sum(max(1, -(-len(pedaco) // CARACTERES_POR_TOKEN)) for pedaco in PADRAO_PEDACOS.findall(texto))
+
+
+def formatar_numero(valor):
+    """
+    Formata um número para o CSV do contexto sem perder dígitos.
+
+    Usa a menor representação decimal exata do próprio tipo (float32 ou float64),
+    sem ".0" nos inteiros e sem notação científica: 123456789012.0 vira
+    "123456789012" (e não "1.23457e+11") e o float32 12.1 continua "12.1".
+
+    Returns:
+        str: Número formatado.
+    """
+    return np.format_float_positional(valor, trim="-")
+
+
+def tickers_mencionados(pergunta, tickers_conhecidos=None):
+    """
+    Extrai os tickers citados em uma pergunta (ex: "compare PETR4 e itub4").
+
+    Args:
+        pergunta (str): Texto da pergunta
+        tickers_conhecidos (iterable): Se informado, só tickers presentes nos dados são devolvidos
+
+    Returns:
+        list: Tickers em maiúsculas, na ordem em que aparecem, sem repetição.
+    """
+    if not pergunta:
+        return []
+    encontrados = list(dict.fromkeys(PADRAO_TICKER.findall(pergunta.upper())))
+    if tickers_conhecidos is not None:
+        conhecidos = set(tickers_conhecidos)
+        encontrados = [ticker for ticker in encontrados if ticker in conhecidos]
+    return encontrados
+
+
+class ConstrutorContexto:
+    """
+    Renderiza os DataFrames de resultados como contexto para a IA, dentro de um orçamento de tokens.
+    """
+
+    def __init__(self, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO, motor=None):
+        """
+        Inicializa o construtor.
+
+        Args:
+            orcamento_tokens (int): Tokens disponíveis para a seção de dados
+            motor (MotorEstatisticas): Motor usado nos resumos (padrão: o compartilhado)
+        """
+        self.orcamento_tokens = orcamento_tokens
+        self.motor = motor or motor_compartilhado()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tickers(df):
+        if df is None or df.empty:
+            return set()
+        return set(df[identificar_coluna_ticker(df)].astype(str).str.upper())
+
+    def _colunas_prioritarias(self, df, estatisticas, citadas=()):
+        """
+        Escolhe as colunas das linhas: ticker primeiro, depois as citadas na pergunta e as mais preenchidas.
+
+        Returns:
+            tuple: (colunas, constantes) — constantes é um dict coluna -> valor único.
+        """
+        coluna_ticker = identificar_coluna_ticker(df)
+        colunas, constantes = [], {}
+        for nome, coluna in estatisticas.colunas.items():
+            if nome == coluna_ticker or nome in COLUNAS_IGNORADAS:
+                continue
+            if coluna.taxa_ausentes > LIMITE_AUSENTES_COLUNA:
+                continue
+            if coluna.distintos == 1 and len(df) > 1:
+                if coluna.mais_frequentes:
+                    constantes[nome] = coluna.mais_frequentes[0][0]
+                else:
+                    # valor no dtype da própria coluna: coluna.minimo vem alargado (5.099999904632568)
+                    constantes[nome] = formatar_numero(df[nome].dropna().iloc[0])
+                continue
+            colunas.append((nome not in citadas, coluna.taxa_ausentes, nome))
+        colunas.sort(key=lambda item: item[:2])  # ordenação estável: empate mantém a ordem original
+        return [coluna_ticker] + [nome for _, _, nome in colunas], constantes
+
+    @staticmethod
+    def _ordem_linhas(df, prioritarios):
+        """Posições das linhas com os tickers prioritários (na ordem dada) antes das demais."""
+        tickers = df[identificar_coluna_ticker(df)].astype(str).str.upper().to_numpy()
+        if not prioritarios:
+            return np.arange(len(df))
+        posicao_prioridade = {ticker: i for i, ticker in enumerate(prioritarios)}
+        chaves = np.array([posicao_prioridade.get(ticker, len(prioritarios)) for ticker in tickers])
+        return np.argsort(chaves, kind="stable")
+
+    @staticmethod
+    def _linhas_csv(df, colunas):
+        """Renderiza as linhas em CSV (números exatos, sem notação científica), uma string por linha."""
+        texto = df[colunas].to_csv(index=False, header=False, float_format=formatar_numero, lineterminator="\n")
+        return texto.splitlines()
+
+    def construir(self, frames, pergunta="", carteiras=("carteira_acoes", "carteira_fiis"), colunas=()):
+        """
+        Monta a seção de dados do prompt.
+
+        Args:
+            frames (dict): Nome do conjunto -> DataFrame tipado (na ordem de exibição)
+            pergunta (str): Pergunta do usuário (tickers citados ganham prioridade)
+            carteiras (iterable): Conjuntos que são posições de carteira (entram primeiro)
+            colunas (iterable): Colunas citadas na pergunta (vêm logo depois do ticker)
+
+        Returns:
+            str: Contexto renderizado, dentro do orçamento de tokens.
+        """
+        frames = {nome: df for nome, df in frames.items() if df is not None and not df.empty}
+        conhecidos = set().union(*(self._tickers(df) for df in frames.values())) if frames else set()
+        citados = tuple(tickers_mencionados(pergunta, conhecidos))
+
+        versoes = tuple((nome, self.motor.obter(df).hash_dados) for nome, df in frames.items())
+        colunas = tuple(colunas)
+        chave = (versoes, citados, colunas, self.orcamento_tokens)
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        contexto = self._renderizar(frames, citados, set(carteiras), set(colunas))
+        with self._lock:
+            self._cache[chave] = contexto
+            if len(self._cache) > CONTEXTOS_EM_CACHE:
+                self._cache.popitem(last=False)
+        return contexto
+
+    def _renderizar(self, frames, citados, carteiras, colunas_citadas):
+        restante = self.orcamento_tokens
+        em_carteira = []
+        for nome in frames:
+            if nome in carteiras:
+                em_carteira.extend(sorted(self._tickers(frames[nome])))
+        # Nos conjuntos de ações e FIIs: papéis da carteira, depois os citados na pergunta
+        prioritarios = list(dict.fromkeys(em_carteira + list(citados)))
+
+        # Carteiras primeiro, depois os demais conjuntos na ordem recebida
+        ordem_conjuntos = [n for n in frames if n in carteiras] + [n for n in frames if n not in carteiras]
+
+        # Primeira passada: cabeçalhos, e reserva para o resumo estatístico de cada conjunto
+        secoes = {}
+        for nome in ordem_conjuntos:
+            df = frames[nome]
+            estatisticas = self.motor.obter(df)
+            colunas, constantes = self._colunas_prioritarias(df, estatisticas, colunas_citadas)
+            cabecalho = [f"\n**{nome} ({len(df)} registros)**"]
+            if constantes:
+                cabecalho.append("Valor igual em todas as linhas: " +
+                                 "; ".join(f"{c}={v}" for c, v in constantes.items()))
+            cabecalho.append(",".join(str(c) for c in colunas))
+            resumo = f"\n**Resumo de {nome} (inclui as linhas omitidas):**\n{resumo_texto(estatisticas)}"
+            secoes[nome] = {"cabecalho": cabecalho, "linhas": [], "colunas": colunas,
+                            "resumo": resumo, "custo_resumo": estimar_tokens(resumo)}
+            restante -= estimar_tokens("\n".join(cabecalho))
+
+        # A reserva dos resumos não passa de uma fração do orçamento
+        reserva = min(sum(secao["custo_resumo"] for secao in secoes.values()),
+                      int(self.orcamento_tokens * FRACAO_RESERVA_RESUMOS))
+        restante -= reserva
+
+        # Segunda passada: linhas por prioridade, sem nunca cortar uma linha ao meio
+        omitidos = {}
+        for nome in ordem_conjuntos:
+            df = frames[nome]
+            secao = secoes[nome]
+            ordem = self._ordem_linhas(df, prioritarios)
+            incluidas, cheio = 0, False
+            # Renderizar em blocos: com orçamento curto, não se gera o CSV do conjunto inteiro
+            for inicio in range(0, len(df), LINHAS_POR_BLOCO):
+                for linha in self._linhas_csv(df.iloc[ordem[inicio:inicio + LINHAS_POR_BLOCO]], secao["colunas"]):
+                    custo = estimar_tokens(linha) + 1
+                    if custo > restante:
+                        cheio = True
+                        break
+                    secao["linhas"].append(linha)
+                    restante -= custo
+                    incluidas += 1
+                if cheio:
+                    break
+            if incluidas < len(df):
+                coluna_ticker = identificar_coluna_ticker(df)
+                omitidos[nome] = df[coluna_ticker].iloc[ordem[incluidas:]].astype(str).tolist()
+        restante += reserva
+
+        partes = []
+        for nome in ordem_conjuntos:
+            secao = secoes[nome]
+            partes.extend(secao["cabecalho"])
+            partes.extend(secao["linhas"])
+            if nome in omitidos:
+                partes.append(f"... {len(omitidos[nome])} linhas omitidas por limite de contexto")
+
+        # Conjuntos com linhas omitidas: resumo estatístico e, se couber, os tickers que ficaram de fora
+        for nome, tickers in omitidos.items():
+            secao = secoes[nome]
+            if secao["custo_resumo"] > restante:
+                continue
+            partes.append(secao["resumo"])
+            restante -= secao["custo_resumo"]
+
+            listados = []
+            for ticker in tickers[:TICKERS_OMITIDOS_LISTADOS]:
+                custo = estimar_tokens(ticker) + 1
+                if custo > restante - 10:
+                    break
+                listados.append(ticker)
+                restante -= custo
+            if listados:
+                reticencias = ", ..." if len(listados) < len(tickers) else ""
+                partes.append(f"Tickers omitidos: {', '.join(listados)}{reticencias}")
+
+        contexto = "\n".join(partes)
+        logger.debug(f"Contexto da IA: ~{self.orcamento_tokens - restante} tokens, "
+                     f"{sum(len(s['linhas']) for s in secoes.values())} linhas")
+        return contexto
@@ -0,0 +1,185 @@
+"""
+Provedores de IA usados pelo chat do visualizador.
+
+Todo provedor expõe ``nome`` (identifica o modelo, inclusive na chave do cache
+de respostas) e ``gerar_stream(prompt)``, que devolve a resposta em trechos.
+Há duas implementações:
+
+- ``ProvedorGemini``: Google Gemini via ``google-generativeai``;
+- ``ProvedorLocal``: cliente HTTP de um servidor local compatível (ver
+  ``benchmarks/ai_stub_server.py``), que responde em streaming sem rede
+  externa nem API key — usado para testes de carga e profiling.
+
+O provedor é escolhido por ``"ia_provedor"`` no ``config.json`` ("gemini" ou "local").
+"""
+
+import json
+import logging
+import urllib.error
+import urllib.request
+
+try:
+    import google.generativeai as genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+    genai = None
+
+# Constantes
+PROVEDOR_GEMINI = "gemini"
+PROVEDOR_LOCAL = "local"
+MODELO_GEMINI = "gemini-2.5-pro"
+URL_LOCAL_PADRAO = "http://127.0.0.1:8766"
+TIMEOUT_LOCAL = 300
+PROMPT_TESTE = "Teste de conexão. Responda apenas: 'Conexão bem-sucedida!'"
+
+logger = logging.getLogger(__name__)
+
+
+class ProvedorIA:
+    """
+    Interface dos provedores de IA.
+    """
+
+    nome = ""
+
+    def gerar_stream(self, prompt):
+        """
+        Gera a resposta em trechos, à medida que o modelo os produz.
+
+        Args:
+            prompt (str): Prompt completo
+
+        Returns:
+            iterator: Trechos de texto (str).
+        """
+        raise NotImplementedError
+
+    def gerar(self, prompt):
+        """
+        Gera a resposta completa.
+
+        Returns:
+            str: Texto da resposta.
+        """
+        return "".join(self.gerar_stream(prompt))
+
+    def testar(self):
+        """Faz uma chamada curta para verificar a conexão (levanta exceção em caso de falha)."""
+        return self.gerar(PROMPT_TESTE)
+
+
+class ProvedorGemini(ProvedorIA):
+    """
+    Google Gemini via ``google-generativeai``.
+    """
+
+    def __init__(self, api_key, modelo=MODELO_GEMINI):
+        """
+        Configura o cliente.
+
+        Args:
+            api_key (str): API key do Google Gemini
+            modelo (str): Nome do modelo
+        """
+        if not GENAI_AVAILABLE:
+            raise RuntimeError("A biblioteca google-generativeai não está instalada")
+        genai.configure(api_key=api_key)
+        self.nome = modelo
+        self.model = genai.GenerativeModel(modelo)
+
+    def gerar_stream(self, prompt):
+        recebeu_texto = False
+        for parte in self.model.generate_content(prompt, stream=True):
+            try:
+                trecho = parte.text
+            except ValueError:  # parte sem texto (ex: só o motivo de término)
+                continue
+            recebeu_texto = True
+            yield trecho
+        if not recebeu_texto:
+            raise ValueError("A IA não retornou texto")
+
+
+class ProvedorLocal(ProvedorIA):
+    """
+    Cliente de um servidor local que responde em streaming (uma linha JSON por trecho).
+
+    Protocolo: ``POST <url>/gerar`` com ``{"prompt": ...}``; a resposta traz linhas
+    ``{"texto": ...}`` e, no fim, ``{"fim": true, "modelo": ...}``.
+    """
+
+    def __init__(self, url=URL_LOCAL_PADRAO, timeout=TIMEOUT_LOCAL):
+        """
+        Configura o cliente.
+
+        Args:
+            url (str): URL base do servidor
+            timeout (float): Tempo máximo de espera por trecho, em segundos
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.nome = f"local@{self.url}"
+
+    def gerar_stream(self, prompt):
+        requisicao = urllib.request.Request(
+            f"{self.url}/gerar", data=json.dumps({"prompt": prompt}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            resposta = urllib.request.urlopen(requisicao, timeout=self.timeout)
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"Servidor de IA local indisponível em {self.url}: {e}") from e
+        with resposta:
+            for linha in resposta:
+                if not linha.strip():
+                    continue
+                mensagem = json.loads(linha)
+                if "erro" in mensagem:
+                    raise RuntimeError(mensagem["erro"])
+                if mensagem.get("fim"):
+                    return
+                yield mensagem["texto"]
+        raise RuntimeError("Conexão com o servidor de IA local encerrada antes do fim da resposta")
+
+
+def nome_provedor(config):
+    """Nome do provedor configurado, para exibir na interface."""
+    tipo = config.get("ia_provedor", PROVEDOR_GEMINI)
+    if tipo == PROVEDOR_LOCAL:
+        return f"Servidor de IA local ({config.get('ia_url_local', URL_LOCAL_PADRAO)})"
+    if tipo == PROVEDOR_GEMINI:
+        return "Google Gemini"
+    return tipo
+
+
+def usa_api_key(config):
+    """Indica se o provedor configurado precisa de API key (só o Gemini)."""
+    return config.get("ia_provedor", PROVEDOR_GEMINI) == PROVEDOR_GEMINI
+
+
+def biblioteca_ausente(config):
+    """Indica se o provedor configurado depende do google-generativeai e ele não está instalado."""
+    return config.get("ia_provedor", PROVEDOR_GEMINI) == PROVEDOR_GEMINI and not GENAI_AVAILABLE
+
+
+def criar_provedor(config, api_key=None):
+    """
+    Cria o provedor indicado em ``"ia_provedor"``.
+
+    Args:
+        config (dict): Configurações da aplicação
+        api_key (str): API key do Gemini (padrão: ``config["gemini_api_key"]``)
+
+    Returns:
+        ProvedorIA or None: Provedor pronto, ou None se o Gemini não tiver API key.
+    """
+    tipo = config.get("ia_provedor", PROVEDOR_GEMINI)
+    if tipo == PROVEDOR_LOCAL:
+        return ProvedorLocal(config.get("ia_url_local", URL_LOCAL_PADRAO))
+    if tipo != PROVEDOR_GEMINI:
+        raise ValueError(f"Provedor de IA desconhecido: {tipo}")
+    api_key = config.get("gemini_api_key", "") if api_key is None else api_key
+    if not api_key:
+        return None
+    return ProvedorGemini(api_key, config.get("ia_modelo", MODELO_GEMINI))
@@ -0,0 +1,272 @@
+"""
+Recuperação local das linhas e colunas relevantes para uma pergunta do chat.
+
+O índice é montado uma vez, quando o visualizador abre, sobre os DataFrames
+tipados:
+
+- tickers -> (conjunto, linha);
+- termos de textos descritivos (nome, setor, segmento...) -> valores da coluna;
+- nomes de colunas (com e sem o ano/"Atual": "DY" casa DY ATUAL, DY 2024...);
+- faixa (mínimo e máximo) de cada coluna numérica.
+
+Para "compare ITUB4 e BBDC3" só as duas linhas seguem para o prompt; para
+"bancos com DY acima de 8" entram os bancos que passam no filtro, com todas as
+colunas (as citadas vêm primeiro no contexto). Perguntas amplas, sem nada reconhecido, voltam para o contexto completo
+com resumos (ver ``ai_context``).
+"""
+
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from ai_context import tickers_mencionados
+from snapshot_db import identificar_coluna_ticker
+from table_query import FiltroInvalido, compilar_filtro
+
+# Constantes
+COLUNAS_IGNORADAS = ("Origem", "Erro")
+TAMANHO_MINIMO_TERMO = 3
+FRACAO_MAXIMA_TERMO = 0.5  # termos presentes em mais da metade das linhas não discriminam nada
+PALAVRAS_IGNORADAS = frozenset((
+    "qual", "quais", "como", "que", "mais", "menos", "entre", "sobre", "meu", "minha", "meus", "minhas",
+    "compare", "comparar", "compara", "acao", "acoes", "fii", "fiis", "melhor", "melhores", "pior", "piores",
+    "dados", "empresa", "empresas", "setor", "setores", "segmento", "analise", "analisar", "voce", "isso",
+    "esta", "estao", "para", "com", "dos", "das", "uma", "sao", "tem", "por", "ativos", "ativo", "acima",
+    "abaixo", "maior", "menor", "superior", "inferior", "atual", "todos", "todas", "the", "and",
+))
+TERMOS_COLUNA_IGNORADOS = frozenset(("atual", "mes", "meses", "ano", "anos", "preco", "liq", "div", "medio", "media"))
+PALAVRAS_CARTEIRA = ("carteira", "posicoes", "posicao", "minhas acoes", "meus fiis")
+OPERADORES_TEXTO = (
+    (r">=|no minimo|pelo menos", ">="),
+    (r"<=|no maximo", "<="),
+    (r">|acima de|maior que|maior do que|superior a|mais de", ">"),
+    (r"<|abaixo de|menor que|menor do que|inferior a|menos de", "<"),
+)
+PADRAO_NUMERO = r"(-?\d+(?:[.,]\d+)?)\s*%?"
+PADRAO_ANO_OU_ATUAL = re.compile(r"\s*(?:\d{4}|atual)$")
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos (``"Energia Elétrica"`` -> ``"energia eletrica"``)."""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def termos(texto):
+    """Palavras normalizadas com pelo menos ``TAMANHO_MINIMO_TERMO`` letras, fora da lista de ignoradas."""
+    return [p for p in re.findall(r"\w+", normalizar(texto))
+            if len(p) >= TAMANHO_MINIMO_TERMO and p not in PALAVRAS_IGNORADAS and not p.isdigit()]
+
+
+def _coluna_principal(colunas):
+    """Entre colunas da mesma base (DY ATUAL, DY 2024...), a atual; senão a de nome mais curto."""
+    return next((c for c in colunas if "atual" in normalizar(c)), min(colunas, key=len))
+
+
+def _contem_frase(texto_normalizado, frase):
+    return re.search(r"(?<!\w)" + re.escape(frase) + r"(?!\w)", texto_normalizado) is not None
+
+
+@dataclass
+class Recuperacao:
+    """Resultado da recuperação para uma pergunta."""
+    frames: dict  # conjunto -> DataFrame reduzido (ou completo, se ``ampla``)
+    ampla: bool
+    tickers: list = field(default_factory=list)
+    termos: list = field(default_factory=list)
+    colunas: list = field(default_factory=list)
+    condicoes: list = field(default_factory=list)
+    faixas: dict = field(default_factory=dict)  # coluna -> (mínimo, máximo)
+
+    @property
+    def linhas(self):
+        return sum(len(df) for df in self.frames.values())
+
+    def descricao(self):
+        """Resumo do que foi reconhecido na pergunta (vai para o prompt junto com os dados)."""
+        partes = []
+        if self.tickers:
+            partes.append(f"Tickers citados: {', '.join(self.tickers)}")
+        if self.termos:
+            partes.append(f"Termos reconhecidos: {', '.join(self.termos)}")
+        if self.condicoes:
+            partes.append(f"Filtros aplicados: {'; '.join(self.condicoes)}")
+        for coluna, (minimo, maximo) in self.faixas.items():
+            partes.append(f"Faixa de {coluna} em todos os dados: {minimo:.4g} a {maximo:.4g}")
+        if not self.ampla:
+            partes.append(f"Linhas selecionadas: {self.linhas}")
+        return "\n".join(partes)
+
+
+class IndiceRecuperacao:
+    """
+    Índice local sobre os DataFrames extraídos para selecionar o que cada pergunta precisa.
+    """
+
+    def __init__(self, frames, carteiras=()):
+        """
+        Monta o índice.
+
+        Args:
+            frames (dict): Nome do conjunto -> DataFrame tipado
+            carteiras (iterable): Conjuntos que são posições de carteira
+        """
+        self.frames = {nome: df for nome, df in frames.items() if df is not None and not df.empty}
+        self.carteiras = set(carteiras)
+        self.tickers = {}  # ticker -> [(conjunto, posição)]
+        self.termos = {}  # termo -> {(conjunto, coluna): [valores]}
+        self.colunas = {}  # frase normalizada (nome completo ou base) -> [(conjunto, coluna)]
+        self.termos_colunas = {}  # palavra distintiva do nome -> [(conjunto, coluna)]
+        self.faixas = {}  # (conjunto, coluna) -> (mínimo, máximo)
+
+        for nome, df in self.frames.items():
+            self._indexar(nome, df)
+        logger.info(f"Índice de recuperação: {len(self.tickers)} tickers, {len(self.termos)} termos, "
+                    f"{len(self.colunas)} nomes de colunas")
+
+    def _indexar(self, conjunto, df):
+        coluna_ticker = identificar_coluna_ticker(df)
+        tickers = df[coluna_ticker].astype(str).str.upper().to_numpy()
+        for posicao, ticker in enumerate(tickers):
+            self.tickers.setdefault(ticker, []).append((conjunto, posicao))
+
+        for coluna in df.columns:
+            if coluna == coluna_ticker or coluna in COLUNAS_IGNORADAS:
+                continue
+            nome = normalizar(coluna)
+            base = PADRAO_ANO_OU_ATUAL.sub("", nome).strip()
+            for frase in {nome, base}:
+                self.colunas.setdefault(frase, []).append((conjunto, coluna))
+            for termo in re.findall(r"\w+", base):
+                if len(termo) >= TAMANHO_MINIMO_TERMO and termo not in TERMOS_COLUNA_IGNORADOS and not termo.isdigit():
+                    self.termos_colunas.setdefault(termo, []).append((conjunto, coluna))
+
+            serie = df[coluna]
+            if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+                if not np.isnan(valores).all():
+                    self.faixas[(conjunto, coluna)] = (float(np.nanmin(valores)), float(np.nanmax(valores)))
+                continue
+
+            # Textos: indexar os valores distintos (categorias), não as linhas
+            distintos = serie.dropna().astype(str).unique()
+            for valor in distintos:
+                for termo in set(termos(valor)):
+                    self.termos.setdefault(termo, {}).setdefault((conjunto, coluna), []).append(valor)
+
+    def _colunas_citadas(self, pergunta_normalizada):
+        """Colunas cujo nome (completo, sem ano, ou palavra distintiva) aparece na pergunta."""
+        citadas, frases = [], []
+        for frase, colunas in self.colunas.items():
+            if _contem_frase(pergunta_normalizada, frase):
+                citadas.extend(colunas)
+                frases.append(frase)
+        for termo in re.findall(r"\w+", pergunta_normalizada):
+            citadas.extend(self.termos_colunas.get(termo, []))
+        return list(dict.fromkeys(citadas)), frases
+
+    def _condicoes(self, pergunta_normalizada, frases):
+        """
+        Reconhece "<coluna> <operador> <número>" (ex: "dy acima de 8", "p/vp < 1").
+
+        Returns:
+            dict: conjunto -> [(coluna, operador, valor)]
+        """
+        condicoes = {}
+        for frase in frases:
+            for padrao, operador in OPERADORES_TEXTO:
+                busca = re.search(r"(?<!\w)" + re.escape(frase) + r"(?!\w)\s*(?:de\s+|for\s+|e\s+)?(?:" + padrao +
+                                  r")\s*" + PADRAO_NUMERO, pergunta_normalizada)
+                if not busca:
+                    continue
+                valor = float(busca.group(1).replace(",", "."))
+                # Com várias colunas na mesma base (DY ATUAL, DY 2024...), o filtro vale para a atual
+                por_conjunto = {}
+                for conjunto, coluna in self.colunas[frase]:
+                    if (conjunto, coluna) in self.faixas:
+                        por_conjunto.setdefault(conjunto, []).append(coluna)
+                for conjunto, colunas in por_conjunto.items():
+                    condicoes.setdefault(conjunto, []).append((_coluna_principal(colunas), operador, valor))
+                break
+        return condicoes
+
+    def recuperar(self, pergunta):
+        """
+        Seleciona as linhas e colunas relevantes para a pergunta.
+
+        Args:
+            pergunta (str): Pergunta do usuário
+
+        Returns:
+            Recuperacao: Frames reduzidos, ou os completos com ``ampla=True`` se nada específico foi reconhecido.
+        """
+        normalizada = normalizar(pergunta)
+        citados = tickers_mencionados(pergunta, self.tickers.keys())
+        colunas_citadas, frases = self._colunas_citadas(normalizada)
+        condicoes = self._condicoes(normalizada, frases)
+        termos_pergunta = [t for t in dict.fromkeys(termos(pergunta)) if t in self.termos]
+        quer_carteira = any(palavra in normalizada for palavra in PALAVRAS_CARTEIRA)
+
+        posicoes = {nome: np.zeros(len(df), dtype=bool) for nome, df in self.frames.items()}
+        for ticker in citados:
+            for conjunto, posicao in self.tickers[ticker]:
+                posicoes[conjunto][posicao] = True
+
+        # Termos e filtros se combinam (ex: "bancos com DY acima de 8"); tickers citados sempre entram
+        termos_usados, descricao_condicoes = [], []
+        for nome, df in self.frames.items():
+            mascara = None
+            for termo in termos_pergunta:
+                parcial = np.zeros(len(df), dtype=bool)
+                for (conjunto, coluna), valores in self.termos[termo].items():
+                    if conjunto == nome:
+                        parcial |= df[coluna].astype(object).isin(valores).to_numpy(dtype=bool)
+                if parcial.any() and parcial.mean() <= FRACAO_MAXIMA_TERMO:
+                    mascara = parcial if mascara is None else mascara | parcial
+                    termos_usados.append(termo)
+            for coluna, operador, valor in condicoes.get(nome, []):
+                try:
+                    parcial = compilar_filtro(f"{coluna} {operador} {valor}", [coluna])(df)
+                except FiltroInvalido:
+                    continue
+                mascara = parcial if mascara is None else mascara & parcial
+                descricao_condicoes.append(f"{nome}: {coluna} {operador} {valor:g}")
+            if mascara is not None:
+                posicoes[nome] |= mascara
+            if quer_carteira and nome in self.carteiras:
+                posicoes[nome][:] = True
+
+        # Faixas só da coluna principal de cada nome citado (DY -> DY ATUAL), para não repetir anos
+        faixas = {}
+        for frase in frases:
+            por_conjunto = {}
+            for conjunto, coluna in self.colunas[frase]:
+                if (conjunto, coluna) in self.faixas:
+                    por_conjunto.setdefault(conjunto, []).append(coluna)
+            for conjunto, colunas in por_conjunto.items():
+                coluna = _coluna_principal(colunas)
+                faixas.setdefault(coluna, self.faixas[(conjunto, coluna)])
+
+        # Um filtro reconhecido que não casa nenhuma linha é uma resposta ("nenhum ativo"), não uma pergunta ampla
+        ampla = not (citados or termos_usados or descricao_condicoes or
+                     (quer_carteira and any(nome in self.carteiras for nome in self.frames)))
+        frames = {}
+        for nome, df in self.frames.items():
+            if ampla:
+                selecionado = df
+            elif posicoes[nome].any():
+                selecionado = df.iloc[np.flatnonzero(posicoes[nome])]
+            else:
+                continue
+            # Todas as colunas seguem: as citadas só ganham prioridade na montagem do contexto
+            frames[nome] = selecionado
+
+        return Recuperacao(frames=frames, ampla=ampla, tickers=citados, termos=list(dict.fromkeys(termos_usados)),
+                           colunas=list(dict.fromkeys(coluna for _, coluna in colunas_citadas)), condicoes=descricao_condicoes,
+                           faixas=faixas)
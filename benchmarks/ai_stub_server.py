@@ -0,0 +1,211 @@
+"""
+Servidor HTTP local que substitui o modelo de IA, com respostas determinísticas em streaming.
+
+Responde ao protocolo do ``ProvedorLocal`` (``ai_providers``): ``POST /gerar`` com
+``{"prompt": ...}`` devolve linhas JSON ``{"texto": ...}`` e, no fim,
+``{"fim": true, "modelo": ...}``. A resposta é escolhida entre respostas
+gravadas pelo hash do prompt (o mesmo prompt sempre recebe a mesma resposta);
+sem arquivo de respostas, usa respostas em Markdown geradas como no
+``bench_markdown``.
+
+A latência é configurável: atraso até o primeiro trecho, custo por mil tokens
+do prompt (o "prefill", que torna prompts maiores mais lentos) e intervalo entre
+trechos. Assim o chat inteiro (montagem do prompt, cache, streaming e
+renderização) pode ser testado e perfilado sem rede nem API key.
+
+Uso:
+    python benchmarks/ai_stub_server.py --porta 8766 --primeiro-trecho-ms 300 --ms-por-trecho 20
+    python benchmarks/ai_stub_server.py --respostas respostas.json   # lista JSON de textos
+
+No ``config.json``: ``"ia_provedor": "local"`` e ``"ia_url_local": "http://127.0.0.1:8766"``.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from ai_context import estimar_tokens
+from bench_markdown import gerar_resposta
+
+# Constantes
+NOME_MODELO = "modelo-local"
+TAMANHOS_RESPOSTA_KB = (2, 8, 20)
+PRIMEIRO_TRECHO_MS_PADRAO = 300.0
+MS_POR_MIL_TOKENS_PADRAO = 10.0
+MS_POR_TRECHO_PADRAO = 20.0
+TAMANHO_TRECHO_PADRAO = 120
+
+logger = logging.getLogger(__name__)
+
+
+class ServidorIALocal:
+    """
+    Servidor HTTP em thread própria que simula um modelo de IA com streaming.
+    """
+
+    def __init__(self, respostas=None, host="127.0.0.1", porta=0, primeiro_trecho_ms=PRIMEIRO_TRECHO_MS_PADRAO,
+                 ms_por_mil_tokens=MS_POR_MIL_TOKENS_PADRAO, ms_por_trecho=MS_POR_TRECHO_PADRAO,
+                 tamanho_trecho=TAMANHO_TRECHO_PADRAO):
+        """
+        Inicializa o servidor (sem iniciá-lo).
+
+        Args:
+            respostas (list): Textos das respostas (padrão: respostas geradas de 2, 8 e 20 KB)
+            host (str): Endereço de escuta
+            porta (int): Porta de escuta (0 = porta livre escolhida pelo sistema)
+            primeiro_trecho_ms (float): Atraso fixo até o primeiro trecho
+            ms_por_mil_tokens (float): Atraso adicional por mil tokens do prompt
+            ms_por_trecho (float): Intervalo entre trechos
+            tamanho_trecho (int): Caracteres por trecho
+        """
+        self.respostas = list(respostas) if respostas else [gerar_resposta(kb, semente=kb)
+                                                             for kb in TAMANHOS_RESPOSTA_KB]
+        self.host = host
+        self.porta = porta
+        self.primeiro_trecho_ms = primeiro_trecho_ms
+        self.ms_por_mil_tokens = ms_por_mil_tokens
+        self.ms_por_trecho = ms_por_trecho
+        self.tamanho_trecho = tamanho_trecho
+        self.requisicoes = 0
+        self.tokens_recebidos = 0
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL base do servidor em execução (usada como ``ia_url_local``)."""
+        return f"http://{self.host}:{self.porta}"
+
+    def escolher_resposta(self, prompt):
+        """Resposta determinística para o prompt (mesmo prompt, mesma resposta)."""
+        indice = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "big")
+        return self.respostas[indice % len(self.respostas)]
+
+    def trechos(self, prompt):
+        """
+        Gera os trechos da resposta com as latências configuradas.
+
+        Returns:
+            iterator: Trechos de texto.
+        """
+        tokens = estimar_tokens(prompt)
+        with self._lock:
+            self.requisicoes += 1
+            self.tokens_recebidos += tokens
+        time.sleep((self.primeiro_trecho_ms + tokens / 1000 * self.ms_por_mil_tokens) / 1000)
+        resposta = self.escolher_resposta(prompt)
+        for inicio in range(0, len(resposta), self.tamanho_trecho):
+            if inicio and self.ms_por_trecho:
+                time.sleep(self.ms_por_trecho / 1000)
+            yield resposta[inicio:inicio + self.tamanho_trecho]
+
+    def _criar_handler(self):
+        """Cria a classe de handler ligada a este servidor."""
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.0: a resposta termina quando a conexão fecha, sem Content-Length
+            protocol_version = "HTTP/1.0"
+            disable_nagle_algorithm = True
+
+            def _enviar_linha(self, mensagem):
+                self.wfile.write(json.dumps(mensagem, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                if self.path.split("?", 1)[0].rstrip("/") != "/gerar":
+                    self.send_error(404)
+                    return
+                try:
+                    corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    prompt = json.loads(corpo)["prompt"]
+                except (ValueError, KeyError) as e:
+                    self.send_error(400, f"Requisição inválida: {e}")
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+                self.end_headers()
+                try:
+                    for trecho in servidor.trechos(prompt):
+                        self._enviar_linha({"texto": trecho})
+                    self._enviar_linha({"fim": True, "modelo": NOME_MODELO})
+                except (BrokenPipeError, ConnectionResetError):
+                    logger.debug("Cliente desconectou durante o streaming")
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def iniciar(self):
+        """
+        Inicia o servidor em uma thread daemon.
+
+        Returns:
+            str: URL base do servidor.
+        """
+        self._servidor = ThreadingHTTPServer((self.host, self.porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Servidor de IA local em {self.url}")
+        return self.url
+
+    def parar(self):
+        """Encerra o servidor."""
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que substitui o modelo de IA")
+    parser.add_argument("--porta", type=int, default=8766, help="Porta de escuta")
+    parser.add_argument("--respostas", help="Arquivo JSON com a lista de respostas gravadas")
+    parser.add_argument("--primeiro-trecho-ms", type=float, default=PRIMEIRO_TRECHO_MS_PADRAO)
+    parser.add_argument("--ms-por-mil-tokens", type=float, default=MS_POR_MIL_TOKENS_PADRAO)
+    parser.add_argument("--ms-por-trecho", type=float, default=MS_POR_TRECHO_PADRAO)
+    parser.add_argument("--tamanho-trecho", type=int, default=TAMANHO_TRECHO_PADRAO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    respostas = None
+    if args.respostas:
+        with open(args.respostas, "r", encoding="utf-8") as f:
+            respostas = json.load(f)
+
+    servidor = ServidorIALocal(respostas, porta=args.porta, primeiro_trecho_ms=args.primeiro_trecho_ms,
+                               ms_por_mil_tokens=args.ms_por_mil_tokens, ms_por_trecho=args.ms_por_trecho,
+                               tamanho_trecho=args.tamanho_trecho)
+    servidor.iniciar()
+    print(f"Servidor de IA local em {servidor.url} (Ctrl+C para encerrar)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Teste de carga do chat da IA contra o servidor local (sem rede nem API key).
+
+Percorre o mesmo caminho do ``DataViewer`` para cada pergunta: cache de
+respostas, recuperação das linhas relevantes, montagem do contexto dentro do
+orçamento, geração em streaming pelo ``ProvedorLocal`` e renderização
+incremental do Markdown (em um widget simulado). Vários usuários simultâneos
+repetem a lista de perguntas; a última repete a primeira para exercitar o cache.
+
+Para cada pergunta mostra tokens do prompt, tempo de montagem, tempo até o
+primeiro trecho e tempo total (p50/p95 entre os usuários). Com ``--perfil`` a
+execução roda sob o cProfile e as funções mais caras são listadas.
+
+Uso:
+    python benchmarks/bench_ai_chat.py
+    python benchmarks/bench_ai_chat.py --linhas 20000 --usuarios 8 --primeiro-trecho-ms 500 --perfil /tmp/chat.prof
+"""
+
+import argparse
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from ai_cache import CacheRespostas
+from ai_context import ConstrutorContexto, estimar_tokens
+from ai_providers import ProvedorLocal
+from ai_retrieval import IndiceRecuperacao
+from ai_stub_server import ServidorIALocal
+from bench_ai_context import gerar_frames
+from bench_markdown import TextoSimulado
+from extraction_tracer import percentil
+from markdown_renderer import RenderizadorMarkdown
+from run_benchmarks import carregar_colunas
+from statistics_engine import MotorEstatisticas
+
+# Constantes
+LINHAS_PADRAO = 5000
+USUARIOS_PADRAO = 4
+ORCAMENTO_TOKENS = 30000
+VERSAO_PROMPT = "bench-1"
+FUNCOES_PERFIL = 15
+
+
+class ChatSimulado:
+    """
+    Reproduz o fluxo de uma pergunta no chat do DataViewer sem a interface gráfica.
+    """
+
+    def __init__(self, frames, provedor, cache):
+        self.frames = frames
+        self.provedor = provedor
+        self.cache = cache
+        self.motor = MotorEstatisticas()
+        self.construtor = ConstrutorContexto(ORCAMENTO_TOKENS, self.motor)
+        self.indice = IndiceRecuperacao(frames, carteiras=("carteira_acoes",))
+        self.hash_dados = "|".join(f"{nome}={self.motor.obter(df).hash_dados}" for nome, df in frames.items())
+
+    def perguntar(self, pergunta):
+        """
+        Responde uma pergunta, medindo cada etapa.
+
+        Returns:
+            dict: tokens, montagem_ms, primeiro_trecho_ms, total_ms, cache.
+        """
+        inicio = time.perf_counter()
+        renderizador = RenderizadorMarkdown(TextoSimulado())
+        renderizador.iniciar("🔄 Processando...")
+
+        resposta = self.cache.obter(self.provedor.nome, VERSAO_PROMPT, self.hash_dados, pergunta)
+        if resposta is not None:
+            renderizador.anexar(resposta)
+            renderizador.concluir()
+            ms = (time.perf_counter() - inicio) * 1000
+            return {"tokens": 0, "montagem_ms": 0.0, "primeiro_trecho_ms": ms, "total_ms": ms, "cache": True}
+
+        recuperacao = self.indice.recuperar(pergunta)
+        contexto = self.construtor.construir(self.frames if recuperacao.ampla else recuperacao.frames, pergunta,
+                                             carteiras=("carteira_acoes",), colunas=recuperacao.colunas)
+        prompt = f"{contexto}\n\n**PERGUNTA DO USUÁRIO:**\n{pergunta}\n"
+        montagem_ms = (time.perf_counter() - inicio) * 1000
+
+        primeiro_trecho_ms, trechos = None, []
+        for trecho in self.provedor.gerar_stream(prompt):
+            if primeiro_trecho_ms is None:
+                primeiro_trecho_ms = (time.perf_counter() - inicio) * 1000
+            trechos.append(trecho)
+            renderizador.anexar(trecho)
+        renderizador.concluir()
+        self.cache.gravar(self.provedor.nome, VERSAO_PROMPT, self.hash_dados, pergunta, "".join(trechos))
+        return {"tokens": estimar_tokens(prompt), "montagem_ms": montagem_ms,
+                "primeiro_trecho_ms": primeiro_trecho_ms or 0.0,
+                "total_ms": (time.perf_counter() - inicio) * 1000, "cache": False}
+
+
+def perguntas_padrao(frames):
+    """Perguntas específicas, com filtro, ampla e uma repetida (para o cache)."""
+    acoes = frames["acoes"]["Ticker"].astype(str)
+    perguntas = [
+        f"Compare {acoes.iloc[0]} e {acoes.iloc[len(acoes) // 2]}",
+        "Quais ações têm DY acima de 8 e P/VP abaixo de 1?",
+        "Me dê uma visão geral do mercado",
+    ]
+    return perguntas + perguntas[:1]
+
+
+def executar(linhas, usuarios, opcoes_servidor):
+    """
+    Executa o teste de carga.
+
+    Returns:
+        dict: Pergunta -> métricas agregadas entre os usuários.
+    """
+    colunas, colunas_fiis = carregar_colunas()
+    frames = gerar_frames(linhas, colunas, colunas_fiis)
+    perguntas = perguntas_padrao(frames)
+
+    medicoes = [[] for _ in perguntas]  # por posição: a última pergunta repete a primeira
+    lock = threading.Lock()
+    with ServidorIALocal(**opcoes_servidor) as servidor, tempfile.TemporaryDirectory() as pasta:
+        provedor = ProvedorLocal(servidor.url)
+
+        def usuario(numero):
+            # Cada usuário tem o próprio cache: a repetição só aproveita as respostas dele
+            with CacheRespostas(os.path.join(pasta, f"cache_{numero}.db")) as cache:
+                chat = ChatSimulado(frames, provedor, cache)
+                for i, pergunta in enumerate(perguntas):
+                    metricas = chat.perguntar(pergunta)
+                    with lock:
+                        medicoes[i].append(metricas)
+
+        if usuarios == 1:
+            usuario(0)  # na thread atual, para o cProfile enxergar todas as etapas
+        else:
+            threads = [threading.Thread(target=usuario, args=(n,), daemon=True) for n in range(usuarios)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    resultados = {}
+    for indice, pergunta in enumerate(perguntas):
+        por_usuario = medicoes[indice]
+        chave = f"{indice + 1}. {pergunta}"
+        resultados[chave] = {"tokens": max(m["tokens"] for m in por_usuario),
+                             "cache": all(m["cache"] for m in por_usuario)}
+        for metrica in ("montagem_ms", "primeiro_trecho_ms", "total_ms"):
+            valores = sorted(m[metrica] for m in por_usuario)
+            resultados[chave][f"{metrica}_p50"] = percentil(valores, 50)
+            resultados[chave][f"{metrica}_p95"] = percentil(valores, 95)
+    return resultados
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados como tabela de texto."""
+    linhas = [f"{'Pergunta':<52}{'Tokens':>8}{'Montagem':>10}{'1º trecho p50/p95':>20}{'Total p50/p95':>18}",
+              "-" * 108]
+    for pergunta, r in resultados.items():
+        nome = pergunta if len(pergunta) <= 50 else pergunta[:47] + "..."
+        if r["cache"]:
+            nome = (nome + " [cache]")[:51]
+        linhas.append(f"{nome:<52}{r['tokens']:>8}{r['montagem_ms_p50']:>9.0f} "
+                      f"{r['primeiro_trecho_ms_p50']:>10.0f}/{r['primeiro_trecho_ms_p95']:<8.0f}"
+                      f"{r['total_ms_p50']:>9.0f}/{r['total_ms_p95']:<8.0f}")
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do chat da IA com o servidor local")
+    parser.add_argument("--linhas", type=int, default=LINHAS_PADRAO, help="Linhas de resultados sintéticos")
+    parser.add_argument("--usuarios", type=int, default=USUARIOS_PADRAO, help="Usuários simultâneos")
+    parser.add_argument("--primeiro-trecho-ms", type=float, default=300.0)
+    parser.add_argument("--ms-por-mil-tokens", type=float, default=10.0)
+    parser.add_argument("--ms-por-trecho", type=float, default=20.0)
+    parser.add_argument("--perfil", help="Grava o perfil do cProfile neste arquivo e lista as funções mais caras")
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    opcoes_servidor = {"primeiro_trecho_ms": args.primeiro_trecho_ms, "ms_por_mil_tokens": args.ms_por_mil_tokens,
+                       "ms_por_trecho": args.ms_por_trecho}
+
+    if args.perfil:
+        # O cProfile só acompanha a thread atual: com perfil, um único usuário
+        if args.usuarios != 1:
+            print("Com --perfil o teste roda com um único usuário.")
+        perfil = cProfile.Profile()
+        resultados = perfil.runcall(executar, args.linhas, 1, opcoes_servidor)
+        perfil.dump_stats(args.perfil)
+    else:
+        resultados = executar(args.linhas, args.usuarios, opcoes_servidor)
+
+    print(formatar_tabela(resultados))
+    if args.perfil:
+        print(f"\nPerfil gravado em {args.perfil}")
+        pstats.Stats(args.perfil).sort_stats("cumulative").print_stats(FUNCOES_PERFIL)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"linhas": args.linhas, "usuarios": args.usuarios, "resultados": resultados},
+                      f, ensure_ascii=False, indent=4)
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Benchmark do contexto enviado à IA: dump em CSV cortado em 800 mil caracteres x ConstrutorContexto
+x recuperação das linhas relevantes para a pergunta (IndiceRecuperacao).
+
+Gera resultados sintéticos tipados com as colunas do ``config.json``, uma carteira
+e uma pergunta citando um ticker, e monta o contexto das duas formas. Cada
+contexto é "enviado" a um modelo local substituto (sem rede) que cobra latência
+por token de entrada e tem uma janela de contexto limitada; o modelo devolve
+quais tickers da carteira e da pergunta ele consegue enxergar no prompt.
+
+Uso:
+    python benchmarks/bench_ai_context.py
+    python benchmarks/bench_ai_context.py --linhas 500 5000 --orcamentos 8000 30000 --saida /tmp/contexto.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from ai_context import ConstrutorContexto, estimar_tokens
+from ai_retrieval import IndiceRecuperacao
+from bench_export_formats import VALORES_EXEMPLO
+from result_frames import construir_frame
+from run_benchmarks import carregar_colunas
+from statistics_engine import MotorEstatisticas
+
+# Constantes
+LINHAS_PADRAO = (500, 5000, 20000)
+ORCAMENTOS_PADRAO = (8000, 30000)
+REPETICOES_PADRAO = 3
+LIMITE_CARACTERES_ANTIGO = 800000
+POSICOES_CARTEIRA = 15
+JANELA_MODELO_TOKENS = 128000
+LATENCIA_MS_POR_MIL_TOKENS = 25.0
+
+
+class ModeloLocal:
+    """
+    Substituto local do modelo: custo proporcional aos tokens de entrada e janela limitada.
+    """
+
+    def __init__(self, janela_tokens=JANELA_MODELO_TOKENS, ms_por_mil_tokens=LATENCIA_MS_POR_MIL_TOKENS):
+        self.janela_tokens = janela_tokens
+        self.ms_por_mil_tokens = ms_por_mil_tokens
+
+    def responder(self, prompt, tickers_procurados):
+        """
+        Simula uma chamada ao modelo.
+
+        Returns:
+            dict: tokens, latência simulada (ms), se coube na janela e tickers encontrados em linhas de dados.
+        """
+        tokens = estimar_tokens(prompt)
+        # Só o que cabe na janela é "lido"; o resto é descartado como faria a API (ou a requisição falharia)
+        visivel = prompt if tokens <= self.janela_tokens else prompt[:self.janela_tokens * 4]
+        linhas_dados = {linha.split(",", 1)[0] for linha in visivel.splitlines() if "," in linha}
+        encontrados = [ticker for ticker in tickers_procurados if ticker in linhas_dados]
+        return {
+            "tokens": tokens,
+            "latencia_ms": tokens / 1000 * self.ms_por_mil_tokens,
+            "coube_na_janela": tokens <= self.janela_tokens,
+            "encontrados": len(encontrados),
+        }
+
+
+def gerar_tickers(quantidade, sufixos, semente):
+    aleatorio = random.Random(semente)
+    tickers = set()
+    while len(tickers) < quantidade:
+        letras = "".join(aleatorio.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(4))
+        tickers.add(f"{letras}{aleatorio.choice(sufixos)}")
+    return sorted(tickers)
+
+
+def gerar_frames(linhas, colunas, colunas_fiis):
+    """
+    Gera ações, FIIs e uma carteira de ações sintéticos já tipados.
+
+    Returns:
+        dict: Nome do conjunto -> DataFrame.
+    """
+    def registros(tickers, colunas_config, origem):
+        for i, ticker in enumerate(tickers):
+            registro = {"Ticker": ticker, "Origem": origem}
+            for coluna in colunas_config:
+                registro[coluna["nome"]] = VALORES_EXEMPLO.get(coluna.get("formato_excel", "Texto"),
+                                                               VALORES_EXEMPLO["Texto"])(i)
+            yield registro
+
+    quantidade_fiis = max(linhas // 10, 1)
+    acoes = gerar_tickers(linhas - quantidade_fiis, ("3", "4"), 1)
+    fiis = gerar_tickers(quantidade_fiis, ("11",), 2)
+    carteira = random.Random(3).sample(acoes, min(POSICOES_CARTEIRA, len(acoes)))
+    return {
+        "carteira_acoes": construir_frame([{"Ativo": t, "Quantidade": str(100 + i), "Preço Médio": f"R$ {10 + i},50"}
+                                           for i, t in enumerate(carteira)]),
+        "acoes": construir_frame(registros(acoes, colunas, "Ação"), colunas),
+        "fiis": construir_frame(registros(fiis, colunas_fiis, "FII"), colunas_fiis),
+    }
+
+
+def contexto_antigo(frames):
+    """
+    Reproduz o contexto anterior: todos os conjuntos em CSV, cortados em 800 mil caracteres.
+
+    Returns:
+        tuple: (texto, se o corte partiu uma linha ao meio).
+    """
+    partes = ["**DADOS DISPONÍVEIS PARA ANÁLISE:**"]
+    for nome, df in frames.items():
+        partes.append(f"\n**{nome} ({len(df)} registros):**")
+        partes.append(df.to_csv(index=False))
+    texto = "\n".join(partes)
+    if len(texto) <= LIMITE_CARACTERES_ANTIGO:
+        return texto, False
+    cortada = texto[LIMITE_CARACTERES_ANTIGO - 1] != "\n"
+    return texto[:LIMITE_CARACTERES_ANTIGO] + "\n... [DADOS TRUNCADOS]", cortada
+
+
+def medir(funcao, repeticoes):
+    """Executa a função ``repeticoes`` vezes e retorna (melhor tempo em ms, último resultado)."""
+    tempos, resultado = [], None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tempos), resultado
+
+
+def executar(linhas, orcamentos, repeticoes, colunas, colunas_fiis):
+    """
+    Compara as duas formas de montar o contexto para um tamanho de resultado.
+
+    Returns:
+        dict: Estratégia -> métricas.
+    """
+    frames = gerar_frames(linhas, colunas, colunas_fiis)
+    carteira = frames["carteira_acoes"]["Ativo"].astype(str).tolist()
+    citado = frames["acoes"]["Ticker"].iloc[-1]  # último da lista: o mais prejudicado pelo corte
+    pergunta = f"Como está o {citado.lower()} em relação à minha carteira?"
+    procurados = carteira + [citado]
+    modelo = ModeloLocal()
+
+    resultados = {}
+    ms, (texto, cortada) = medir(lambda: contexto_antigo(frames), repeticoes)
+    resposta = modelo.responder(texto, procurados)
+    resultados["csv_800k"] = {"ms_frio": ms, "ms_quente": ms, "caracteres": len(texto),
+                              "linha_cortada": cortada, **resposta}
+
+    for orcamento in orcamentos:
+        construtor = ConstrutorContexto(orcamento, MotorEstatisticas())
+        inicio = time.perf_counter()
+        texto = construtor.construir(frames, pergunta)
+        ms_frio = (time.perf_counter() - inicio) * 1000
+        ms_quente, _ = medir(lambda: construtor.construir(frames, pergunta), repeticoes)
+        resposta = modelo.responder(texto, procurados)
+        resultados[f"orcamento_{orcamento}"] = {"ms_frio": ms_frio, "ms_quente": ms_quente, "caracteres": len(texto),
+                                                "linha_cortada": False, **resposta}
+
+    # Recuperação: o índice é montado uma vez (ao abrir o visualizador); cada pergunta só consulta
+    inicio = time.perf_counter()
+    indice = IndiceRecuperacao(frames, carteiras=("carteira_acoes",))
+    ms_indice = (time.perf_counter() - inicio) * 1000
+    construtor = ConstrutorContexto(max(orcamentos), MotorEstatisticas())
+
+    def recuperar_e_construir():
+        recuperacao = indice.recuperar(pergunta)
+        return construtor.construir(frames if recuperacao.ampla else recuperacao.frames, pergunta,
+                                    carteiras=("carteira_acoes",), colunas=recuperacao.colunas)
+
+    inicio = time.perf_counter()
+    texto = recuperar_e_construir()
+    ms_frio = (time.perf_counter() - inicio) * 1000
+    ms_quente, _ = medir(recuperar_e_construir, repeticoes)
+    resposta = modelo.responder(texto, procurados)
+    resultados["recuperacao"] = {"ms_frio": ms_frio, "ms_quente": ms_quente, "ms_indice": ms_indice,
+                                 "caracteres": len(texto), "linha_cortada": False, **resposta}
+
+    for r in resultados.values():
+        r["procurados"] = len(procurados)
+    return resultados
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados como tabela de texto."""
+    linhas_tabela = [f"{'Linhas':>7}  {'Estratégia':<17}{'Montagem ms':>12}{'Cache ms':>9}{'Tokens':>9}"
+                     f"{'Modelo ms':>10}{'Janela':>9}{'Achados':>9}{'Corte':>7}",
+                     "-" * 89]
+    for linhas, por_estrategia in resultados.items():
+        for estrategia, r in por_estrategia.items():
+            linhas_tabela.append(
+                f"{linhas:>7}  {estrategia:<17}{r['ms_frio']:>12.1f}{r['ms_quente']:>9.1f}{r['tokens']:>9}"
+                f"{r['latencia_ms']:>10.0f}{'ok' if r['coube_na_janela'] else 'ESTOUROU':>9}"
+                f"{r['encontrados']:>5}/{r['procurados']:<3}{'linha' if r['linha_cortada'] else '-':>7}")
+    return "\n".join(linhas_tabela)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do contexto enviado à IA")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(LINHAS_PADRAO))
+    parser.add_argument("--orcamentos", type=int, nargs="+", default=list(ORCAMENTOS_PADRAO),
+                        help="Orçamentos de tokens do ConstrutorContexto")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    colunas, colunas_fiis = carregar_colunas()
+
+    resultados = {linhas: executar(linhas, args.orcamentos, args.repeticoes, colunas, colunas_fiis)
+                  for linhas in args.linhas}
+
+    print(formatar_tabela(resultados))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"repeticoes": args.repeticoes, "resultados": resultados}, f, ensure_ascii=False, indent=4)
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark dos formatos de exportação: Excel (xlsxwriter) x CSV, JSON Lines, Parquet e Feather.
+
+Gera resultados sintéticos tipados com as colunas do ``config.json`` e mede, para
+cada formato, o tempo de gravação e o tamanho dos arquivos.
+
+Uso:
+    python benchmarks/bench_export_formats.py
+    python benchmarks/bench_export_formats.py --linhas 1000 50000 --repeticoes 3 --saida /tmp/formatos.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+import pandas as pd
+
+from excel_exporter import ExcelExporter
+from format_exporter import ExportadorFormatos, FORMATOS_SUPORTADOS, PYARROW_AVAILABLE, FORMATOS_ARROW
+from result_frames import construir_frame
+from run_benchmarks import carregar_colunas
+
+# Constantes
+LINHAS_PADRAO = (1000, 10000, 50000)
+REPETICOES_PADRAO = 3
+VALORES_EXEMPLO = {
+    "Moeda": lambda i: f"R$ {i % 500},{i % 100:02d}",
+    "Porcentagem": lambda i: "N/A" if i % 11 == 0 else f"{i % 20},{i % 10}%",
+    "Número": lambda i: f"{i % 90},{i % 7}",
+    "Texto": lambda i: ("Bancos", "Energia Elétrica", "Varejo", "Saneamento")[i % 4],
+}
+
+
+def gerar_frames(linhas, colunas, colunas_fiis):
+    """
+    Gera ações e FIIs sintéticos já tipados, na proporção de 9 ações para 1 FII.
+
+    Returns:
+        dict: Tipo de ativo -> DataFrame.
+    """
+    def registros(quantidade, colunas_config, prefixo, origem):
+        for i in range(quantidade):
+            registro = {"Ticker": f"{prefixo}{i:05d}", "Origem": origem}
+            for coluna in colunas_config:
+                registro[coluna["nome"]] = VALORES_EXEMPLO.get(coluna.get("formato_excel", "Texto"),
+                                                               VALORES_EXEMPLO["Texto"])(i)
+            yield registro
+
+    quantidade_fiis = max(linhas // 10, 1)
+    return {
+        "acoes": construir_frame(registros(linhas - quantidade_fiis, colunas, "ACAO", "Ação"), colunas),
+        "fiis": construir_frame(registros(quantidade_fiis, colunas_fiis, "FII", "FII"), colunas_fiis),
+    }
+
+
+def medir(funcao, repeticoes):
+    """Executa a função ``repeticoes`` vezes e retorna o melhor tempo em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tempos)
+
+
+def tamanho_total(arquivos):
+    return sum(os.path.getsize(arquivo) for arquivo in arquivos)
+
+
+def executar(linhas, repeticoes, colunas, colunas_fiis, pasta):
+    """
+    Mede todos os formatos para um tamanho de resultado.
+
+    Returns:
+        dict: Formato -> {"ms": tempo, "bytes": tamanho}.
+    """
+    frames = gerar_frames(linhas, colunas, colunas_fiis)
+    resultados = {}
+
+    exportador_excel = ExcelExporter({"colunas_personalizadas": colunas, "colunas_personalizadas_fiis": colunas_fiis})
+    caminho_excel = os.path.join(pasta, f"dados_{linhas}.xlsx")
+    resultados["xlsx"] = {
+        "ms": medir(lambda: exportador_excel.write_workbook(caminho_excel, frames["acoes"], frames["fiis"],
+                                                            pd.DataFrame(), pd.DataFrame()), repeticoes),
+        "bytes": os.path.getsize(caminho_excel),
+    }
+
+    for formato in FORMATOS_SUPORTADOS:
+        if formato in FORMATOS_ARROW and not PYARROW_AVAILABLE:
+            continue
+        exportador = ExportadorFormatos([formato])
+        prefixo = f"dados_{linhas}_"
+        tempo = medir(lambda: exportador.exportar(frames, pasta, prefixo), repeticoes)
+        arquivos = [os.path.join(pasta, f"{prefixo}{nome}.{formato}") for nome in ("Acoes", "FIIs")]
+        resultados[formato] = {"ms": tempo, "bytes": tamanho_total(arquivos)}
+    return resultados
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados como tabela de texto, com o Excel como referência."""
+    linhas_tabela = [f"{'Linhas':>8}  {'Formato':<8}{'Tempo (ms)':>12}{'Tamanho (KiB)':>15}{'x Excel':>9}",
+                     "-" * 52]
+    for linhas, por_formato in resultados.items():
+        referencia = por_formato["xlsx"]["ms"]
+        for formato, r in por_formato.items():
+            linhas_tabela.append(f"{linhas:>8}  {formato:<8}{r['ms']:>12.1f}{r['bytes'] / 1024:>15.1f}"
+                                 f"{referencia / r['ms'] if r['ms'] else 0:>8.1f}x")
+    return "\n".join(linhas_tabela)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos formatos de exportação")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(LINHAS_PADRAO))
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    colunas, colunas_fiis = carregar_colunas()
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="bench_formatos_") as pasta:
+        for linhas in args.linhas:
+            resultados[linhas] = executar(linhas, args.repeticoes, colunas, colunas_fiis, pasta)
+
+    print(formatar_tabela(resultados))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"repeticoes": args.repeticoes, "resultados": resultados}, f, ensure_ascii=False, indent=4)
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Microbenchmark dos métodos do DataExtractor sobre o FakeWebDriver.
+
+Mede, por página, quantos comandos cada método envia ao driver e quanto tempo
+de CPU gasta, sem abrir o Chrome. Com ``--latencia-ms`` cada comando é cobrado
+com a latência informada, aproximando o custo de ida e volta do chromedriver.
+
+Uso:
+    python benchmarks/bench_fake_driver.py
+    python benchmarks/bench_fake_driver.py --repeticoes 20 --latencia-ms 2 --saida /tmp/micro.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from selenium.webdriver.common.by import By
+
+from data_extractor import DataExtractor
+from fake_driver import FakeWebDriver
+from run_benchmarks import carregar_colunas
+
+# Constantes
+URL_BASE = "http://fixtures.local"
+REPETICOES_PADRAO = 30
+
+
+def montar_casos(colunas, colunas_fiis):
+    """
+    Define os casos medidos: (nome, caminho da página, js_habilitado, função(extrator)).
+
+    Returns:
+        list: Casos do microbenchmark.
+    """
+    def tabela_fiis(extrator):
+        return extrator.driver.find_element(By.ID, "Fii-tickers")
+
+    def extrair_colunas(extrator, colunas_caso):
+        resultado = {}
+        extrator.extrair_colunas_personalizadas_otimizado(colunas_caso, resultado)
+        return resultado
+
+    return [
+        ("colunas_acao_js", "/acoes/BNCH0001/", True,
+         lambda e: extrair_colunas(e, colunas)),
+        ("colunas_acao_sem_js", "/acoes/BNCH0001/", False,
+         lambda e: extrair_colunas(e, colunas)),
+        ("colunas_fii_js", "/fiis/FNCH0001/", True,
+         lambda e: extrair_colunas(e, colunas_fiis)),
+        ("tabela_carteira_acoes", "/carteiras/resumo/", True,
+         lambda e: e._extrair_dados_tabela_selenium(id_tabela="Ticker-tickers")),
+        ("carteira_fallback_js", "/carteiras/resumo/", True,
+         lambda e: e._extrair_carteiras_fallback()),
+        ("fiis_fallback", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_fallback("#Fii-tickers")),
+        ("fiis_javascript", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_javascript("#Fii-tickers")),
+        ("fiis_direto", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_direto(tabela_fiis(e))),
+        ("fiis_javascript_melhorado", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_javascript_melhorado(tabela_fiis(e))),
+        ("fiis_por_linhas", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_por_linhas(tabela_fiis(e))),
+        ("fiis_fallback_final", "/carteiras/resumo/", True,
+         lambda e: e._extrair_fiis_fallback_final()),
+    ]
+
+
+def medir_caso(extrator, caminho, js_habilitado, funcao, repeticoes, latencia_ms):
+    """
+    Executa um caso várias vezes e agrega chamadas e tempo por página.
+
+    Returns:
+        dict: Métricas médias por página.
+    """
+    driver = FakeWebDriver(latencia_ms=latencia_ms, js_habilitado=js_habilitado)
+    driver.implicitly_wait(5)
+    extrator.driver = driver
+
+    chamadas_totais = 0
+    comandos = {}
+    buscas_vazias = 0
+    tempo_total = 0.0
+    linhas = 0
+    for _ in range(repeticoes):
+        driver.get(f"{URL_BASE}{caminho}")
+        driver.zerar_contadores()
+
+        inicio = time.perf_counter()
+        resultado = funcao(extrator)
+        tempo_total += time.perf_counter() - inicio
+
+        chamadas_totais += driver.total_chamadas
+        buscas_vazias += driver.buscas_sem_resultado
+        for comando, quantidade in driver.chamadas.items():
+            comandos[comando] = comandos.get(comando, 0) + quantidade
+        linhas = len(resultado) if isinstance(resultado, (list, dict)) else 0
+
+    return {
+        "chamadas_por_pagina": chamadas_totais / repeticoes,
+        "ms_por_pagina": tempo_total * 1000 / repeticoes,
+        "buscas_sem_resultado": buscas_vazias / repeticoes,
+        "espera_implicita_s": buscas_vazias / repeticoes * driver.espera_implicita,
+        "itens_extraidos": linhas,
+        "comandos": {comando: quantidade / repeticoes
+                     for comando, quantidade in sorted(comandos.items(), key=lambda item: -item[1])},
+    }
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados do microbenchmark como tabela de texto."""
+    cabecalho = f"{'Caso':<28}{'Chamadas':>10}{'ms/página':>11}{'Vazias':>8}{'Itens':>7}  Comandos mais frequentes"
+    linhas = [cabecalho, "-" * (len(cabecalho) + 20)]
+    for nome, r in resultados.items():
+        principais = ", ".join(f"{comando}={quantidade:g}" for comando, quantidade in list(r["comandos"].items())[:3])
+        linhas.append(f"{nome:<28}{r['chamadas_por_pagina']:>10.1f}{r['ms_por_pagina']:>11.2f}"
+                      f"{r['buscas_sem_resultado']:>8.1f}{r['itens_extraidos']:>7}  {principais}")
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark do DataExtractor com WebDriver falso")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Latência cobrada por comando do driver")
+    parser.add_argument("--casos", nargs="+", help="Executa apenas os casos informados")
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    colunas, colunas_fiis = carregar_colunas()
+    extrator = DataExtractor({"headless": True, "gerar_trace": False, "url_base": URL_BASE},
+                             status_callback=lambda mensagem, progresso: None)
+
+    resultados = {}
+    for nome, caminho, js_habilitado, funcao in montar_casos(colunas, colunas_fiis):
+        if args.casos and nome not in args.casos:
+            continue
+        resultados[nome] = medir_caso(extrator, caminho, js_habilitado, funcao, args.repeticoes, args.latencia_ms)
+
+    print(formatar_tabela(resultados))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"latencia_ms": args.latencia_ms, "repeticoes": args.repeticoes, "resultados": resultados},
+                      f, ensure_ascii=False, indent=4)
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
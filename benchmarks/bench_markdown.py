@@ -0,0 +1,333 @@
+"""
+Benchmark da renderização de respostas em Markdown no chat.
+
+Gera respostas sintéticas de 20 a 50 KB no estilo das análises da IA (títulos,
+parágrafos com negrito/itálico/código, listas e tabelas) e compara:
+
+- ``antigo``: o renderizador anterior do DataViewer (regex por linha, um
+  ``insert`` por segmento);
+- ``novo``: ``markdown_renderer`` com a resposta inteira (segmentos unidos,
+  inserções em lote);
+- ``novo_streaming``: o mesmo renderizador recebendo a resposta em trechos,
+  como no chat com streaming (mostra também o maior bloqueio por trecho).
+
+Com display disponível usa um ``tk.Text`` real; sem display usa um widget
+simulado que cobra um custo fixo por chamada a ``insert`` (``--custo-insercao-us``).
+As saídas das três estratégias são comparadas (texto e tags) antes de medir.
+
+Uso:
+    python benchmarks/bench_markdown.py
+    python benchmarks/bench_markdown.py --tamanhos-kb 20 50 --trecho 120 --saida /tmp/markdown.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import tkinter as tk
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+from markdown_renderer import RenderizadorMarkdown, limpar_resposta
+
+# Constantes
+TAMANHOS_KB_PADRAO = (20, 35, 50)
+TAMANHO_TRECHO_PADRAO = 200
+REPETICOES_PADRAO = 5
+CUSTO_INSERCAO_US_PADRAO = 25.0
+TICKERS_EXEMPLO = ("PETR4", "VALE3", "ITUB4", "BBDC4", "WEGE3", "MXRF11", "HGLG11", "TAEE11", "BBAS3", "EGIE3")
+PALAVRAS_EXEMPLO = ("dividendos", "margem", "endividamento", "crescimento", "valuation", "setor", "risco",
+                    "retorno", "patrimônio", "lucro", "receita", "desconto", "payout", "liquidez", "ciclo")
+
+
+def gerar_resposta(tamanho_kb, semente=1):
+    """
+    Gera uma resposta em Markdown com aproximadamente ``tamanho_kb`` KB.
+
+    Returns:
+        str: Texto da resposta.
+    """
+    aleatorio = random.Random(semente)
+
+    def frase():
+        palavras = [aleatorio.choice(PALAVRAS_EXEMPLO) for _ in range(aleatorio.randint(8, 20))]
+        palavras[aleatorio.randrange(len(palavras))] = f"**{aleatorio.choice(TICKERS_EXEMPLO)}**"
+        if aleatorio.random() < 0.5:
+            palavras[aleatorio.randrange(len(palavras))] = f"*{aleatorio.choice(PALAVRAS_EXEMPLO)}*"
+        if aleatorio.random() < 0.3:
+            palavras[aleatorio.randrange(len(palavras))] = f"`P/L {aleatorio.uniform(2, 30):.1f}`"
+        texto = " ".join(palavras)
+        return texto[0].upper() + texto[1:] + "."
+
+    partes, tamanho, secao = [], 0, 0
+    while tamanho < tamanho_kb * 1024:
+        secao += 1
+        bloco = [f"### {secao}. Análise de {aleatorio.choice(PALAVRAS_EXEMPLO)}", ""]
+        bloco.append(" ".join(frase() for _ in range(aleatorio.randint(2, 5))))
+        bloco.append("")
+        bloco.extend(f"- {frase()}" for _ in range(aleatorio.randint(2, 5)))
+        bloco.append("")
+        bloco.append("| Ticker | Cotação | P/L | DY | Comentário |")
+        bloco.append("|---|---|---|---|---|")
+        for _ in range(aleatorio.randint(5, 20)):
+            bloco.append(f"| {aleatorio.choice(TICKERS_EXEMPLO)} | R$ {aleatorio.uniform(5, 80):.2f} | "
+                         f"{aleatorio.uniform(2, 30):.1f} | {aleatorio.uniform(0, 15):.1f}% | "
+                         f"{aleatorio.choice(PALAVRAS_EXEMPLO)} |")
+        bloco.append("")
+        bloco.extend(f"{i}. {frase()}" for i in range(1, aleatorio.randint(2, 5)))
+        bloco.append("---")
+        texto = "\n".join(bloco)
+        partes.append(texto)
+        tamanho += len(texto.encode("utf-8")) + 1
+    return "\n".join(partes)
+
+
+def _inline_antigo(texto):
+    patterns = re.compile(r'(\*\*.*?\*\*|\*.*?\*|`.*?`)')
+    segmentos = []
+    for part in patterns.split(texto):
+        if not part:
+            continue
+        if part.startswith('**') and part.endswith('**'):
+            segmentos.append((part[2:-2], 'negrito'))
+        elif part.startswith('*') and part.endswith('*'):
+            segmentos.append((part[1:-1], 'italico'))
+        elif part.startswith('`') and part.endswith('`'):
+            segmentos.append((part[1:-1], 'codigo'))
+        else:
+            segmentos.append((part, 'normal'))
+    return segmentos
+
+
+def renderizar_antigo(widget, resposta):
+    """Reproduz o renderizador anterior do DataViewer: regex por linha e um ``insert`` por segmento."""
+    mensagem_limpa = re.sub(r'```markdown|```', '', resposta).strip()
+    segmentos = []
+    for linha in mensagem_limpa.split('\n'):
+        if not linha.strip():
+            segmentos.append(("\n", "normal"))
+            continue
+        match_titulo = re.match(r'^(#{1,6})\s+(.*)', linha)
+        if match_titulo:
+            segmentos.extend(_inline_antigo(match_titulo.group(2).strip()))
+            segmentos.append(("\n", "titulo"))
+            continue
+        if linha.strip().startswith('|') and linha.strip().endswith('|'):
+            if '---' in linha:
+                continue
+            segmentos.append((linha.strip() + "\n", "tabela"))
+            continue
+        match_lista_nao_ord = re.match(r'^\s*([-\*])\s+(.*)', linha)
+        if match_lista_nao_ord:
+            segmentos.append(("• ", "lista"))
+            segmentos.extend(_inline_antigo(match_lista_nao_ord.group(2).strip()))
+            segmentos.append(("\n", "lista"))
+            continue
+        match_lista_ord = re.match(r'^\s*(\d+\.)\s+(.*)', linha)
+        if match_lista_ord:
+            segmentos.append((f"{match_lista_ord.group(1)} ", "lista"))
+            segmentos.extend(_inline_antigo(match_lista_ord.group(2).strip()))
+            segmentos.append(("\n", "lista"))
+            continue
+        if re.match(r'^\s*([-*_]){3,}\s*$', linha):
+            segmentos.append(("\n" + "─" * 80 + "\n", "normal"))
+            continue
+        segmentos.extend(_inline_antigo(linha.strip()))
+        segmentos.append(("\n", "normal"))
+    for texto, tag in segmentos:
+        widget.insert(tk.END, texto, (tag,) if tag != "normal" else ())
+
+
+class TextoSimulado:
+    """
+    Substituto de ``tk.Text`` sem display: guarda texto e tags e conta as chamadas.
+
+    Suporta só o que o chat usa: inserções no fim e remoções de uma marca até o fim.
+    """
+
+    def __init__(self):
+        self.trechos = []  # [(texto, tags)]
+        self.tamanho = 0
+        self.marcas = {}
+        self.chamadas = 0
+
+    def _posicao(self, indice):
+        if indice in (tk.END, "end-1c"):
+            return self.tamanho
+        if indice == "1.0":
+            return 0
+        return self.marcas[indice]
+
+    def insert(self, indice, *pares):
+        assert self._posicao(indice) == self.tamanho, "TextoSimulado só insere no fim"
+        self.chamadas += 1
+        for i in range(0, len(pares), 2):
+            texto = pares[i]
+            tags = tuple(pares[i + 1]) if i + 1 < len(pares) else ()
+            self.trechos.append((texto, tags))
+            self.tamanho += len(texto)
+
+    def delete(self, inicio, fim):
+        assert self._posicao(fim) == self.tamanho, "TextoSimulado só remove até o fim"
+        self.chamadas += 1
+        manter = self._posicao(inicio)
+        while self.tamanho > manter:
+            texto, tags = self.trechos.pop()
+            self.tamanho -= len(texto)
+            if self.tamanho < manter:
+                self.trechos.append((texto[:manter - self.tamanho], tags))
+                self.tamanho = manter
+        for nome, posicao in self.marcas.items():
+            self.marcas[nome] = min(posicao, self.tamanho)
+
+    def mark_set(self, nome, indice):
+        self.marcas[nome] = self._posicao(indice)
+
+    def mark_gravity(self, nome, gravidade):
+        pass  # no fim do texto a gravidade à esquerda é a única usada
+
+    def mark_unset(self, nome):
+        self.marcas.pop(nome, None)
+
+    def conteudo(self):
+        """Texto e tags por caractere, em trechos contíguos unidos (para comparar estratégias)."""
+        unidos = []
+        for texto, tags in self.trechos:
+            if not texto:
+                continue
+            if unidos and unidos[-1][1] == tags:
+                unidos[-1] = (unidos[-1][0] + texto, tags)
+            else:
+                unidos.append((texto, tags))
+        return unidos
+
+
+def renderizar_novo(widget, resposta):
+    RenderizadorMarkdown(widget).inserir(limpar_resposta(resposta).strip())
+
+
+def renderizar_streaming(widget, resposta, tamanho_trecho, tempos_trechos=None):
+    renderizador = RenderizadorMarkdown(widget)
+    renderizador.iniciar("🔄 Processando...")
+    for inicio in range(0, len(resposta), tamanho_trecho):
+        comeco = time.perf_counter()
+        renderizador.anexar(resposta[inicio:inicio + tamanho_trecho])
+        if tempos_trechos is not None:
+            tempos_trechos.append((time.perf_counter() - comeco) * 1000)
+    renderizador.concluir()
+
+
+def criar_widget(raiz):
+    if raiz is None:
+        return TextoSimulado()
+    widget = tk.Text(raiz)
+    for tag in ("titulo", "tabela", "lista", "negrito", "italico", "codigo", "destaque"):
+        widget.tag_configure(tag)
+    return widget
+
+
+def medir(estrategia, resposta, raiz, repeticoes, custo_insercao_us):
+    """
+    Mede uma estratégia (melhor de ``repeticoes``).
+
+    Returns:
+        dict: ms (medido + custo simulado das chamadas sem display), chamadas ao widget e maior trecho.
+    """
+    melhor = None
+    for _ in range(repeticoes):
+        widget = criar_widget(raiz)
+        tempos_trechos = []
+        inicio = time.perf_counter()
+        estrategia(widget, resposta, tempos_trechos)
+        ms = (time.perf_counter() - inicio) * 1000
+        chamadas = widget.chamadas if isinstance(widget, TextoSimulado) else None
+        if chamadas is not None:
+            ms += chamadas * custo_insercao_us / 1000
+        if raiz is not None:
+            widget.destroy()
+        if melhor is None or ms < melhor["ms"]:
+            melhor = {"ms": ms, "chamadas": chamadas,
+                      "maior_trecho_ms": max(tempos_trechos) if tempos_trechos else ms}
+    return melhor
+
+
+def executar(tamanhos_kb, tamanho_trecho, repeticoes, custo_insercao_us):
+    """
+    Executa as três estratégias para cada tamanho de resposta.
+
+    Returns:
+        dict: Tamanho em KB -> estratégia -> métricas.
+    """
+    try:
+        raiz = tk.Tk()
+        raiz.withdraw()
+    except tk.TclError:
+        raiz = None
+
+    estrategias = {
+        "antigo": lambda w, r, t: renderizar_antigo(w, r),
+        "novo": lambda w, r, t: renderizar_novo(w, r),
+        "novo_streaming": lambda w, r, t: renderizar_streaming(w, r, tamanho_trecho, t),
+    }
+
+    resultados = {}
+    for tamanho_kb in tamanhos_kb:
+        resposta = gerar_resposta(tamanho_kb)
+
+        # As três estratégias precisam produzir o mesmo texto com as mesmas tags
+        saidas = {}
+        for nome, estrategia in estrategias.items():
+            widget = TextoSimulado()
+            estrategia(widget, resposta, None)
+            saidas[nome] = widget.conteudo()
+        if not saidas["antigo"] == saidas["novo"] == saidas["novo_streaming"]:
+            raise AssertionError(f"Saídas diferentes para a resposta de {tamanho_kb} KB")
+
+        resultados[tamanho_kb] = {nome: medir(estrategia, resposta, raiz, repeticoes, custo_insercao_us)
+                                  for nome, estrategia in estrategias.items()}
+        for metricas in resultados[tamanho_kb].values():
+            metricas["bytes"] = len(resposta.encode("utf-8"))
+
+    if raiz is not None:
+        raiz.destroy()
+    return resultados, raiz is not None
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados como tabela de texto."""
+    linhas = [f"{'KB':>4}  {'Estratégia':<16}{'Total ms':>10}{'Chamadas':>10}{'Maior bloqueio ms':>19}", "-" * 59]
+    for tamanho_kb, por_estrategia in resultados.items():
+        for estrategia, r in por_estrategia.items():
+            chamadas = "-" if r["chamadas"] is None else r["chamadas"]
+            linhas.append(f"{tamanho_kb:>4}  {estrategia:<16}{r['ms']:>10.1f}{chamadas:>10}{r['maior_trecho_ms']:>19.2f}")
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da renderização de Markdown no chat")
+    parser.add_argument("--tamanhos-kb", type=int, nargs="+", default=list(TAMANHOS_KB_PADRAO))
+    parser.add_argument("--trecho", type=int, default=TAMANHO_TRECHO_PADRAO,
+                        help="Caracteres por trecho no streaming")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO)
+    parser.add_argument("--custo-insercao-us", type=float, default=CUSTO_INSERCAO_US_PADRAO,
+                        help="Custo simulado por chamada ao widget quando não há display")
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    resultados, com_display = executar(args.tamanhos_kb, args.trecho, args.repeticoes, args.custo_insercao_us)
+    print(f"Widget: {'tk.Text' if com_display else f'simulado ({args.custo_insercao_us:g} µs por chamada)'}")
+    print(formatar_tabela(resultados))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"repeticoes": args.repeticoes, "tk_text": com_display, "resultados": resultados},
+                      f, ensure_ascii=False, indent=4)
+        print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+WebDriver falso, em processo, para microbenchmarks do DataExtractor.
+
+Implementa o subconjunto da API do Selenium usado pelo extrator (``get``,
+``find_element(s)``, ``execute_script``, ``current_url``, ``page_source`` e os
+métodos de ``WebElement``) sobre um DOM do lxml. Cada comando que no Chrome
+seria uma ida e volta ao chromedriver é contado e pode ser cobrado com uma
+latência simulada, permitindo medir quantas chamadas cada método do extrator
+faz por página sem abrir o navegador.
+
+Os scripts JavaScript do extrator são reconhecidos por assinatura e emulados
+em Python; scripts desconhecidos levantam ``JavascriptException``.
+"""
+
+import re
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+from selenium.common.exceptions import (InvalidSelectorException, JavascriptException,
+                                        NoSuchElementException)
+from selenium.webdriver.common.by import By
+
+from fixture_server import ServidorFixtures
+
+# Constantes
+TAGS_INVISIVEIS = {"head", "script", "style", "template", "noscript", "title", "meta", "link"}
+PADRAO_QUERY_SELECTOR = re.compile(r"document\.querySelector\('((?:[^'\\]|\\.)*)'\)")
+
+
+class FakeWebElement:
+    """Elemento retornado pelo FakeWebDriver, com a mesma interface usada do WebElement."""
+
+    def __init__(self, driver, elemento):
+        self._driver = driver
+        self._elemento = elemento
+
+    @property
+    def tag_name(self):
+        self._driver._comando("getElementTagName")
+        return self._elemento.tag
+
+    @property
+    def text(self):
+        self._driver._comando("getElementText")
+        if not _visivel(self._elemento):
+            return ""
+        return " ".join(self._elemento.text_content().split())
+
+    def is_displayed(self):
+        self._driver._comando("isElementDisplayed")
+        return _visivel(self._elemento)
+
+    def get_attribute(self, nome):
+        self._driver._comando("getElementAttribute")
+        if nome in ("textContent", "innerText"):
+            return self._elemento.text_content()
+        return self._elemento.get(nome)
+
+    def click(self):
+        self._driver._comando("elementClick")
+
+    def find_element(self, by=By.ID, value=None):
+        return self._driver._buscar(self._elemento, by, value, unico=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._driver._buscar(self._elemento, by, value, unico=False)
+
+
+def _visivel(elemento):
+    """Aproxima ``is_displayed`` do Selenium a partir de tags, ``hidden`` e ``display:none``."""
+    atual = elemento
+    while atual is not None:
+        if not isinstance(atual.tag, str) or atual.tag in TAGS_INVISIVEIS:
+            return False
+        estilo = (atual.get("style") or "").replace(" ", "").lower()
+        if atual.get("hidden") is not None or "display:none" in estilo or "visibility:hidden" in estilo:
+            return False
+        if atual.tag == "input" and (atual.get("type") or "").lower() == "hidden":
+            return False
+        atual = atual.getparent()
+    return True
+
+
+def _texto_js(elemento):
+    """Equivalente a ``element.textContent.trim()``."""
+    return elemento.text_content().strip()
+
+
+class FakeWebDriver:
+    """
+    WebDriver falso sobre páginas HTML carregadas em memória.
+    """
+
+    def __init__(self, paginas=None, latencia_ms=0, js_habilitado=True):
+        """
+        Inicializa o driver.
+
+        Args:
+            paginas (callable): Função ``caminho -> html`` (None = páginas do servidor de fixtures)
+            latencia_ms (float): Latência cobrada (com ``time.sleep``) a cada comando
+            js_habilitado (bool): Se False, todo ``execute_script`` falha, forçando os fallbacks
+        """
+        self._paginas = paginas or ServidorFixtures().renderizar
+        self.latencia_ms = latencia_ms
+        self.js_habilitado = js_habilitado
+        self.chamadas = Counter()
+        self.buscas_sem_resultado = 0
+        self.espera_implicita = 0
+        self._documento = None
+        self._url = "about:blank"
+        self._seletores = {}
+
+    # ------------------------------------------------------------------
+    # Contadores
+    # ------------------------------------------------------------------
+
+    def _comando(self, nome):
+        """Registra uma ida e volta ao driver e cobra a latência simulada."""
+        self.chamadas[nome] += 1
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms / 1000.0)
+
+    @property
+    def total_chamadas(self):
+        """Total de comandos enviados ao driver."""
+        return sum(self.chamadas.values())
+
+    def zerar_contadores(self):
+        """Zera os contadores de comandos."""
+        self.chamadas.clear()
+        self.buscas_sem_resultado = 0
+
+    def tempo_espera_implicita(self):
+        """Tempo que as buscas sem resultado teriam esperado no Chrome (``implicitly_wait``)."""
+        return self.buscas_sem_resultado * self.espera_implicita
+
+    # ------------------------------------------------------------------
+    # API do WebDriver
+    # ------------------------------------------------------------------
+
+    def get(self, url):
+        self._comando("get")
+        caminho = urlparse(url).path or "/"
+        html = self._paginas(caminho)
+        if html is None:
+            html = "<html><head><title>404</title></head><body><h1>Não encontrado</h1></body></html>"
+        self._documento = lxml.html.fromstring(html)
+        self._url = url
+
+    @property
+    def current_url(self):
+        self._comando("getCurrentUrl")
+        return self._url
+
+    @property
+    def page_source(self):
+        self._comando("getPageSource")
+        return lxml.html.tostring(self._documento, encoding="unicode") if self._documento is not None else ""
+
+    @property
+    def title(self):
+        self._comando("getTitle")
+        titulos = self._documento.xpath("//title") if self._documento is not None else []
+        return titulos[0].text_content().strip() if titulos else ""
+
+    def implicitly_wait(self, segundos):
+        self._comando("setTimeouts")
+        self.espera_implicita = segundos
+
+    def get_cookies(self):
+        self._comando("getAllCookies")
+        return []
+
+    def execute_cdp_cmd(self, comando, parametros):
+        self._comando("executeCdpCommand")
+        return {}
+
+    def quit(self):
+        self._comando("quit")
+        self._documento = None
+
+    def find_element(self, by=By.ID, value=None):
+        return self._buscar(self._raiz(), by, value, unico=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._buscar(self._raiz(), by, value, unico=False)
+
+    def execute_script(self, script, *args):
+        self._comando("executeScript")
+        if not self.js_habilitado:
+            raise JavascriptException("JavaScript desabilitado no FakeWebDriver")
+        argumentos = [a._elemento if isinstance(a, FakeWebElement) else a for a in args]
+        return self._emular_script(script, argumentos)
+
+    # ------------------------------------------------------------------
+    # Busca de elementos
+    # ------------------------------------------------------------------
+
+    def _raiz(self):
+        if self._documento is None:
+            raise NoSuchElementException("Nenhuma página carregada")
+        return self._documento.getroottree().getroot()
+
+    def _css(self, seletor, prefixo):
+        """Compila (com cache) um seletor CSS para XPath."""
+        chave = (seletor, prefixo)
+        if chave not in self._seletores:
+            try:
+                self._seletores[chave] = CSSSelector(seletor, translator="html").path
+            except Exception as e:
+                raise InvalidSelectorException(f"Seletor CSS inválido: {seletor} ({e})")
+            if prefixo != "descendant-or-self::":
+                self._seletores[chave] = self._seletores[chave].replace("descendant-or-self::", prefixo)
+        return self._seletores[chave]
+
+    def _xpath_para(self, contexto, by, value):
+        """Converte um localizador do Selenium em uma expressão XPath relativa ao contexto."""
+        documento = contexto.getparent() is None
+        # No Selenium a busca a partir de um elemento não inclui o próprio elemento
+        prefixo = "descendant-or-self::" if documento else "descendant::"
+
+        if by == By.CSS_SELECTOR:
+            return self._css(value, prefixo)
+        if by == By.ID:
+            return f"{prefixo}*[@id={_literal_xpath(value)}]"
+        if by == By.CLASS_NAME:
+            return self._css(f".{value}", prefixo)
+        if by == By.TAG_NAME:
+            return f"{prefixo}{value.lower()}"
+        if by == By.NAME:
+            return f"{prefixo}*[@name={_literal_xpath(value)}]"
+        if by == By.LINK_TEXT:
+            return f"{prefixo}a[normalize-space(.)={_literal_xpath(value)}]"
+        if by == By.XPATH:
+            return value
+        raise InvalidSelectorException(f"Localizador não suportado: {by}")
+
+    def _buscar(self, contexto, by, value, unico):
+        self._comando("findElement" if unico else "findElements")
+        try:
+            resultado = contexto.xpath(self._xpath_para(contexto, by, value))
+        except InvalidSelectorException:
+            raise
+        except Exception as e:
+            raise InvalidSelectorException(f"Seletor inválido: {value} ({e})")
+
+        elementos = [FakeWebElement(self, e) for e in resultado
+                     if hasattr(e, "tag") and isinstance(e.tag, str)]
+        if unico:
+            if not elementos:
+                self.buscas_sem_resultado += 1
+                raise NoSuchElementException(f"Elemento não encontrado: {by}={value}")
+            return elementos[0]
+        if not elementos:
+            self.buscas_sem_resultado += 1
+        return elementos
+
+    # ------------------------------------------------------------------
+    # Emulação dos scripts do extrator
+    # ------------------------------------------------------------------
+
+    def _query_selector(self, seletor):
+        """Equivalente a ``document.querySelector``."""
+        try:
+            elementos = self._raiz().xpath(self._css(seletor, "descendant-or-self::"))
+        except InvalidSelectorException:
+            raise JavascriptException(f"SyntaxError: seletor inválido {seletor}")
+        return elementos[0] if elementos else None
+
+    def _emular_script(self, script, args):
+        if "Object.defineProperty(navigator" in script:
+            return None
+        if "document.readyState" in script:
+            return "complete"
+        if "document.querySelector(seletores[i])" in script:
+            return self._js_colunas(args[0])
+        if "arguments[0].click()" in script:
+            return None
+        if "arguments[0].id" in script:
+            return args[0].get("id") or "no-id"
+        if "arguments[0].className" in script:
+            return args[0].get("class") or "no-class"
+        if "const tabela = arguments[0]" in script:
+            return self._js_tabela_melhorado(args[0])
+        if "document.querySelectorAll('table')" in script:
+            return self._js_primeira_tabela()
+
+        correspondencia = PADRAO_QUERY_SELECTOR.search(script)
+        if correspondencia:
+            seletor = correspondencia.group(1).replace("\\'", "'")
+            if "const tabela" in script:
+                tabela = self._query_selector(seletor)
+                return self._js_tabela(tabela) if tabela is not None else []
+            try:
+                elemento = self._query_selector(seletor)
+            except JavascriptException:
+                return "N/A"
+            return _texto_js(elemento) if elemento is not None else "N/A"
+
+        raise JavascriptException("Script não emulado pelo FakeWebDriver")
+
+    def _js_colunas(self, seletores):
+        resultados = {}
+        for seletor in seletores:
+            try:
+                elemento = self._query_selector(seletor)
+                resultados[seletor] = _texto_js(elemento) if elemento is not None else "N/A"
+            except JavascriptException:
+                resultados[seletor] = "N/A"
+        return resultados
+
+    def _js_tabela(self, tabela):
+        """Cabeçalhos da primeira linha (th/td) e células td das linhas seguintes."""
+        linhas = tabela.xpath(".//tr")
+        dados = []
+        if len(linhas) <= 1:
+            return dados
+        cabecalhos = [_texto_js(c) for c in linhas[0].xpath("./th|./td")]
+        for linha in linhas[1:]:
+            celulas = linha.xpath("./td")
+            if celulas:
+                dados.append({cabecalhos[j]: _texto_js(celulas[j])
+                              for j in range(min(len(celulas), len(cabecalhos)))})
+        return dados
+
+    def _js_primeira_tabela(self):
+        for tabela in self._raiz().xpath("//table"):
+            dados = self._js_tabela(tabela)
+            if dados:
+                return dados
+        return []
+
+    def _js_tabela_melhorado(self, tabela):
+        if tabela is None or tabela.tag != "table":
+            return []
+        linhas = tabela.xpath(".//tr")
+        if not linhas:
+            return []
+
+        primeira = linhas[0]
+        cabecalhos = [_texto_js(c) for c in primeira.xpath("./th|./td")]
+        inicio = 1 if primeira.xpath("./th") else 0
+        if not cabecalhos:
+            maximo = max(len(linha.xpath("./td")) for linha in linhas)
+            cabecalhos = [f"Coluna {i + 1}" for i in range(maximo)]
+
+        dados = []
+        for linha in linhas[inicio:]:
+            celulas = linha.xpath("./td")
+            dados_linha = {}
+            for j in range(min(len(celulas), len(cabecalhos))):
+                texto = _texto_js(celulas[j])
+                if texto:
+                    dados_linha[cabecalhos[j]] = texto
+            if dados_linha:
+                dados.append(dados_linha)
+        return dados
+
+
+def _literal_xpath(valor):
+    """Monta um literal XPath seguro para valores com aspas."""
+    if "'" not in valor:
+        return f"'{valor}'"
+    if '"' not in valor:
+        return f'"{valor}"'
+    partes = valor.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{parte}'" for parte in partes) + ")"
@@ -0,0 +1,220 @@
+"""
+Servidor HTTP local com páginas gravadas do Investidor10.
+
+Serve as páginas de ação, FII e resumo de carteiras da pasta ``fixtures`` nas
+mesmas rotas do site (``/acoes/<TICKER>/``, ``/fiis/<TICKER>/``,
+``/carteiras/resumo/``), permitindo executar o ``DataExtractor`` completo sem
+acesso ao site real. O marcador ``__TICKER__`` das páginas é substituído pelo
+ticker pedido na URL, então qualquer lista de tickers é aceita.
+
+Uso:
+    python benchmarks/fixture_server.py --porta 8765 --latencia-ms 50
+    python benchmarks/fixture_server.py --gravar --acao ITUB4 --fii HGLG11
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+# Constantes
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MARCADOR_TICKER = "__TICKER__"
+ROTAS = (
+    (re.compile(r"^/acoes/([A-Za-z0-9]+)/?$"), "acao.html"),
+    (re.compile(r"^/fiis/([A-Za-z0-9]+)/?$"), "fii.html"),
+    (re.compile(r"^/carteiras/resumo/?$"), "carteira_resumo.html"),
+    (re.compile(r"^/?$"), "home.html"),
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ServidorFixtures:
+    """
+    Servidor HTTP em thread própria que responde com as páginas gravadas.
+    """
+
+    def __init__(self, pasta=PASTA_FIXTURES, host="127.0.0.1", porta=0, latencia_ms=0):
+        """
+        Inicializa o servidor (sem iniciá-lo).
+
+        Args:
+            pasta (str): Pasta com acao.html, fii.html, carteira_resumo.html e home.html
+            host (str): Endereço de escuta
+            porta (int): Porta de escuta (0 = porta livre escolhida pelo sistema)
+            latencia_ms (float): Atraso artificial por resposta, simulando a rede
+        """
+        self.pasta = pasta
+        self.host = host
+        self.porta = porta
+        self.latencia_ms = latencia_ms
+        self.requisicoes = 0
+        self._paginas = self._carregar_paginas()
+        self._lock = threading.Lock()
+        self._servidor = None
+        self._thread = None
+
+    def _carregar_paginas(self):
+        """Lê as páginas gravadas para a memória."""
+        paginas = {}
+        for _, arquivo in ROTAS:
+            with open(os.path.join(self.pasta, arquivo), "r", encoding="utf-8") as f:
+                paginas[arquivo] = f.read()
+        return paginas
+
+    @property
+    def url(self):
+        """URL base do servidor em execução (usada como ``url_base`` do extrator)."""
+        return f"http://{self.host}:{self.porta}"
+
+    def renderizar(self, caminho):
+        """
+        Monta a página correspondente a um caminho.
+
+        Args:
+            caminho (str): Caminho da requisição, sem query string
+
+        Returns:
+            str or None: HTML da página, ou None se a rota não existe.
+        """
+        for padrao, arquivo in ROTAS:
+            correspondencia = padrao.match(caminho)
+            if correspondencia:
+                ticker = correspondencia.group(1).upper() if padrao.groups else ""
+                return self._paginas[arquivo].replace(MARCADOR_TICKER, ticker)
+        return None
+
+    def _criar_handler(self):
+        """Cria a classe de handler ligada a este servidor."""
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with servidor._lock:
+                    servidor.requisicoes += 1
+                if servidor.latencia_ms:
+                    time.sleep(servidor.latencia_ms / 1000.0)
+
+                html = servidor.renderizar(self.path.split("?", 1)[0])
+                status = 200 if html is not None else 404
+                corpo = (html if html is not None else "<html><body>Não encontrado</body></html>").encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def iniciar(self):
+        """
+        Inicia o servidor em uma thread daemon.
+
+        Returns:
+            str: URL base do servidor.
+        """
+        self._servidor = ThreadingHTTPServer((self.host, self.porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Servidor de fixtures em {self.url}")
+        return self.url
+
+    def parar(self):
+        """Encerra o servidor."""
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def gravar_fixtures(ticker_acao, ticker_fii, pasta=PASTA_FIXTURES):
+    """
+    Grava páginas reais do site como fixtures, usando a sessão HTTP salva.
+
+    O ticker de cada página é trocado pelo marcador ``__TICKER__``. Requer uma
+    sessão válida (gerada pelo aplicativo com "Reutilizar sessão de login").
+
+    Args:
+        ticker_acao (str): Ticker de ação usado como modelo
+        ticker_fii (str): Ticker de FII usado como modelo
+        pasta (str): Pasta de destino
+    """
+    from http_session import SessaoHttp
+
+    sessao = SessaoHttp()
+    if not sessao.carregar() or not sessao.sessao_valida():
+        raise RuntimeError("Sessão salva ausente ou expirada; faça login pelo aplicativo antes de gravar.")
+
+    paginas = {
+        "acao.html": (f"/acoes/{ticker_acao}/", ticker_acao),
+        "fii.html": (f"/fiis/{ticker_fii}/", ticker_fii),
+        "carteira_resumo.html": ("/carteiras/resumo/", None),
+        "home.html": ("/", None),
+    }
+    os.makedirs(pasta, exist_ok=True)
+    try:
+        for arquivo, (caminho, ticker) in paginas.items():
+            resposta = sessao.obter_html(caminho)
+            resposta.raise_for_status()
+            html = resposta.text
+            if ticker:
+                html = html.replace(ticker.upper(), MARCADOR_TICKER).replace(ticker.lower(), MARCADOR_TICKER)
+            with open(os.path.join(pasta, arquivo), "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"Gravado {arquivo} ({len(html)} caracteres)")
+    finally:
+        sessao.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local com páginas gravadas do Investidor10")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta de escuta")
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Atraso artificial por resposta")
+    parser.add_argument("--gravar", action="store_true", help="Grava páginas reais como fixtures e sai")
+    parser.add_argument("--acao", default="ITUB4", help="Ticker de ação usado na gravação")
+    parser.add_argument("--fii", default="HGLG11", help="Ticker de FII usado na gravação")
+    args = parser.parse_args()
+
+    if args.gravar:
+        gravar_fixtures(args.acao, args.fii)
+        return
+
+    servidor = ServidorFixtures(porta=args.porta, latencia_ms=args.latencia_ms)
+    servidor.iniciar()
+    print(f"Servindo fixtures em {servidor.url} (Ctrl+C para encerrar)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
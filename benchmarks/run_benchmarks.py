@@ -0,0 +1,360 @@
+"""
+Benchmark offline da extração completa do DataExtractor.
+
+Sobe o servidor de fixtures local, aponta o ``url_base`` do extrator para ele e
+executa os mesmos caminhos da interface (ações, FIIs e carteiras) com cada motor
+(HTTP com sessão reutilizada e Selenium headless) para 10, 100 e 1.000 tickers.
+
+Para cada combinação registra páginas por segundo, latência p50/p95 por ticker
+(a partir dos spans do Tracer) e memória, grava tudo em JSON na pasta
+``benchmarks/resultados`` e compara com a execução anterior para apontar regressões.
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --motores http --tamanhos 10 100 --latencia-ms 20
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_PROJETO not in sys.path:
+    sys.path.insert(0, RAIZ_PROJETO)
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+from data_extractor import DataExtractor
+from extraction_tracer import percentil
+from fixture_server import ServidorFixtures
+
+# Constantes
+TAMANHOS_PADRAO = (10, 100, 1000)
+MOTORES = ("http", "selenium")
+PROPORCAO_FIIS = 0.1
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+LIMITE_REGRESSAO = 0.10  # 10% pior que a execução anterior
+INTERVALO_AMOSTRA_MEMORIA = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+def rss_atual_mb():
+    """
+    Retorna a memória residente atual do processo em MB.
+
+    Usa /proc no Linux; nos demais sistemas cai para o pico informado por
+    ``resource`` (ou None quando nenhum dos dois está disponível).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    if RESOURCE_AVAILABLE:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    return None
+
+
+class AmostradorMemoria:
+    """Amostra a memória residente em uma thread para obter o pico durante a execução."""
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRA_MEMORIA):
+        self.intervalo = intervalo
+        self.inicial = None
+        self.pico = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _amostrar(self):
+        while not self._parar.is_set():
+            atual = rss_atual_mb()
+            if atual is not None:
+                self.pico = max(self.pico or 0.0, atual)
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self):
+        self.inicial = rss_atual_mb()
+        self.pico = self.inicial
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+
+def carregar_colunas(caminho_config=os.path.join(RAIZ_PROJETO, "config.json")):
+    """
+    Lê as colunas personalizadas do config.json do projeto.
+
+    Returns:
+        tuple: (colunas_personalizadas, colunas_personalizadas_fiis)
+    """
+    with open(caminho_config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return config.get("colunas_personalizadas", []), config.get("colunas_personalizadas_fiis", [])
+
+
+def gerar_tickers(quantidade):
+    """
+    Gera tickers sintéticos de ações e FIIs para um tamanho de benchmark.
+
+    Returns:
+        tuple: (acoes, fiis)
+    """
+    quantidade_fiis = max(1, int(quantidade * PROPORCAO_FIIS))
+    acoes = [f"BNCH{i:04d}" for i in range(quantidade - quantidade_fiis)]
+    fiis = [f"FNCH{i:04d}" for i in range(quantidade_fiis)]
+    return acoes, fiis
+
+
+def montar_config(motor, url_base, quantidade, colunas, colunas_fiis, arquivo_sessao):
+    """Monta a configuração do extrator para uma execução do benchmark."""
+    acoes, fiis = gerar_tickers(quantidade)
+    return {
+        "acoes": acoes,
+        "fiis": fiis,
+        "colunas_personalizadas": colunas,
+        "colunas_personalizadas_fiis": colunas_fiis,
+        "headless": True,
+        "usar_sessao_http": motor == "http",
+        "gerar_trace": True,
+        "url_base": url_base,
+        "arquivo_sessao": arquivo_sessao,
+    }
+
+
+def _preparar_sessao_fixture(extrator):
+    """Grava uma sessão fictícia para que o motor HTTP não precise do navegador."""
+    if not extrator.sessao_http:
+        raise RuntimeError("Motor HTTP indisponível (instale requests e lxml)")
+    extrator.sessao_http.session.cookies.set("sessao_benchmark", "1")
+    extrator.sessao_http.salvar()
+
+
+def executar_caso(motor, servidor, quantidade, colunas, colunas_fiis):
+    """
+    Executa a extração completa uma vez e mede o desempenho.
+
+    Args:
+        motor (str): "http" ou "selenium"
+        servidor (ServidorFixtures): Servidor de fixtures em execução
+        quantidade (int): Número total de tickers (ações + FIIs)
+        colunas (list): Colunas personalizadas de ações
+        colunas_fiis (list): Colunas personalizadas de FIIs
+
+    Returns:
+        dict: Métricas da execução.
+    """
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        config = montar_config(motor, servidor.url, quantidade, colunas, colunas_fiis,
+                               os.path.join(pasta_temp, "sessao.json"))
+        extrator = DataExtractor(config, status_callback=lambda mensagem, progresso: None)
+        if motor == "http":
+            _preparar_sessao_fixture(extrator)
+
+        requisicoes_iniciais = servidor.requisicoes
+        try:
+            with AmostradorMemoria() as memoria:
+                inicio = time.perf_counter()
+                extrator.preparar_sessao()
+                if motor == "http" and not extrator.modo_http:
+                    raise RuntimeError("A sessão HTTP não foi aceita pelo servidor de fixtures")
+                dados_acoes = extrator.extract_stock_data()
+                dados_fiis = extrator.extract_fiis_data()
+                carteiras_acoes, carteiras_fiis = extrator.extract_portfolio_data()
+                duracao = time.perf_counter() - inicio
+        finally:
+            extrator.cleanup()
+
+    paginas = servidor.requisicoes - requisicoes_iniciais
+    latencias = sorted(evento["dur"] / 1000.0 for evento in extrator.tracer.eventos() if evento["name"] == "ticker")
+    falhas = sum(1 for linha in dados_acoes + dados_fiis if "Erro" in linha)
+
+    return {
+        "motor": motor,
+        "tickers": quantidade,
+        "segundos": round(duracao, 3),
+        "paginas": paginas,
+        "paginas_por_segundo": round(paginas / duracao, 2) if duracao else None,
+        "ticker_p50_ms": round(percentil(latencias, 50), 2),
+        "ticker_p95_ms": round(percentil(latencias, 95), 2),
+        "memoria_inicial_mb": round(memoria.inicial, 1) if memoria.inicial is not None else None,
+        "memoria_pico_mb": round(memoria.pico, 1) if memoria.pico is not None else None,
+        "falhas": falhas,
+        "linhas_carteiras": len(carteiras_acoes) + len(carteiras_fiis),
+    }
+
+
+def versao_atual():
+    """Identifica a versão do código pelo git (commit e se há alterações locais)."""
+    try:
+        descricao = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RAIZ_PROJETO,
+                                   capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        descricao = ""
+    return descricao or "desconhecida"
+
+
+def carregar_resultado_anterior(pasta=PASTA_RESULTADOS, ignorar=None):
+    """
+    Carrega o arquivo de resultados mais recente da pasta.
+
+    Args:
+        pasta (str): Pasta de resultados
+        ignorar (str): Caminho a desconsiderar (o arquivo da execução atual)
+
+    Returns:
+        dict or None: Conteúdo do arquivo, ou None se não houver execução anterior.
+    """
+    arquivos = sorted(caminho for caminho in glob.glob(os.path.join(pasta, "benchmark_*.json"))
+                      if caminho != ignorar)
+    if not arquivos:
+        return None
+    with open(arquivos[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def comparar_resultados(atual, anterior, limite=LIMITE_REGRESSAO):
+    """
+    Compara duas execuções caso a caso (mesmo motor e número de tickers).
+
+    Returns:
+        list: Dicionários com as variações percentuais e o indicador de regressão.
+    """
+    anteriores = {(r["motor"], r["tickers"]): r for r in anterior.get("resultados", []) if "erro" not in r}
+    comparacoes = []
+    for resultado in atual.get("resultados", []):
+        base = anteriores.get((resultado["motor"], resultado["tickers"]))
+        if "erro" in resultado or not base:
+            continue
+
+        variacao_vazao = _variacao(resultado["paginas_por_segundo"], base["paginas_por_segundo"])
+        variacao_p95 = _variacao(resultado["ticker_p95_ms"], base["ticker_p95_ms"])
+        regressao = ((variacao_vazao is not None and variacao_vazao < -limite) or
+                     (variacao_p95 is not None and variacao_p95 > limite))
+        comparacoes.append({
+            "motor": resultado["motor"],
+            "tickers": resultado["tickers"],
+            "variacao_paginas_por_segundo": variacao_vazao,
+            "variacao_ticker_p95": variacao_p95,
+            "regressao": regressao,
+        })
+    return comparacoes
+
+
+def _variacao(atual, anterior):
+    """Variação relativa entre dois valores (None se não for calculável)."""
+    if atual is None or not anterior:
+        return None
+    return round((atual - anterior) / anterior, 4)
+
+
+def formatar_tabela(resultados):
+    """Formata os resultados como uma tabela de texto."""
+    cabecalho = f"{'Motor':<10}{'Tickers':>9}{'Tempo (s)':>11}{'Páginas/s':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Pico (MB)':>11}{'Falhas':>8}"
+    linhas = [cabecalho, "-" * len(cabecalho)]
+    for r in resultados:
+        if "erro" in r:
+            linhas.append(f"{r['motor']:<10}{r['tickers']:>9}  ERRO: {r['erro'][:80]}")
+            continue
+        pico = f"{r['memoria_pico_mb']:.1f}" if r["memoria_pico_mb"] is not None else "-"
+        linhas.append(
+            f"{r['motor']:<10}{r['tickers']:>9}{r['segundos']:>11.2f}{r['paginas_por_segundo']:>11.1f}"
+            f"{r['ticker_p50_ms']:>10.1f}{r['ticker_p95_ms']:>10.1f}{pico:>11}{r['falhas']:>8}"
+        )
+    return "\n".join(linhas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do DataExtractor com servidor de fixtures")
+    parser.add_argument("--motores", nargs="+", choices=MOTORES, default=list(MOTORES))
+    parser.add_argument("--tamanhos", nargs="+", type=int, default=list(TAMANHOS_PADRAO))
+    parser.add_argument("--latencia-ms", type=float, default=0, help="Atraso artificial por resposta do servidor")
+    parser.add_argument("--saida", default=PASTA_RESULTADOS, help="Pasta onde o JSON de resultados é gravado")
+    parser.add_argument("--comparar-com", help="Arquivo de resultados usado como base (padrão: o mais recente)")
+    parser.add_argument("--limite-regressao", type=float, default=LIMITE_REGRESSAO)
+    parser.add_argument("--falhar-em-regressao", action="store_true", help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    colunas, colunas_fiis = carregar_colunas()
+
+    resultados = []
+    with ServidorFixtures(latencia_ms=args.latencia_ms) as servidor:
+        for motor in args.motores:
+            for quantidade in args.tamanhos:
+                print(f"Executando {motor} com {quantidade} tickers...", flush=True)
+                try:
+                    resultados.append(executar_caso(motor, servidor, quantidade, colunas, colunas_fiis))
+                except Exception as e:
+                    logger.warning(f"Benchmark {motor}/{quantidade} falhou: {e}")
+                    resultados.append({"motor": motor, "tickers": quantidade, "erro": str(e)})
+
+    execucao = {
+        "versao": versao_atual(),
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "latencia_ms": args.latencia_ms,
+        "colunas_acoes": len(colunas),
+        "colunas_fiis": len(colunas_fiis),
+        "resultados": resultados,
+    }
+
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    anterior = None
+    if args.comparar_com:
+        with open(args.comparar_com, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+    else:
+        anterior = carregar_resultado_anterior(args.saida, ignorar=caminho)
+
+    if anterior:
+        execucao["comparacao"] = {"versao_base": anterior.get("versao"),
+                                  "casos": comparar_resultados(execucao, anterior, args.limite_regressao)}
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(execucao, f, ensure_ascii=False, indent=4)
+
+    print()
+    print(formatar_tabela(resultados))
+    print(f"\nResultados gravados em {caminho}")
+
+    regressoes = [c for c in execucao.get("comparacao", {}).get("casos", []) if c["regressao"]]
+    if anterior:
+        print(f"Comparação com a versão {anterior.get('versao')}:")
+        for caso in execucao["comparacao"]["casos"]:
+            vazao = caso["variacao_paginas_por_segundo"]
+            p95 = caso["variacao_ticker_p95"]
+            marcador = "  <-- REGRESSÃO" if caso["regressao"] else ""
+            print(f"  {caso['motor']:<10}{caso['tickers']:>6} tickers  páginas/s {vazao:+.1%}  p95 {p95:+.1%}{marcador}"
+                  if vazao is not None and p95 is not None else
+                  f"  {caso['motor']:<10}{caso['tickers']:>6} tickers  sem base comparável")
+
+    if regressoes and args.falhar_em_regressao:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ import threading
 import time
 import logging
 import re
+from http_session import SessaoHttp, SessaoExpirada, BASE_URL, ARQUIVO_SESSAO
+from extraction_tracer import Tracer, rastreado, PASTA_TRACES_PADRAO
+from progress_events import TipoEvento
 
 # Constantes
 DEFAULT_WAIT_TIME = 10
@@ -33,7 +36,7 @@ class DataExtractor:
     e processamento de seletores CSS.
     """
 
-    def __init__(self, config, status_callback=None, cancelamento_event=None):
+    def __init__(self, config, status_callback=None, cancelamento_event=None, barramento=None, sink=None):
         """
         Inicializa o extrator de dados.
 
@@ -41,16 +44,54 @@ class DataExtractor:
             config (dict): Configurações da aplicação
             status_callback (callable): Função para atualizar status na interface
             cancelamento_event (threading.Event): Evento para controlar cancelamento
+            barramento (BarramentoProgresso): Barramento para eventos tipados de progresso (opcional)
+            sink (SinkRegistros): Destino em disco dos registros por ticker (opcional)
         """
         self.config = config
+        self.barramento = barramento
+        self.sink = sink
+        if status_callback is None and barramento is not None:
+            status_callback = barramento.status
         self.status_callback = status_callback or self._default_status_callback
         self.cancelamento_event = cancelamento_event or threading.Event()
         self.driver = None
+        self.url_base = config.get("url_base", BASE_URL).rstrip("/")
+
+        # Sessão HTTP que reutiliza os cookies do login no navegador
+        self.sessao_http = None
+        if config.get("usar_sessao_http"):
+            if SessaoHttp.disponivel():
+                self.sessao_http = SessaoHttp(base_url=self.url_base,
+                                              arquivo_sessao=config.get("arquivo_sessao", ARQUIVO_SESSAO))
+            else:
+                logger.warning("Sessão HTTP desativada: requests, lxml e cssselect são necessários; usando o navegador")
+        self.modo_http = False
+
+        # Spans de tempo por fase, exportados como Chrome Trace ao final da execução
+        self.tracer = Tracer(ativo=config.get("gerar_trace", True))
 
     def _default_status_callback(self, msg, prog):
         """Callback padrão para status quando nenhum é fornecido."""
         logger.info(f"Status: {msg} (Progresso: {prog}%)")
 
+    def _publicar_fase(self, fase):
+        """Publica no barramento o início de uma fase da extração."""
+        if self.barramento:
+            self.barramento.fase(fase)
+
+    def _publicar_ticker(self, tipo, ticker, concluidos, total, erro=None):
+        """Publica no barramento um evento de ticker (iniciado, concluído ou falhou)."""
+        if self.barramento:
+            self.barramento.ticker(tipo, ticker, concluidos=concluidos, total=total, erro=erro)
+
+    def _guardar_registro(self, tipo, registro, dados):
+        """Envia o registro de um ticker ao sink em disco ou, sem sink, à lista em memória."""
+        if self.sink is not None:
+            self.sink.gravar(tipo, registro)
+        else:
+            dados.append(registro)
+
+    @rastreado("setup_driver")
     def setup_driver(self):
         """Configura e inicia o WebDriver do Chrome."""
         chrome_options = Options()
@@ -176,10 +217,52 @@ class DataExtractor:
         """Verifica se o cancelamento foi solicitado."""
         return self.cancelamento_event.is_set()
 
+    def preparar_sessao(self):
+        """
+        Prepara a sessão de extração.
+
+        Se a reutilização de sessão estiver habilitada e os cookies salvos ainda
+        forem válidos, as páginas são buscadas via HTTP e o navegador não é aberto.
+        Caso contrário, abre o navegador, aguarda o login e exporta os cookies
+        para as próximas execuções.
+        """
+        if self.sessao_http:
+            self.status_callback("Verificando sessão salva do Investidor10...", 15)
+            if self.sessao_http.carregar() and self.sessao_http.sessao_valida():
+                self.modo_http = True
+                self.status_callback("Sessão salva válida, extraindo via HTTP sem abrir o navegador...", 25)
+                return
+            self.status_callback("Sessão salva ausente ou expirada, abrindo o navegador...", 15)
+
+        self.garantir_navegador()
+
+    def garantir_navegador(self):
+        """Abre o navegador e aguarda o login caso ele ainda não esteja aberto."""
+        self.modo_http = False
+        if self.driver:
+            return
+
+        self.setup_driver()
+        if self.verificar_cancelamento():
+            return
+        self.access_site_and_await_login()
+        self.exportar_sessao_http()
+
+    def exportar_sessao_http(self):
+        """Exporta os cookies do navegador logado para a sessão HTTP e os salva em disco."""
+        if not self.sessao_http or not self.driver:
+            return
+        try:
+            if self.sessao_http.importar_cookies_driver(self.driver):
+                self.sessao_http.salvar()
+        except Exception as e:
+            logger.warning(f"Erro ao exportar sessão do navegador: {e}")
+
+    @rastreado("login")
     def access_site_and_await_login(self):
         """Acessa o site Investidor10 e aguarda o login do usuário, se necessário."""
         self.status_callback("Acessando o site Investidor10...", 20)
-        self.driver.get("https://investidor10.com.br/")
+        self.driver.get(f"{self.url_base}/")
         if not self.config["headless"]:
             messagebox.showinfo("Login Necessário",
                               "Faça login no site Investidor10. Clique em OK quando estiver pronto para continuar com a extração.")
@@ -190,8 +273,10 @@ class DataExtractor:
         Realiza a extração de dados para as ações configuradas.
 
         Returns:
-            list: Lista de dicionários, cada um representando os dados de uma ação.
+            list: Lista de dicionários, cada um representando os dados de uma ação
+                (vazia quando os registros são gravados no sink).
         """
+        self._publicar_fase("acoes")
         self.status_callback("Iniciando extração de dados de AÇÕES...", 30)
         dados_acoes = []
         acoes = self.config["acoes"]
@@ -204,6 +289,8 @@ class DataExtractor:
         total_acoes = len(acoes)
         progresso_por_acao = 30 / total_acoes if total_acoes > 0 else 0
         progresso_base_acoes = 30
+        if self.sessao_http:
+            self.sessao_http.reiniciar_contagem()
 
         for i, acao in enumerate(acoes):
             if self.verificar_cancelamento():
@@ -213,35 +300,38 @@ class DataExtractor:
             progresso_atual = progresso_base_acoes + (i * progresso_por_acao)
             self.status_callback(f"Processando ação {acao} ({i+1}/{total_acoes})...", int(progresso_atual))
 
-            for tentativa in range(MAX_RETRY_ATTEMPTS):
-                try:
-                    url = f"https://investidor10.com.br/acoes/{acao}/"
-                    self.driver.get(url)
-                    WebDriverWait(self.driver, DEFAULT_WAIT_TIME).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    resultado_acao = {"Ticker": acao, "Origem": "Ação"}
-                    if colunas_personalizadas:
-                        self.extrair_colunas_personalizadas_otimizado(colunas_personalizadas, resultado_acao)
-                    dados_acoes.append(resultado_acao)
-                    break  # Sucesso, vai para a próxima ação
-                except (TimeoutException, NoSuchElementException) as e:
-                    if tentativa < MAX_RETRY_ATTEMPTS - 1:
-                        self.status_callback(f"Tentativa {tentativa + 1} falhou para {acao}, tentando novamente...", int(progresso_atual))
-                        time.sleep(RETRY_DELAY)
-                        continue
-                    else:
-                        messagebox.showwarning("Erro de Extração", f"Não foi possível carregar a página da ação {acao}. Verifique o ticker e sua conexão.")
-                        dados_acoes.append({"Ticker": acao, "Origem": "Ação", "Erro": "Página não carregou"})
-                except Exception as e:
-                    if tentativa < MAX_RETRY_ATTEMPTS - 1:
-                        self.status_callback(f"Tentativa {tentativa + 1} falhou para {acao}, tentando novamente...", int(progresso_atual))
-                        time.sleep(RETRY_DELAY)
-                        continue
-                    else:
-                        messagebox.showwarning("Erro Ação", f"Erro ao processar ação {acao}: {str(e)}")
-                        dados_acoes.append({"Ticker": acao, "Origem": "Ação", "Erro": str(e)})
+            self._publicar_ticker(TipoEvento.TICKER_INICIADO, acao, i, total_acoes)
+            with self.tracer.span("ticker", ticker=acao, tipo="acao"):
+                for tentativa in range(MAX_RETRY_ATTEMPTS):
+                    try:
+                        resultado_acao = {"Ticker": acao, "Origem": "Ação"}
+                        with self.tracer.span("tentativa", ticker=acao, tentativa=tentativa + 1):
+                            self._carregar_ativo(f"/acoes/{acao}/", colunas_personalizadas, resultado_acao)
+                        self._guardar_registro("acoes", resultado_acao, dados_acoes)
+                        self._publicar_ticker(TipoEvento.TICKER_CONCLUIDO, acao, i + 1, total_acoes)
+                        break  # Sucesso, vai para a próxima ação
+                    except (TimeoutException, NoSuchElementException) as e:
+                        if tentativa < MAX_RETRY_ATTEMPTS - 1:
+                            self.status_callback(f"Tentativa {tentativa + 1} falhou para {acao}, tentando novamente...", int(progresso_atual))
+                            with self.tracer.span("retry", ticker=acao, tentativa=tentativa + 1):
+                                time.sleep(RETRY_DELAY)
+                            continue
+                        else:
+                            messagebox.showwarning("Erro de Extração", f"Não foi possível carregar a página da ação {acao}. Verifique o ticker e sua conexão.")
+                            self._guardar_registro("acoes", {"Ticker": acao, "Origem": "Ação", "Erro": "Página não carregou"}, dados_acoes)
+                            self._publicar_ticker(TipoEvento.TICKER_FALHOU, acao, i + 1, total_acoes, "Página não carregou")
+                    except Exception as e:
+                        if tentativa < MAX_RETRY_ATTEMPTS - 1:
+                            self.status_callback(f"Tentativa {tentativa + 1} falhou para {acao}, tentando novamente...", int(progresso_atual))
+                            with self.tracer.span("retry", ticker=acao, tentativa=tentativa + 1):
+                                time.sleep(RETRY_DELAY)
+                            continue
+                        else:
+                            messagebox.showwarning("Erro Ação", f"Erro ao processar ação {acao}: {str(e)}")
+                            self._guardar_registro("acoes", {"Ticker": acao, "Origem": "Ação", "Erro": str(e)}, dados_acoes)
+                            self._publicar_ticker(TipoEvento.TICKER_FALHOU, acao, i + 1, total_acoes, str(e))
 
+        self._alertar_colunas_sem_valor("ações")
         self.status_callback("Extração de dados de AÇÕES concluída.", 60)
         return dados_acoes
 
@@ -250,8 +340,10 @@ class DataExtractor:
         Realiza a extração de dados para os FIIs configurados.
 
         Returns:
-            list: Lista de dicionários, cada um representando os dados de um FII.
+            list: Lista de dicionários, cada um representando os dados de um FII
+                (vazia quando os registros são gravados no sink).
         """
+        self._publicar_fase("fiis")
         self.status_callback("Iniciando extração de dados de FIIs...", 30)
         dados_fiis = []
         fiis = self.config["fiis"]
@@ -264,6 +356,8 @@ class DataExtractor:
         total_fiis = len(fiis)
         progresso_por_fii = 30 / total_fiis if total_fiis > 0 else 0
         progresso_base_fiis = 30
+        if self.sessao_http:
+            self.sessao_http.reiniciar_contagem()
 
         for i, fii in enumerate(fiis):
             if self.verificar_cancelamento():
@@ -273,38 +367,92 @@ class DataExtractor:
             progresso_atual = progresso_base_fiis + (i * progresso_por_fii)
             self.status_callback(f"Processando FII {fii} ({i+1}/{total_fiis})...", int(progresso_atual))
 
-            for tentativa in range(MAX_RETRY_ATTEMPTS):
-                try:
-                    url = f"https://investidor10.com.br/fiis/{fii}/"
-                    self.driver.get(url)
-                    WebDriverWait(self.driver, DEFAULT_WAIT_TIME).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    resultado_fii = {"Ticker": fii, "Origem": "FII"}
-                    if colunas_personalizadas_fiis:
-                        self.extrair_colunas_personalizadas_otimizado(colunas_personalizadas_fiis, resultado_fii)
-                    dados_fiis.append(resultado_fii)
-                    break  # Sucesso, vai para o próximo FII
-                except (TimeoutException, NoSuchElementException) as e:
-                    if tentativa < MAX_RETRY_ATTEMPTS - 1:
-                        self.status_callback(f"Tentativa {tentativa + 1} falhou para {fii}, tentando novamente...", int(progresso_atual))
-                        time.sleep(RETRY_DELAY)
-                        continue
-                    else:
-                        messagebox.showwarning("Erro de Extração", f"Não foi possível carregar a página do FII {fii}. Verifique o ticker e sua conexão.")
-                        dados_fiis.append({"Ticker": fii, "Origem": "FII", "Erro": "Página não carregou"})
-                except Exception as e:
-                    if tentativa < MAX_RETRY_ATTEMPTS - 1:
-                        self.status_callback(f"Tentativa {tentativa + 1} falhou para {fii}, tentando novamente...", int(progresso_atual))
-                        time.sleep(RETRY_DELAY)
-                        continue
-                    else:
-                        messagebox.showwarning("Erro FII", f"Erro ao processar FII {fii}: {str(e)}")
-                        dados_fiis.append({"Ticker": fii, "Origem": "FII", "Erro": str(e)})
+            self._publicar_ticker(TipoEvento.TICKER_INICIADO, fii, i, total_fiis)
+            with self.tracer.span("ticker", ticker=fii, tipo="fii"):
+                for tentativa in range(MAX_RETRY_ATTEMPTS):
+                    try:
+                        resultado_fii = {"Ticker": fii, "Origem": "FII"}
+                        with self.tracer.span("tentativa", ticker=fii, tentativa=tentativa + 1):
+                            self._carregar_ativo(f"/fiis/{fii}/", colunas_personalizadas_fiis, resultado_fii)
+                        self._guardar_registro("fiis", resultado_fii, dados_fiis)
+                        self._publicar_ticker(TipoEvento.TICKER_CONCLUIDO, fii, i + 1, total_fiis)
+                        break  # Sucesso, vai para o próximo FII
+                    except (TimeoutException, NoSuchElementException) as e:
+                        if tentativa < MAX_RETRY_ATTEMPTS - 1:
+                            self.status_callback(f"Tentativa {tentativa + 1} falhou para {fii}, tentando novamente...", int(progresso_atual))
+                            with self.tracer.span("retry", ticker=fii, tentativa=tentativa + 1):
+                                time.sleep(RETRY_DELAY)
+                            continue
+                        else:
+                            messagebox.showwarning("Erro de Extração", f"Não foi possível carregar a página do FII {fii}. Verifique o ticker e sua conexão.")
+                            self._guardar_registro("fiis", {"Ticker": fii, "Origem": "FII", "Erro": "Página não carregou"}, dados_fiis)
+                            self._publicar_ticker(TipoEvento.TICKER_FALHOU, fii, i + 1, total_fiis, "Página não carregou")
+                    except Exception as e:
+                        if tentativa < MAX_RETRY_ATTEMPTS - 1:
+                            self.status_callback(f"Tentativa {tentativa + 1} falhou para {fii}, tentando novamente...", int(progresso_atual))
+                            with self.tracer.span("retry", ticker=fii, tentativa=tentativa + 1):
+                                time.sleep(RETRY_DELAY)
+                            continue
+                        else:
+                            messagebox.showwarning("Erro FII", f"Erro ao processar FII {fii}: {str(e)}")
+                            self._guardar_registro("fiis", {"Ticker": fii, "Origem": "FII", "Erro": str(e)}, dados_fiis)
+                            self._publicar_ticker(TipoEvento.TICKER_FALHOU, fii, i + 1, total_fiis, str(e))
 
+        self._alertar_colunas_sem_valor("FIIs")
         self.status_callback("Extração de dados de FIIs concluída.", 60)
         return dados_fiis
 
+    def _alertar_colunas_sem_valor(self, tipo):
+        """Avisa quando, via HTTP, alguma coluna ficou "N/A" em todos os ativos (seletor provavelmente inválido)."""
+        if not self.modo_http:
+            return
+        colunas = self.sessao_http.colunas_sem_valor()
+        if colunas:
+            mensagem = (f"Colunas de {tipo} sem valor em nenhum ativo via HTTP: {', '.join(colunas)}. "
+                        "Verifique os seletores ou desative a reutilização de sessão.")
+            logger.warning(mensagem)
+            self.status_callback(mensagem, None)
+
+    def _carregar_ativo(self, caminho, colunas_personalizadas, resultado):
+        """
+        Carrega a página de um ativo e extrai as colunas personalizadas.
+
+        Usa a sessão HTTP quando disponível; caso contrário, navega com o WebDriver.
+
+        Args:
+            caminho (str): Caminho da página (ex: "/acoes/ITUB4/")
+            colunas_personalizadas (list): Configuração das colunas
+            resultado (dict): Dicionário que recebe os valores extraídos
+        """
+        if self.modo_http:
+            try:
+                with self.tracer.span("http_pagina", caminho=caminho):
+                    self.sessao_http.extrair_colunas(caminho, colunas_personalizadas, resultado)
+                return
+            except SessaoExpirada as e:
+                # Sem isso todas as linhas seguintes sairiam "N/A": continuar pelo navegador
+                logger.warning(f"{e}; continuando a extração pelo navegador")
+                self.status_callback("Sessão HTTP expirada, abrindo o navegador para um novo login...", None)
+                self.sessao_http.limpar()
+                self.garantir_navegador()
+
+        with self.tracer.span("navegacao", caminho=caminho):
+            self.driver.get(f"{self.url_base}{caminho}")
+        with self.tracer.span("espera", caminho=caminho):
+            WebDriverWait(self.driver, DEFAULT_WAIT_TIME).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+        if colunas_personalizadas:
+            self.extrair_colunas_personalizadas_otimizado(colunas_personalizadas, resultado)
+
+    def salvar_trace(self):
+        """Grava o trace e o resumo por fase da execução na pasta de traces."""
+        try:
+            return self.tracer.salvar_execucao(self.config.get("pasta_traces", PASTA_TRACES_PADRAO))
+        except OSError as e:
+            logger.warning(f"Erro ao salvar trace da extração: {e}")
+            return None
+
     def extract_portfolio_data(self):
         """
         Realiza a extração de dados das carteiras de ações e FIIs.
@@ -316,6 +464,20 @@ class DataExtractor:
             self.status_callback("Extração de carteiras cancelada pelo usuário.", 0)
             return [], []
 
+        self._publicar_fase("carteiras")
+
+        # Com uma sessão HTTP válida as carteiras são lidas sem abrir o navegador
+        if self.modo_http:
+            dados_http = self._extrair_carteiras_http()
+            if dados_http is not None:
+                return dados_http
+
+            # Sessão expirou ou a página não trouxe as tabelas: abrir o navegador
+            self.status_callback("Carteiras indisponíveis via HTTP, abrindo o navegador para login...", 65)
+            self.garantir_navegador()
+            if self.verificar_cancelamento():
+                return [], []
+
         # Extrair carteira de ações
         dados_carteiras_acoes = self.extract_portfolio_stocks_data()
 
@@ -324,6 +486,7 @@ class DataExtractor:
 
         return dados_carteiras_acoes, dados_carteiras_fiis
 
+    @rastreado("carteira_acoes")
     def extract_portfolio_stocks_data(self):
         """
         Realiza a extração de dados para a carteira de ações.
@@ -345,7 +508,7 @@ class DataExtractor:
 
                 # Navega para a página com retry
                 try:
-                    self.driver.get("https://investidor10.com.br/carteiras/resumo/")
+                    self.driver.get(f"{self.url_base}/carteiras/resumo/")
                 except WebDriverException as nav_error:
                     self.status_callback(f"Erro de navegação: {nav_error}", 70)
                     if tentativa < MAX_RETRY_ATTEMPTS - 1:
@@ -395,7 +558,8 @@ class DataExtractor:
                 for i, estrategia in enumerate(estrategias):
                     try:
                         self.status_callback(f"Tentando estratégia de extração {i + 1}...", 82 + i)
-                        raw_data_carteiras = estrategia()
+                        with self.tracer.span("estrategia_carteira", carteira="acoes", estrategia=i + 1):
+                            raw_data_carteiras = estrategia()
                         if raw_data_carteiras:
                             break
                     except Exception as e:
@@ -441,6 +605,7 @@ class DataExtractor:
 
         return dados_carteiras_acoes
 
+    @rastreado("carteira_fiis")
     def extract_portfolio_fiis_data(self):
         """
         Realiza a extração de dados para a carteira de FIIs.
@@ -464,7 +629,7 @@ class DataExtractor:
                 current_url = self.driver.current_url
                 if "carteiras/resumo" not in current_url:
                     try:
-                        self.driver.get("https://investidor10.com.br/carteiras/resumo/")
+                        self.driver.get(f"{self.url_base}/carteiras/resumo/")
                         time.sleep(3)  # Aumentar tempo para carregamento
                     except WebDriverException as nav_error:
                         self.status_callback(f"Erro de navegação: {nav_error}", 86)
@@ -518,7 +683,8 @@ class DataExtractor:
                 for i, seletor in enumerate(seletores_fiis):
                     try:
                         self.status_callback(f"Tentando seletor {i+1}: {seletor[:50]}...", 87)
-                        elementos = self.driver.find_elements(By.CSS_SELECTOR, seletor)
+                        with self.tracer.span("seletor_tabela_fiis", seletor=seletor[:80]):
+                            elementos = self.driver.find_elements(By.CSS_SELECTOR, seletor)
 
                         if elementos:
                             # Para os primeiros seletores (específicos para FIIs), usar diretamente
@@ -627,7 +793,8 @@ class DataExtractor:
                 for i, estrategia in enumerate(estrategias_fiis):
                     try:
                         self.status_callback(f"Tentando estratégia FII {i + 1}...", 88 + i)
-                        raw_data_fiis = estrategia()
+                        with self.tracer.span("estrategia_carteira", carteira="fiis", estrategia=i + 1):
+                            raw_data_fiis = estrategia()
                         if raw_data_fiis:
                             self.status_callback(f"Estratégia FII {i + 1} bem-sucedida - {len(raw_data_fiis)} registros encontrados", 88 + i)
                             break
@@ -677,6 +844,33 @@ class DataExtractor:
 
         return dados_carteiras_fiis
 
+    @rastreado("carteiras_http")
+    def _extrair_carteiras_http(self):
+        """
+        Extrai as carteiras de ações e FIIs pela sessão HTTP autenticada.
+
+        Returns:
+            tuple or None: (dados_carteiras_acoes, dados_carteiras_fiis), ou None
+            se a sessão expirou ou as tabelas não estão presentes no HTML.
+        """
+        self.status_callback("Extraindo carteiras via sessão HTTP...", 70)
+        try:
+            dados_carteiras_acoes, dados_carteiras_fiis = self.sessao_http.extrair_carteiras()
+        except Exception as e:
+            logger.warning(f"Erro ao extrair carteiras via HTTP: {e}")
+            return None
+
+        if not dados_carteiras_acoes and not dados_carteiras_fiis:
+            return None
+
+        for linha_dict in dados_carteiras_acoes:
+            linha_dict["Origem"] = "Carteira Ações"
+        for linha_dict in dados_carteiras_fiis:
+            linha_dict["Origem"] = "Carteira FIIs"
+
+        self.status_callback("Extração de dados das CARTEIRAS via HTTP concluída.", 90)
+        return dados_carteiras_acoes, dados_carteiras_fiis
+
     def _extrair_carteiras_fallback(self):
         """Método de fallback para extrair dados de carteiras usando JavaScript."""
         try:
@@ -790,8 +984,9 @@ class DataExtractor:
     def _extrair_fiis_javascript(self, seletor_fiis):
         """Método JavaScript para extrair dados de FIIs."""
         try:
+            seletor_escapado = seletor_fiis.replace("'", "\\'")
             script = f"""
-            const tabela = document.querySelector('{seletor_fiis.replace("'", "\\'")}');
+            const tabela = document.querySelector('{seletor_escapado}');
             const data = [];
 
             if (tabela) {{
@@ -1168,6 +1363,7 @@ class DataExtractor:
             logger.error(f"Erro no fallback final de FIIs: {str(e)}")
             return []
 
+    @rastreado("expandir_secao_fiis")
     def _expandir_secao_fiis(self):
         """Expande a seção de FIIs clicando no cabeçalho se necessário."""
         self.status_callback("🔍 Verificando se seção de FIIs precisa ser expandida...", 87)
@@ -1259,6 +1455,7 @@ class DataExtractor:
             self.status_callback(f"❌ Erro ao expandir seção de FIIs: {e}", 87)
             logger.error(f"Erro ao expandir seção de FIIs: {e}")
 
+    @rastreado("colunas_personalizadas")
     def extrair_colunas_personalizadas_otimizado(self, colunas_personalizadas, resultado_acao):
         """
         Otimiza a extração de múltiplas colunas personalizadas usando JavaScript
@@ -1316,7 +1513,8 @@ class DataExtractor:
                     return results;
                     """
 
-                    resultados_js = self.driver.execute_script(script, seletores)
+                    with self.tracer.span("colunas_js", seletores=len(seletores)):
+                        resultados_js = self.driver.execute_script(script, seletores)
 
                     for coluna in colunas_avancadas:
                         if coluna.get("seletor_css") and coluna.get("seletor_css") in resultados_js:
@@ -1360,6 +1558,7 @@ class DataExtractor:
                 except Exception as e_col:
                     resultado_acao[coluna["nome"]] = f"Erro ao extrair coluna: {e_col}"
 
+    @rastreado("seletor_fallback", argumento="seletor")
     def extrair_seletor_complexo(self, seletor_css):
         """
         Identifica e processa seletores complexos, particularmente aqueles relacionados a tabelas.
@@ -1375,9 +1574,10 @@ class DataExtractor:
             return "N/A"
 
         try:
+            seletor_escapado = seletor_css.replace("'", "\\'")
             script = f"""
             try {{
-                const element = document.querySelector('{seletor_css.replace("'", "\\'")}');
+                const element = document.querySelector('{seletor_escapado}');
                 return element ? element.textContent.trim() : 'N/A';
             }} catch (e) {{
                 return 'N/A';
@@ -1610,3 +1810,5 @@ class DataExtractor:
         if self.driver:
             self.driver.quit()
             self.driver = None
+        if self.sessao_http:
+            self.sessao_http.fechar()
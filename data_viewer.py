@@ -4,21 +4,30 @@ import pandas as pd
 import json
 import threading
 from datetime import datetime
-import re
-
-try:
-    import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    GENAI_AVAILABLE = False
-    genai = None
+from snapshot_diff import formatar_alteracoes
+from virtual_table import TabelaVirtual
+from lazy_tabs import AbasSobDemanda
+from statistics_engine import motor_compartilhado, resumo_painel, resumo_texto
+from ai_context import ConstrutorContexto, ORCAMENTO_TOKENS_PADRAO
+from ai_retrieval import IndiceRecuperacao
+from ai_cache import CacheRespostas, ARQUIVO_CACHE_PADRAO, LIMITE_MB_PADRAO
+from markdown_renderer import RenderizadorMarkdown, limpar_resposta
+from ai_providers import biblioteca_ausente, criar_provedor, nome_provedor, usa_api_key
+
+# Constantes
+CONJUNTOS_CARTEIRA = ("💼 CARTEIRA DE AÇÕES", "🏢 CARTEIRA DE FIIs")
+# Versões dos modelos de prompt: mudar o texto de um prompt exige nova versão para não reaproveitar respostas antigas
+VERSAO_PROMPT_CHAT = "chat-1"
+VERSAO_PROMPT_CSV = "csv-1"
+AVISO_RESPOSTA_CACHE = "\n\n_⚡ Resposta reaproveitada do cache local (mesma pergunta sobre os mesmos dados)._"
 
 class DataViewer:
     """
-    Tela para visualizar dados exportados e interagir com IA Google Gemini.
+    Tela para visualizar dados exportados e interagir com a IA (Google Gemini ou servidor local).
     """
 
-    def __init__(self, parent, df_acoes, config, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None):
+    def __init__(self, parent, df_acoes, config, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None,
+                 df_alteracoes=None):
         """
         Inicializa o visualizador de dados.
 
@@ -29,14 +38,32 @@ class DataViewer:
             df_fiis: DataFrame com dados dos FIIs (opcional)
             df_carteiras_acoes: DataFrame com dados da carteira de ações (opcional)
             df_carteiras_fiis: DataFrame com dados da carteira de FIIs (opcional)
+            df_alteracoes: DataFrame com as alterações desde a extração anterior (opcional)
         """
         self.parent = parent
         self.df_acoes = df_acoes
         self.df_fiis = df_fiis if df_fiis is not None else pd.DataFrame()
         self.df_carteiras_acoes = df_carteiras_acoes if df_carteiras_acoes is not None else pd.DataFrame()
         self.df_carteiras_fiis = df_carteiras_fiis if df_carteiras_fiis is not None else pd.DataFrame()
+        self.df_alteracoes = df_alteracoes if df_alteracoes is not None else pd.DataFrame()
         self.config = config
         self.ai_configured = False
+        self.motor_estatisticas = motor_compartilhado()
+        self.construtor_contexto = ConstrutorContexto(config.get("ia_orcamento_tokens", ORCAMENTO_TOKENS_PADRAO),
+                                                      self.motor_estatisticas)
+
+        # Cache em disco das respostas da IA
+        try:
+            self.cache_respostas = CacheRespostas(config.get("arquivo_cache_ia", ARQUIVO_CACHE_PADRAO),
+                                                  config.get("ia_cache_mb", LIMITE_MB_PADRAO))
+        except Exception as e:
+            print(f"Erro ao abrir cache de respostas da IA: {e}")
+            self.cache_respostas = None
+
+        # Índice de recuperação do chat: montado em segundo plano enquanto a janela abre
+        self.indice_recuperacao = None
+        self._indice_pronto = threading.Event()
+        threading.Thread(target=self._construir_indice_recuperacao, daemon=True).start()
 
         # Configurar tema baseado na configuração
         self.tema_escuro = config.get("tema", "escuro") == "escuro"
@@ -78,22 +105,24 @@ class DataViewer:
             self.cor_erro = "#ef4444"
 
     def _init_ai(self):
-        """Inicializa a IA Google Gemini se configurada."""
-        if not GENAI_AVAILABLE:
+        """Inicializa o provedor de IA configurado em ``"ia_provedor"`` (ver ``ai_providers``)."""
+        self.provedor = None
+        if biblioteca_ausente(self.config):
             self.ai_configured = False
             return
 
-        api_key = self.config.get("gemini_api_key", "")
-        if api_key:
-            try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-2.5-pro')
-                self.ai_configured = True
-            except Exception as e:
-                print(f"Erro ao configurar IA: {e}")
-                self.ai_configured = False
-        else:
-            self.ai_configured = False
+        try:
+            self.provedor = criar_provedor(self.config)
+        except Exception as e:
+            print(f"Erro ao configurar IA: {e}")
+        self.ai_configured = self.provedor is not None
+
+    def _mensagem_ia_nao_configurada(self):
+        """Orientação exibida quando o provedor configurado ainda não pode ser usado."""
+        if usa_api_key(self.config):
+            return "Configure sua API key do Google Gemini na aba 'Configurações da IA' para começar a usar o chat."
+        return (f"Não foi possível usar o provedor \"{self.config.get('ia_provedor')}\". "
+                "Verifique \"ia_provedor\" e \"ia_url_local\" no config.json.")
 
     def criar_janela(self):
         """Cria a janela principal do visualizador."""
@@ -110,20 +139,22 @@ class DataViewer:
         self.notebook = ttk.Notebook(self.window)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Abas criadas na primeira seleção: a janela abre montando só a aba de dados
+        self.abas = AbasSobDemanda(self.notebook)
+
         # Aba de dados
-        self.criar_aba_dados()
+        self.abas.adicionar(ttk.Frame(self.notebook), self.criar_aba_dados, text="📈 Dados Exportados")
 
-        # Aba de IA
-        self.criar_aba_ia()
+        # Aba de IA (área de chat e tags de markdown)
+        self.abas.adicionar(ttk.Frame(self.notebook), self.criar_aba_ia, text="🤖 Chat com IA")
 
         # Aba de configurações da IA
-        self.criar_aba_config_ia()
+        self.abas.adicionar(ttk.Frame(self.notebook), self.criar_aba_config_ia, text="⚙️ Configurações IA")
 
-    def criar_aba_dados(self):
-        """Cria a aba de visualização de dados."""
-        frame_dados = ttk.Frame(self.notebook)
-        self.notebook.add(frame_dados, text="📈 Dados Exportados")
+        self.abas.construir_selecionada()
 
+    def criar_aba_dados(self, frame_dados):
+        """Cria o conteúdo da aba de visualização de dados."""
         # Frame principal
         main_frame = tk.Frame(frame_dados, bg=self.cor_fundo_secundario)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -134,113 +165,119 @@ class DataViewer:
                          bg=self.cor_fundo_secundario, fg=self.cor_texto)
         titulo.pack(pady=(0, 20))
 
-        # Notebook para separar ações e carteiras
+        # Notebook para separar ações e carteiras (cada tabela é criada ao abrir sua aba)
         dados_notebook = ttk.Notebook(main_frame)
         dados_notebook.pack(fill=tk.BOTH, expand=True)
-
-        # Aba de ações
-        if not self.df_acoes.empty:
-            frame_acoes = ttk.Frame(dados_notebook)
-            dados_notebook.add(frame_acoes, text=f"📈 Ações ({len(self.df_acoes)} registros)")
-            self.criar_tabela_dados(frame_acoes, self.df_acoes)
-
-        # Aba de FIIs
-        if not self.df_fiis.empty:
-            frame_fiis = ttk.Frame(dados_notebook)
-            dados_notebook.add(frame_fiis, text=f"🏢 FIIs ({len(self.df_fiis)} registros)")
-            self.criar_tabela_dados(frame_fiis, self.df_fiis)
-
-        # Aba de carteira de ações
-        if not self.df_carteiras_acoes.empty:
-            frame_carteiras_acoes = ttk.Frame(dados_notebook)
-            dados_notebook.add(frame_carteiras_acoes, text=f"💼 Carteira Ações ({len(self.df_carteiras_acoes)} registros)")
-            self.criar_tabela_dados(frame_carteiras_acoes, self.df_carteiras_acoes)
-
-        # Aba de carteira de FIIs
-        if not self.df_carteiras_fiis.empty:
-            frame_carteiras_fiis = ttk.Frame(dados_notebook)
-            dados_notebook.add(frame_carteiras_fiis, text=f"🏢 Carteira FIIs ({len(self.df_carteiras_fiis)} registros)")
-            self.criar_tabela_dados(frame_carteiras_fiis, self.df_carteiras_fiis)
+        self.abas_dados = AbasSobDemanda(dados_notebook)
+
+        tabelas = [
+            (self.df_acoes, "📈 Ações"),
+            (self.df_fiis, "🏢 FIIs"),
+            (self.df_carteiras_acoes, "💼 Carteira Ações"),
+            (self.df_carteiras_fiis, "🏢 Carteira FIIs"),
+        ]
+        for df, rotulo in tabelas:
+            if not df.empty:
+                self.abas_dados.adicionar(ttk.Frame(dados_notebook),
+                                          lambda frame, df=df: self.criar_tabela_dados(frame, df),
+                                          text=f"{rotulo} ({len(df)} registros)")
+
+        # Aba de alterações desde a extração anterior
+        if not self.df_alteracoes.empty:
+            tickers_alterados = self.df_alteracoes["Ticker"].nunique()
+            self.abas_dados.adicionar(ttk.Frame(dados_notebook), self.criar_tabela_alteracoes,
+                                      text=f"🔄 Alterações ({tickers_alterados} tickers)")
+
+        self.abas_dados.construir_selecionada()
 
         # Estatísticas gerais
         self.criar_estatisticas(main_frame)
 
     def criar_tabela_dados(self, parent, df):
-        """Cria uma tabela para exibir os dados."""
-        # Frame para a tabela
-        frame_tabela = tk.Frame(parent, bg=self.cor_fundo_secundario)
-        frame_tabela.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Criar Treeview
-        colunas = list(df.columns)
-        tree = ttk.Treeview(frame_tabela, columns=colunas, show="headings", height=15)
-
-        # Configurar cabeçalhos
-        for col in colunas:
-            tree.heading(col, text=col)
-            tree.column(col, width=120, minwidth=80)
-
-        # Adicionar dados
-        for index, row in df.iterrows():
-            tree.insert("", tk.END, values=list(row))
-
-        # Scrollbars
-        scrollbar_v = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL, command=tree.yview)
-        scrollbar_h = ttk.Scrollbar(frame_tabela, orient=tk.HORIZONTAL, command=tree.xview)
-        tree.configure(yscrollcommand=scrollbar_v.set, xscrollcommand=scrollbar_h.set)
-
-        # Layout
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar_v.pack(side=tk.RIGHT, fill=tk.Y)
-        scrollbar_h.pack(side=tk.BOTTOM, fill=tk.X)
+        """Cria uma tabela virtualizada para exibir os dados (só as linhas visíveis são montadas)."""
+        tabela = TabelaVirtual(parent, df)
+        tabela.frame.configure(bg=self.cor_fundo_secundario)
+        tabela.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        return tabela
+
+    def criar_tabela_alteracoes(self, parent):
+        """Cria a tabela com os valores alterados, destacando altas e quedas."""
+        def tag_variacao(trecho):
+            return ["texto" if pd.isna(variacao) else ("alta" if variacao >= 0 else "queda")
+                    for variacao in trecho["Variação %"]]
+
+        larguras = {"Coluna": 140, "Anterior Em": 140}
+        tabela = TabelaVirtual(parent, self.df_alteracoes, formatador=formatar_alteracoes,
+                               tags_linha=tag_variacao,
+                               larguras={col: larguras.get(col, 110) for col in self.df_alteracoes.columns})
+        tabela.tree.tag_configure("alta", foreground=self.cor_sucesso)
+        tabela.tree.tag_configure("queda", foreground=self.cor_erro)
+        tabela.tree.tag_configure("texto", foreground=self.cor_aviso)
+        tabela.frame.configure(bg=self.cor_fundo_secundario)
+        tabela.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        return tabela
+
+    def _conjuntos_estatisticas(self):
+        """Conjuntos exibidos no painel de estatísticas e resumidos no contexto da IA."""
+        return {
+            "📈 AÇÕES": self.df_acoes,
+            "🏢 FIIs": self.df_fiis,
+            "💼 CARTEIRA AÇÕES": self.df_carteiras_acoes,
+            "🏢 CARTEIRA FIIs": self.df_carteiras_fiis,
+        }
 
     def criar_estatisticas(self, parent):
-        """Cria um resumo estatístico dos dados."""
+        """Cria o painel de estatísticas; o cálculo roda em segundo plano (memorizado por hash dos dados)."""
         frame_stats = tk.LabelFrame(parent, text="📊 Estatísticas",
                                    bg=self.cor_fundo_secundario, fg=self.cor_texto,
                                    font=("Segoe UI", 12, "bold"))
         frame_stats.pack(fill=tk.X, pady=(20, 0))
 
         # Texto com estatísticas
-        stats_text = tk.Text(frame_stats, height=6, width=80,
-                            bg=self.cor_fundo_terciario, fg=self.cor_texto,
-                            font=("Consolas", 10))
+        stats_text = scrolledtext.ScrolledText(frame_stats, height=8, width=80,
+                                               bg=self.cor_fundo_terciario, fg=self.cor_texto,
+                                               font=("Consolas", 10))
         stats_text.pack(fill=tk.X, padx=10, pady=10)
+        stats_text.insert(tk.END, "⏳ Calculando estatísticas...")
+        stats_text.config(state=tk.DISABLED)
 
-        # Gerar estatísticas
-        stats_info = []
-        if not self.df_acoes.empty:
-            stats_info.append(f"📈 AÇÕES: {len(self.df_acoes)} registros")
-            stats_info.append(f"   Colunas: {', '.join(self.df_acoes.columns[:5])}{'...' if len(self.df_acoes.columns) > 5 else ''}")
-
-        if not self.df_fiis.empty:
-            stats_info.append(f"🏢 FIIs: {len(self.df_fiis)} registros")
-            stats_info.append(f"   Colunas: {', '.join(self.df_fiis.columns[:5])}{'...' if len(self.df_fiis.columns) > 5 else ''}")
-
+        def exibir(resultados):
+            try:
+                self.window.after(0, lambda: self._exibir_estatisticas(stats_text, resultados))
+            except (tk.TclError, RuntimeError):
+                pass  # Janela fechada antes do fim do cálculo
 
+        self.motor_estatisticas.calcular_em_segundo_plano(self._conjuntos_estatisticas(), exibir)
 
+    def _exibir_estatisticas(self, stats_text, resultados):
+        """Preenche o painel com as estatísticas calculadas (thread principal)."""
+        stats_info = []
+        for nome, estatisticas in resultados.items():
+            stats_info.extend(resumo_painel(nome, estatisticas))
         stats_info.append(f"📅 Exportado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
 
-        stats_text.insert(tk.END, "\n".join(stats_info))
-        stats_text.config(state=tk.DISABLED)
-
-    def criar_aba_ia(self):
-        """Cria a aba de interação com IA."""
-        frame_ia = ttk.Frame(self.notebook)
-        self.notebook.add(frame_ia, text="🤖 Chat com IA")
-
+        try:
+            stats_text.config(state=tk.NORMAL)
+            stats_text.delete("1.0", tk.END)
+            stats_text.insert(tk.END, "\n".join(stats_info))
+            stats_text.config(state=tk.DISABLED)
+        except tk.TclError:
+            pass  # Painel destruído
+
+    def criar_aba_ia(self, frame_ia):
+        """Cria o conteúdo da aba de interação com IA."""
         # Frame principal
         main_frame = tk.Frame(frame_ia, bg=self.cor_fundo_secundario)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         # Título
-        titulo = tk.Label(main_frame, text="🤖 Chat com Google Gemini",
+        titulo = tk.Label(main_frame, text=f"🤖 Chat com {nome_provedor(self.config)}",
                          font=("Segoe UI", 16, "bold"),
                          bg=self.cor_fundo_secundario, fg=self.cor_texto)
         titulo.pack(pady=(0, 20))
 
         # Status da IA
-        if not GENAI_AVAILABLE:
+        if biblioteca_ausente(self.config):
             status_text = "❌ Biblioteca google-generativeai não instalada"
             status_color = self.cor_erro
         elif self.ai_configured:
@@ -270,6 +307,7 @@ class DataViewer:
 
         # Configurar tags para formatação markdown
         self.configurar_tags_formatacao()
+        self.renderizador = RenderizadorMarkdown(self.chat_area)
 
         # Frame de entrada
         entrada_frame = tk.Frame(main_frame, bg=self.cor_fundo_secundario)
@@ -330,7 +368,7 @@ class DataViewer:
         self.btn_enviar.pack(side=tk.LEFT)
 
         # Mensagem inicial
-        if not GENAI_AVAILABLE:
+        if biblioteca_ausente(self.config):
             self.adicionar_mensagem_chat("🤖 IA", "A biblioteca google-generativeai não está instalada. Execute: pip install google-generativeai", "bot")
         elif self.ai_configured:
             total_registros = len(self.df_acoes) + len(self.df_fiis) + len(self.df_carteiras_acoes) + len(self.df_carteiras_fiis)
@@ -348,32 +386,35 @@ class DataViewer:
 
             self.adicionar_mensagem_chat("🤖 IA", f"✨ **Analista Financeiro IA - Pronto para Ajudar!**\n\n📊 **Dados Disponíveis:** {total_registros} registros ({descricao_dados})\n\n🎯 **O que posso fazer:**\n• Análises fundamentalistas detalhadas\n• Identificação de oportunidades e riscos\n• Comparações setoriais e rankings\n• Estratégias de portfólio personalizadas\n• Insights criativos e correlações únicas\n• Recomendações baseadas nos seus dados\n• Análises específicas de FIIs e ações\n\n💡 **Dicas:**\n• Use o botão **'📋 Insights'** para análise automática completa\n• Faça perguntas específicas sobre ações, FIIs ou setores\n• Peça comparações, rankings ou cenários\n• Solicite estratégias para diferentes perfis de risco\n\n🚀 **Estou aqui para ser seu consultor financeiro pessoal!**", "bot")
         else:
-            self.adicionar_mensagem_chat("🤖 IA", "Configure sua API key do Google Gemini na aba 'Configurações da IA' para começar a usar o chat.", "bot")
-
-    def criar_aba_config_ia(self):
-        """Cria a aba de configurações da IA."""
-        frame_config = ttk.Frame(self.notebook)
-        self.notebook.add(frame_config, text="⚙️ Configurações IA")
+            self.adicionar_mensagem_chat("🤖 IA", self._mensagem_ia_nao_configurada(), "bot")
 
+    def criar_aba_config_ia(self, frame_config):
+        """Cria o conteúdo da aba de configurações da IA."""
         # Frame principal
         main_frame = tk.Frame(frame_config, bg=self.cor_fundo_secundario)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         # Título
-        titulo = tk.Label(main_frame, text="⚙️ Configurações da IA Google Gemini",
+        titulo = tk.Label(main_frame, text=f"⚙️ Configurações da IA ({nome_provedor(self.config)})",
                          font=("Segoe UI", 16, "bold"),
                          bg=self.cor_fundo_secundario, fg=self.cor_texto)
         titulo.pack(pady=(0, 30))
 
         # Instruções
+        if usa_api_key(self.config):
+            orientacao = ("Para usar o chat com IA, você precisa configurar uma API key do Google Gemini.\n" +
+                          "Acesse https://aistudio.google.com/app/apikey para obter sua chave gratuita.\n\n")
+        else:
+            orientacao = (f"O chat usa o {nome_provedor(self.config)}; nenhuma API key é necessária.\n" +
+                          "O provedor é escolhido por \"ia_provedor\" no config.json.\n\n")
         instrucoes = tk.Label(main_frame,
-                             text="Para usar o chat com IA, você precisa configurar uma API key do Google Gemini.\n" +
-                                  "Acesse https://aistudio.google.com/app/apikey para obter sua chave gratuita.\n\n" +
+                             text=orientacao +
                                   "Funcionalidades da IA:\n" +
                                   "• Chat interativo com TODOS os dados extraídos\n" +
                                   "• Botão 'Insights' para análise automática completa\n" +
                                   "• Análise de tendências, comparações e recomendações\n" +
-                                  "• Suporte a grandes volumes de dados (até 800k caracteres)",
+                                  f"• Dados enviados dentro de um orçamento de {self.construtor_contexto.orcamento_tokens} tokens " +
+                                  "(\"ia_orcamento_tokens\" no config.json); o que não couber entra como resumo estatístico",
                              font=("Segoe UI", 10),
                              bg=self.cor_fundo_secundario, fg=self.cor_texto_secundario,
                              wraplength=600, justify=tk.LEFT)
@@ -381,7 +422,8 @@ class DataViewer:
 
         # Campo para API key
         api_frame = tk.Frame(main_frame, bg=self.cor_fundo_secundario)
-        api_frame.pack(fill=tk.X, pady=(0, 20))
+        if usa_api_key(self.config):
+            api_frame.pack(fill=tk.X, pady=(0, 20))
 
         api_label = tk.Label(api_frame, text="API Key do Google Gemini:",
                             font=("Segoe UI", 10, "bold"),
@@ -397,6 +439,17 @@ class DataViewer:
         if "gemini_api_key" in self.config:
             self.api_entry.insert(0, self.config["gemini_api_key"])
 
+        # Cache de respostas
+        self.var_usar_cache = tk.BooleanVar(value=self.config.get("ia_usar_cache", True))
+        checkbox_cache = tk.Checkbutton(main_frame,
+                                        text="⚡ Reaproveitar respostas em cache (mesma pergunta sobre os mesmos dados)",
+                                        variable=self.var_usar_cache,
+                                        bg=self.cor_fundo_secundario, fg=self.cor_texto,
+                                        selectcolor=self.cor_fundo_terciario,
+                                        activebackground=self.cor_fundo_secundario,
+                                        font=("Segoe UI", 10))
+        checkbox_cache.pack(anchor=tk.W)
+
         # Botões
         botoes_frame = tk.Frame(main_frame, bg=self.cor_fundo_secundario)
         botoes_frame.pack(fill=tk.X, pady=(20, 0))
@@ -413,6 +466,12 @@ class DataViewer:
                               font=("Segoe UI", 10, "bold"), relief=tk.FLAT, cursor="hand2")
         btn_salvar.pack(side=tk.LEFT)
 
+        btn_limpar_cache = tk.Button(botoes_frame, text="🗑️ Limpar Cache",
+                                     command=self.limpar_cache_ia,
+                                     bg=self.cor_botao, fg=self.cor_texto,
+                                     font=("Segoe UI", 10), relief=tk.FLAT, cursor="hand2")
+        btn_limpar_cache.pack(side=tk.LEFT, padx=(10, 0))
+
         # Área de status
         self.status_config = tk.Label(main_frame, text="",
                                      bg=self.cor_fundo_secundario,
@@ -420,9 +479,9 @@ class DataViewer:
         self.status_config.pack(pady=(20, 0))
 
     def testar_api(self):
-        """Testa a conexão com a API do Google Gemini."""
+        """Testa a conexão com o provedor de IA (Google Gemini ou o servidor local)."""
         api_key = self.api_entry.get().strip()
-        if not api_key:
+        if not api_key and usa_api_key(self.config):
             self.status_config.config(text="❌ Insira uma API key", fg=self.cor_erro)
             return
 
@@ -430,9 +489,7 @@ class DataViewer:
 
         def testar_thread():
             try:
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-2.5-pro')
-                response = model.generate_content("Teste de conexão. Responda apenas: 'Conexão bem-sucedida!'")
+                criar_provedor(self.config, api_key=api_key).testar()
 
                 self.window.after(0, lambda: self.status_config.config(
                     text="✅ Conexão bem-sucedida!", fg=self.cor_sucesso))
@@ -449,6 +506,7 @@ class DataViewer:
 
         # Atualizar configuração
         self.config["gemini_api_key"] = api_key
+        self.config["ia_usar_cache"] = self.var_usar_cache.get()
 
         # Salvar no arquivo
         try:
@@ -462,12 +520,24 @@ class DataViewer:
 
             # Mostrar informativo sobre segurança do config.json se a API key foi configurada
             # e o usuário não desativou o aviso
-            if api_key and self.config.get("mostrar_aviso_seguranca", True):
+            if api_key and usa_api_key(self.config) and self.config.get("mostrar_aviso_seguranca", True):
                 self.mostrar_informativo_seguranca()
 
         except Exception as e:
             self.status_config.config(text=f"❌ Erro ao salvar: {str(e)}", fg=self.cor_erro)
 
+    def limpar_cache_ia(self):
+        """Remove as respostas da IA guardadas em cache."""
+        if self.cache_respostas is None:
+            self.status_config.config(text="❌ Cache de respostas indisponível", fg=self.cor_erro)
+            return
+        try:
+            respostas = self.cache_respostas.estatisticas()["respostas"]
+            self.cache_respostas.limpar()
+            self.status_config.config(text=f"✅ Cache limpo ({respostas} respostas removidas)", fg=self.cor_sucesso)
+        except Exception as e:
+            self.status_config.config(text=f"❌ Erro ao limpar cache: {str(e)}", fg=self.cor_erro)
+
     def mostrar_informativo_seguranca(self):
         """Mostra informativo sobre segurança do arquivo config.json."""
         # Criar janela personalizada para o informativo
@@ -653,8 +723,7 @@ class DataViewer:
     def enviar_mensagem(self, event=None):
         """Envia mensagem para a IA."""
         if not self.ai_configured:
-            messagebox.showwarning("IA Não Configurada",
-                                 "Configure a API key do Google Gemini primeiro.")
+            messagebox.showwarning("IA Não Configurada", self._mensagem_ia_nao_configurada())
             return
 
         mensagem = self.entrada_ia.get().strip()
@@ -670,8 +739,8 @@ class DataViewer:
         # Adicionar mensagem do usuário
         self.adicionar_mensagem_chat("👤 Você", mensagem, "user")
 
-        # Mostrar que a IA está "digitando"
-        self.adicionar_mensagem_chat("🤖 IA", "🔄 Processando sua mensagem...", "bot")
+        # Mostrar que a IA está "digitando" (o aviso dá lugar ao primeiro trecho da resposta)
+        self.iniciar_resposta_ia("🔄 Processando sua mensagem...")
 
         # Processar mensagem em thread separada
         threading.Thread(target=self.processar_mensagem_ia,
@@ -679,34 +748,106 @@ class DataViewer:
 
     def processar_mensagem_ia(self, mensagem):
         """Processa a mensagem com a IA."""
-        try:
+        def montar_prompt():
             # Preparar contexto com os dados
-            contexto = self.preparar_contexto_dados()
+            contexto = self.preparar_contexto_dados(mensagem)
 
             # Adicionar a pergunta do usuário ao prompt final
-            prompt_completo = f"""{contexto}
+            return f"""{contexto}
 
 **PERGUNTA DO USUÁRIO:**
 {mensagem}
 """
 
-            # Gerar resposta
-            response = self.model.generate_content(prompt_completo)
-            resposta = response.text
-
-            # Atualizar UI na thread principal
-            self.window.after(0, lambda: self.atualizar_resposta_ia(resposta))
+        try:
+            # Gerar resposta (ou reaproveitar do cache); o contexto depende do orçamento de tokens
+            versao = f"{VERSAO_PROMPT_CHAT}/{self.construtor_contexto.orcamento_tokens}"
+            # Cada trecho recebido é anexado ao chat na thread principal
+            self._gerar_resposta(versao, mensagem, montar_prompt,
+                                 ao_receber=lambda trecho: self.window.after(0, self.anexar_trecho_ia, trecho))
+            self.window.after(0, self.concluir_resposta_ia)
 
         except Exception as e:
-            self.window.after(0, lambda: self.atualizar_resposta_ia(f"Erro ao processar mensagem: {str(e)}"))
+            self.window.after(0, self.concluir_resposta_ia, f"Erro ao processar mensagem: {str(e)}")
         finally:
             # Reabilitar interface após processamento
             self.window.after(0, lambda: self.desabilitar_chat_interface(False))
             # Garantir que o campo permaneça limpo após o processamento
             self.window.after(0, lambda: self.entrada_ia.delete(0, tk.END) if hasattr(self, 'entrada_ia') else None)
 
-    def preparar_contexto_dados(self):
-        """Prepara o contexto com TODOS os dados exportados, usando uma estrutura de prompt flexível e poderosa."""
+    def _conjuntos_contexto(self):
+        """Conjuntos de dados enviados à IA, na ordem do prompt."""
+        return {
+            "💼 CARTEIRA DE AÇÕES": self.df_carteiras_acoes,
+            "🏢 CARTEIRA DE FIIs": self.df_carteiras_fiis,
+            "📈 DADOS DE AÇÕES": self.df_acoes,
+            "🏢 DADOS DE FIIs": self.df_fiis,
+        }
+
+    def _construir_indice_recuperacao(self):
+        """Monta o índice de recuperação do chat (executado em thread separada)."""
+        try:
+            self.indice_recuperacao = IndiceRecuperacao(self._conjuntos_contexto(), carteiras=CONJUNTOS_CARTEIRA)
+        except Exception as e:
+            print(f"Erro ao montar índice de recuperação: {e}")
+        finally:
+            self._indice_pronto.set()
+
+    def _hash_dados(self):
+        """Hash de todos os conjuntos de dados (memorizado pelo motor de estatísticas)."""
+        return "|".join(f"{nome}={self.motor_estatisticas.obter(df).hash_dados}"
+                        for nome, df in self._conjuntos_contexto().items() if not df.empty)
+
+    def _gerar_resposta(self, versao_prompt, pergunta, montar_prompt, ao_receber=None):
+        """
+        Gera a resposta da IA em streaming, reaproveitando o cache em disco quando possível.
+
+        Args:
+            versao_prompt (str): Versão do modelo de prompt
+            pergunta (str): Pergunta do usuário (ou identificador da análise)
+            montar_prompt (callable): Monta o prompt completo (só chamado se não houver resposta em cache)
+            ao_receber (callable): Recebe cada trecho da resposta assim que chega (opcional)
+
+        Returns:
+            str: Texto completo da resposta.
+        """
+        usar_cache = self.cache_respostas is not None and self.config.get("ia_usar_cache", True)
+        hash_dados = None
+        if usar_cache:
+            try:
+                hash_dados = self._hash_dados()
+                resposta = self.cache_respostas.obter(self.provedor.nome, versao_prompt, hash_dados, pergunta)
+                if resposta is not None:
+                    resposta += AVISO_RESPOSTA_CACHE
+                    if ao_receber:
+                        ao_receber(resposta)
+                    return resposta
+            except Exception as e:
+                print(f"Erro ao consultar cache de respostas da IA: {e}")
+
+        trechos = []
+        for trecho in self.provedor.gerar_stream(montar_prompt()):
+            trechos.append(trecho)
+            if ao_receber:
+                ao_receber(trecho)
+        resposta = "".join(trechos)
+
+        if usar_cache and hash_dados is not None:
+            try:
+                self.cache_respostas.gravar(self.provedor.nome, versao_prompt, hash_dados, pergunta, resposta)
+            except Exception as e:
+                print(f"Erro ao gravar resposta da IA no cache: {e}")
+        return resposta
+
+    def preparar_contexto_dados(self, pergunta=""):
+        """
+        Prepara o contexto com os dados exportados, usando uma estrutura de prompt flexível e poderosa.
+
+        Para perguntas específicas (tickers, setores, colunas ou filtros citados) só as linhas e
+        colunas relevantes vão para o prompt (ver ``IndiceRecuperacao``). Perguntas amplas usam
+        todos os dados dentro do orçamento de tokens ``ia_orcamento_tokens`` (ver ``ConstrutorContexto``):
+        carteiras e tickers citados primeiro, o restante resumido.
+        """
 
         # --- ESTRUTURA DO PROMPT MELHORADA ---
 
@@ -722,83 +863,26 @@ Você tem acesso a dados financeiros fundamentalistas extraídos do site Investi
 - **Escopo:** Informações sobre ações brasileiras e composição de carteiras de investimento
 - **Propósito:** Análise para tomada de decisões de investimento informadas"""
 
-        # 3. DADOS PARA ANÁLISE (em formato CSV para otimização)
-        dados_analise = ["**DADOS DISPONÍVEIS PARA ANÁLISE:**"]
-        MAX_CHARS = 800000
-
-        # Adicionar dados de ações
-        if not self.df_acoes.empty:
-            header = f"\n**📈 DADOS DE AÇÕES ({len(self.df_acoes)} registros):**"
-            csv_acoes = self.df_acoes.to_csv(index=False)
-            dados_analise.append(header)
-            dados_analise.append(csv_acoes)
-
-        # Adicionar dados de FIIs
-        if not self.df_fiis.empty:
-            header = f"\n**🏢 DADOS DE FIIs ({len(self.df_fiis)} registros):**"
-            csv_fiis = self.df_fiis.to_csv(index=False)
-            dados_analise.append(header)
-            dados_analise.append(csv_fiis)
-
-        # Adicionar dados de carteira de ações
-        if not self.df_carteiras_acoes.empty:
-            header = f"\n**💼 DADOS DE CARTEIRA DE AÇÕES ({len(self.df_carteiras_acoes)} registros):**"
-            csv_carteiras_acoes = self.df_carteiras_acoes.to_csv(index=False)
-            dados_analise.append(header)
-            dados_analise.append(csv_carteiras_acoes)
-
-        # Adicionar dados de carteira de FIIs
-        if not self.df_carteiras_fiis.empty:
-            header = f"\n**🏢 DADOS DE CARTEIRA DE FIIs ({len(self.df_carteiras_fiis)} registros):**"
-            csv_carteiras_fiis = self.df_carteiras_fiis.to_csv(index=False)
-            dados_analise.append(header)
-            dados_analise.append(csv_carteiras_fiis)
-
-
-
-        dados_str = "\n".join(dados_analise)
-
-        # Truncar se necessário
-        if len(dados_str) > MAX_CHARS:
-            dados_str = dados_str[:MAX_CHARS] + "\n... [DADOS TRUNCADOS PARA OTIMIZAÇÃO - Análise baseada na amostra mais representativa]"
+        # 3. DADOS PARA ANÁLISE (CSV dentro do orçamento de tokens, linhas nunca cortadas)
+        frames = self._conjuntos_contexto()
+        selecao, colunas_citadas = "", ()
+        self._indice_pronto.wait()
+        if pergunta and self.indice_recuperacao is not None:
+            recuperacao = self.indice_recuperacao.recuperar(pergunta)
+            colunas_citadas = recuperacao.colunas
+            if not recuperacao.ampla:
+                frames = recuperacao.frames
+                selecao = ("\n*Somente os dados relevantes para a pergunta foram incluídos.*\n" +
+                           recuperacao.descricao() + "\n")
+        dados_str = "**DADOS DISPONÍVEIS PARA ANÁLISE:**\n" + selecao + self.construtor_contexto.construir(
+            frames, pergunta, carteiras=CONJUNTOS_CARTEIRA, colunas=colunas_citadas)
 
         # 4. RESUMO ESTATÍSTICO INTELIGENTE
+        # (os conjuntos que não couberam inteiros já trazem seu resumo estatístico na seção de dados)
         resumo_estatistico_list = ["\n**📊 RESUMO ESTATÍSTICO:**"]
-        if not self.df_acoes.empty:
-            resumo_estatistico_list.append(f"\n**Ações:** {len(self.df_acoes)} registros disponíveis")
-            # Adicionar insights sobre as colunas disponíveis
-            colunas_numericas = self.df_acoes.select_dtypes(include=['number']).columns
-            if len(colunas_numericas) > 0:
-                resumo_estatistico_list.append(f"Métricas numéricas: {', '.join(colunas_numericas.tolist())}")
-                resumo_estatistico_list.append("\nEstatísticas descritivas:")
-                resumo_estatistico_list.append(self.df_acoes.describe().to_string())
-
-        if not self.df_fiis.empty:
-            resumo_estatistico_list.append(f"\n**FIIs:** {len(self.df_fiis)} registros disponíveis")
-            # Adicionar insights sobre as colunas disponíveis
-            colunas_numericas = self.df_fiis.select_dtypes(include=['number']).columns
-            if len(colunas_numericas) > 0:
-                resumo_estatistico_list.append(f"Métricas numéricas: {', '.join(colunas_numericas.tolist())}")
-                resumo_estatistico_list.append("\nEstatísticas descritivas:")
-                resumo_estatistico_list.append(self.df_fiis.describe().to_string())
-
-        if not self.df_carteiras_acoes.empty:
-            resumo_estatistico_list.append(f"\n**Carteira de Ações:** {len(self.df_carteiras_acoes)} itens")
-            colunas_numericas = self.df_carteiras_acoes.select_dtypes(include=['number']).columns
-            if len(colunas_numericas) > 0:
-                resumo_estatistico_list.append(f"Métricas numéricas: {', '.join(colunas_numericas.tolist())}")
-                resumo_estatistico_list.append("\nEstatísticas descritivas:")
-                resumo_estatistico_list.append(self.df_carteiras_acoes.describe().to_string())
-
-        if not self.df_carteiras_fiis.empty:
-            resumo_estatistico_list.append(f"\n**Carteira de FIIs:** {len(self.df_carteiras_fiis)} itens")
-            colunas_numericas = self.df_carteiras_fiis.select_dtypes(include=['number']).columns
-            if len(colunas_numericas) > 0:
-                resumo_estatistico_list.append(f"Métricas numéricas: {', '.join(colunas_numericas.tolist())}")
-                resumo_estatistico_list.append("\nEstatísticas descritivas:")
-                resumo_estatistico_list.append(self.df_carteiras_fiis.describe().to_string())
-
-
+        for nome, df in self._conjuntos_estatisticas().items():
+            if not df.empty:
+                resumo_estatistico_list.append(f"**{nome}:** {len(df)} registros disponíveis")
 
         resumo_estatistico = "\n".join(resumo_estatistico_list)
 
@@ -838,26 +922,37 @@ Suas análises são para fins educacionais e informativos. Encoraje o usuário a
 
         return prompt_final
 
-    def atualizar_resposta_ia(self, resposta):
-        """Atualiza a resposta da IA no chat."""
-        # Remover mensagem "Digitando..."
+    def iniciar_resposta_ia(self, aviso):
+        """
+        Abre a mensagem da IA no chat com um aviso de espera.
+
+        O aviso é substituído pelo primeiro trecho da resposta; o histórico anterior do chat
+        nunca é reescrito (ver ``RenderizadorMarkdown``).
+        """
+        self.adicionar_mensagem_chat("🤖 IA", "", "bot")
         self.chat_area.config(state=tk.NORMAL)
-        content = self.chat_area.get("1.0", tk.END)
-        lines = content.split('\n')
-
-        # Procurar e remover a última linha "Digitando..."
-        for i in range(len(lines) - 1, -1, -1):
-            if "Digitando..." in lines[i]:
-                lines.pop(i)
-                break
-
-        # Recriar o conteúdo
-        self.chat_area.delete("1.0", tk.END)
-        self.chat_area.insert(tk.END, '\n'.join(lines))
+        self.renderizador.iniciar(aviso)
         self.chat_area.config(state=tk.DISABLED)
+        self.chat_area.see(tk.END)
 
-        # Adicionar resposta da IA
-        self.adicionar_mensagem_chat("🤖 IA", resposta, "bot")
+    def anexar_trecho_ia(self, trecho):
+        """Anexa um trecho da resposta em andamento (linhas completas já formatadas)."""
+        self.chat_area.config(state=tk.NORMAL)
+        self.renderizador.anexar(trecho)
+        self.chat_area.config(state=tk.DISABLED)
+        self.chat_area.see(tk.END)
+
+    def concluir_resposta_ia(self, erro=None):
+        """Fecha a resposta em andamento, renderizando a última linha (e a mensagem de erro, se houver)."""
+        self.chat_area.config(state=tk.NORMAL)
+        self.renderizador.concluir(erro)
+        self.chat_area.config(state=tk.DISABLED)
+        self.chat_area.see(tk.END)
+
+    def atualizar_resposta_ia(self, resposta):
+        """Exibe uma resposta completa da IA no lugar do aviso de espera."""
+        self.anexar_trecho_ia(resposta)
+        self.concluir_resposta_ia()
 
     def configurar_tags_formatacao(self):
         """Configura as tags de formatação para o widget de texto."""
@@ -892,95 +987,12 @@ Suas análises são para fins educacionais e informativos. Encoraje o usuário a
         self.chat_area.tag_configure("destaque",
                                    foreground=self.cor_destaque)
 
-    def renderizar_markdown(self, texto):
-        """Processa texto markdown e retorna lista de segmentos com formatação."""
-        segmentos = []
-        linhas = texto.split('\n')
-
-        for linha in linhas:
-            # Lidar com linhas vazias
-            if not linha.strip():
-                segmentos.append(("\n", "normal"))
-                continue
-
-            # Títulos (ex: ### Título)
-            match_titulo = re.match(r'^(#{1,6})\s+(.*)', linha)
-            if match_titulo:
-                conteudo = match_titulo.group(2).strip()
-                segmentos.extend(self.processar_formatacao_inline(conteudo))
-                segmentos.append(("\n", "titulo"))
-                continue
-
-            # Tabelas (linhas que começam e terminam com |)
-            if linha.strip().startswith('|') and linha.strip().endswith('|'):
-                if '---' in linha: # Ignorar a linha de separação
-                    continue
-                # Adicionar a linha da tabela com a tag de tabela
-                segmentos.append((linha.strip() + "\n", "tabela"))
-                continue
-
-            # Listas não ordenadas (ex: * item or - item)
-            match_lista_nao_ord = re.match(r'^\s*([-\*])\s+(.*)', linha)
-            if match_lista_nao_ord:
-                conteudo = match_lista_nao_ord.group(2).strip()
-                segmentos.append(("• ", "lista")) # Adiciona o marcador
-                segmentos.extend(self.processar_formatacao_inline(conteudo))
-                segmentos.append(("\n", "lista"))
-                continue
-
-            # Listas ordenadas (ex: 1. item)
-            match_lista_ord = re.match(r'^\s*(\d+\.)\s+(.*)', linha)
-            if match_lista_ord:
-                marcador = match_lista_ord.group(1)
-                conteudo = match_lista_ord.group(2).strip()
-                segmentos.append((f"{marcador} ", "lista")) # Mantém o número
-                segmentos.extend(self.processar_formatacao_inline(conteudo))
-                segmentos.append(("\n", "lista"))
-                continue
-
-            # Linha horizontal (---, ***, ___)
-            if re.match(r'^\s*([-*_]){3,}\s*$', linha):
-                segmentos.append(("\n" + "─" * 80 + "\n", "normal"))
-                continue
-
-            # Parágrafo normal
-            segmentos.extend(self.processar_formatacao_inline(linha.strip()))
-            segmentos.append(("\n", "normal"))
-
-        return segmentos
-
-    def processar_formatacao_inline(self, texto):
-        """Processa formatação inline como negrito, itálico e código."""
-        # A ordem dos padrões é crucial para que `**` seja verificado antes de `*`.
-        patterns = re.compile(r'(\*\*.*?\*\*|\*.*?\*|`.*?`)')
-        segmentos = []
-
-        # Usa re.split para quebrar o texto pelos padrões de formatação, mantendo os delimitadores
-        parts = patterns.split(texto)
-
-        for part in parts:
-            if not part:
-                continue
-
-            # Verifica se a parte corresponde a um dos padrões de formatação
-            if part.startswith('**') and part.endswith('**'):
-                segmentos.append((part[2:-2], 'negrito'))
-            elif part.startswith('*') and part.endswith('*'):
-                segmentos.append((part[1:-1], 'italico'))
-            elif part.startswith('`') and part.endswith('`'):
-                segmentos.append((part[1:-1], 'codigo'))
-            else:
-                # Se não for um padrão conhecido, é texto normal
-                segmentos.append((part, 'normal'))
-
-        return segmentos
-
     def adicionar_mensagem_chat(self, remetente, mensagem, tipo):
         """Adiciona uma mensagem ao chat com formatação Markdown aprimorada."""
         self.chat_area.config(state=tk.NORMAL)
 
-        # Adicionar espaço se não for a primeira mensagem
-        if self.chat_area.get("1.0", tk.END).strip():
+        # Adicionar espaço se não for a primeira mensagem (sem copiar o histórico inteiro do chat)
+        if self.chat_area.compare("end-1c", "!=", "1.0"):
             self.chat_area.insert(tk.END, "\n\n")
 
         # Inserir cabeçalho da mensagem
@@ -990,10 +1002,9 @@ Suas análises são para fins educacionais e informativos. Encoraje o usuário a
         # Processar e inserir a mensagem
         if tipo == "bot":
             # Limpar a resposta de caracteres indesejados que a IA pode retornar
-            mensagem_limpa = re.sub(r'```markdown|```', '', mensagem).strip()
-            segmentos = self.renderizar_markdown(mensagem_limpa)
-            for texto, tag in segmentos:
-                self.chat_area.insert(tk.END, texto, (tag,) if tag != "normal" else ())
+            mensagem_limpa = limpar_resposta(mensagem).strip()
+            if mensagem_limpa:
+                self.renderizador.inserir(mensagem_limpa)
         else: # tipo == "user"
             self.chat_area.insert(tk.END, mensagem)
 
@@ -1003,25 +1014,20 @@ Suas análises são para fins educacionais e informativos. Encoraje o usuário a
     def enviar_dados_csv(self):
         """Envia todos os dados em formato CSV para a IA."""
         if not self.ai_configured:
-            messagebox.showwarning("IA Não Configurada",
-                                 "Configure a API key do Google Gemini primeiro.")
+            messagebox.showwarning("IA Não Configurada", self._mensagem_ia_nao_configurada())
             return
 
         # Desabilitar interface durante processamento
         self.desabilitar_chat_interface(True)
 
-        # Preparar dados em formato CSV
-        dados_csv = self.preparar_dados_csv()
-
         # Adicionar mensagem do usuário
         self.adicionar_mensagem_chat("👤 Você", "Enviando TODOS os dados para análise completa", "user")
 
-        # Mostrar que a IA está "digitando"
-        self.adicionar_mensagem_chat("🤖 IA", "🔄 Processando os dados...", "bot")
+        # Mostrar que a IA está "digitando" (o aviso dá lugar ao primeiro trecho da resposta)
+        self.iniciar_resposta_ia("🔄 Processando os dados...")
 
-        # Processar dados em thread separada
-        threading.Thread(target=self.processar_dados_csv,
-                        args=(dados_csv,), daemon=True).start()
+        # Processar dados em thread separada (o CSV só é montado se a resposta não estiver em cache)
+        threading.Thread(target=self.processar_dados_csv, daemon=True).start()
 
     def preparar_dados_csv(self):
         """Prepara todos os dados em formato CSV otimizado."""
@@ -1040,20 +1046,19 @@ Suas análises são para fins educacionais e informativos. Encoraje o usuário a
 
         if not self.df_acoes.empty:
             dados_completos += f"AÇÕES: {len(self.df_acoes)} registros\n"
-            numeric_cols = self.df_acoes.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                dados_completos += self.df_acoes[numeric_cols].describe().to_csv()
-                dados_completos += "\n"
+            dados_completos += resumo_texto(self.motor_estatisticas.obter(self.df_acoes)) + "\n"
 
 
 
         return dados_completos
 
-    def processar_dados_csv(self, dados_csv):
-        """Processa os dados com a IA."""
+    def processar_dados_csv(self, dados_csv=None):
+        """Processa os dados com a IA (``dados_csv`` padrão: ``preparar_dados_csv()``)."""
         try:
             # Prompt para análise dos dados CSV aprimorado
-            prompt_csv = f"""
+            def montar_prompt():
+                csv = dados_csv if dados_csv is not None else self.preparar_dados_csv()
+                return f"""
 **PERSONA:**
 Você é um analista financeiro sênior e estrategista de investimentos, especializado no mercado brasileiro. Sua expertise inclui análise fundamentalista, gestão de portfólio, identificação de tendências e avaliação de riscos. Você fornece insights valiosos que combinam rigor técnico com perspectiva prática do mercado.
 
@@ -1062,7 +1067,7 @@ Você está analisando dados fundamentalistas extraídos do Investidor10, focand
 
 **DADOS PARA ANÁLISE:**
 ```csv
-{dados_csv}
+{csv}
 ```
 
 **MISSÃO:**
@@ -1159,15 +1164,13 @@ Explore padrões interessantes, correlações inesperadas ou insights únicos qu
 **LEMBRE-SE:** Sua análise será usada para decisões reais de investimento. Seja rigoroso com os dados, mas criativo na interpretação e apresentação dos insights.
 """
 
-            # Gerar resposta
-            response = self.model.generate_content(prompt_csv)
-            resposta = response.text
-
-            # Atualizar UI na thread principal
-            self.window.after(0, lambda: self.atualizar_resposta_ia(resposta))
+            # Gerar resposta (ou reaproveitar do cache)
+            self._gerar_resposta(VERSAO_PROMPT_CSV, "analise_csv", montar_prompt,
+                                 ao_receber=lambda trecho: self.window.after(0, self.anexar_trecho_ia, trecho))
+            self.window.after(0, self.concluir_resposta_ia)
 
         except Exception as e:
-            self.window.after(0, lambda: self.atualizar_resposta_ia(f"Erro ao processar dados CSV: {str(e)}"))
+            self.window.after(0, self.concluir_resposta_ia, f"Erro ao processar dados CSV: {str(e)}")
         finally:
             # Reabilitar interface após processamento
             self.window.after(0, lambda: self.desabilitar_chat_interface(False))
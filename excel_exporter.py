@@ -2,6 +2,14 @@ import pandas as pd
 import os
 import subprocess
 from tkinter import filedialog, messagebox
+import xlsxwriter
+from number_parsing import converter_serie, formato_coluna
+from snapshot_diff import COLUNAS_ALTERACOES
+
+# Constantes
+COLUNAS_NAO_EXPORTADAS = ("Origem",)
+LARGURAS_FORMATO = {"Moeda": 18, "Porcentagem": 12, "Número": 15, "Texto": 15}
+LINHAS_POR_PROGRESSO = 2000
 
 class ExcelExporter:
     """
@@ -17,111 +25,201 @@ class ExcelExporter:
         """
         self.config = config
 
-    def export_to_excel(self, df_acoes, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None):
-        """Exporta os dados para Excel com formatação adequada."""
-        if (df_acoes.empty and (df_fiis is None or df_fiis.empty) and
-            (df_carteiras_acoes is None or df_carteiras_acoes.empty) and
-            (df_carteiras_fiis is None or df_carteiras_fiis.empty)):
-            messagebox.showwarning("Aviso", "Não há dados para exportar")
-            return
-
-        try:
-            filepath = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-                title="Salvar dados como"
-            )
+    def export_to_excel(self, df_acoes, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None, df_alteracoes=None):
+        """
+        Exporta os dados para Excel com formatação adequada (e a aba de alterações, se houver).
 
-            if not filepath:
-                return
+        Versão síncrona (diálogo, gravação e mensagem na mesma thread). A interface
+        principal usa ``escolher_arquivo`` na thread do Tk e ``write_workbook`` em
+        segundo plano.
 
-            df_acoes_export = df_acoes.copy() if not df_acoes.empty else pd.DataFrame()
-            df_fiis_export = df_fiis.copy() if df_fiis is not None and not df_fiis.empty else pd.DataFrame()
-            df_carteiras_acoes_export = df_carteiras_acoes.copy() if df_carteiras_acoes is not None and not df_carteiras_acoes.empty else pd.DataFrame()
-            df_carteiras_fiis_export = df_carteiras_fiis.copy() if df_carteiras_fiis is not None and not df_carteiras_fiis.empty else pd.DataFrame()
+        Returns:
+            str or None: Caminho do arquivo gravado, ou None se nada foi exportado.
+        """
+        filepath = self.escolher_arquivo(df_acoes, df_fiis, df_carteiras_acoes, df_carteiras_fiis)
+        if not filepath:
+            return None
 
-            # Remover coluna "Origem" se existir
-            for df_export in [df_acoes_export, df_fiis_export, df_carteiras_acoes_export, df_carteiras_fiis_export]:
-                if not df_export.empty and "Origem" in df_export.columns:
-                    df_export.drop(columns=["Origem"], inplace=True)
+        df_fiis = df_fiis if df_fiis is not None else pd.DataFrame()
+        df_carteiras_acoes = df_carteiras_acoes if df_carteiras_acoes is not None else pd.DataFrame()
+        df_carteiras_fiis = df_carteiras_fiis if df_carteiras_fiis is not None else pd.DataFrame()
 
-            with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
-                if not df_acoes_export.empty:
-                    self._write_dataframe_to_excel_sheet(writer, df_acoes_export, 'Acoes', 'colunas_personalizadas')
+        try:
+            self.write_workbook(filepath, df_acoes, df_fiis, df_carteiras_acoes, df_carteiras_fiis, df_alteracoes)
+        except Exception as e:
+            messagebox.showerror("Erro de Exportação", f"Erro ao exportar os dados: {str(e)}")
+            return None
 
-                if not df_fiis_export.empty:
-                    self._write_dataframe_to_excel_sheet(writer, df_fiis_export, 'FIIs', 'colunas_personalizadas_fiis')
+        self._show_success_message(filepath, df_acoes, df_fiis, df_carteiras_acoes, df_carteiras_fiis)
+        return filepath
 
-                if not df_carteiras_acoes_export.empty:
-                    self._write_dataframe_to_excel_sheet(writer, df_carteiras_acoes_export, 'Carteira_Acoes')
+    def escolher_arquivo(self, df_acoes, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None):
+        """
+        Pede ao usuário o arquivo de destino (deve ser chamada na thread do Tk).
 
-                if not df_carteiras_fiis_export.empty:
-                    self._write_dataframe_to_excel_sheet(writer, df_carteiras_fiis_export, 'Carteira_FIIs')
+        Returns:
+            str or None: Caminho escolhido, ou None se não há dados ou o usuário cancelou.
+        """
+        if (df_acoes.empty and (df_fiis is None or df_fiis.empty) and
+            (df_carteiras_acoes is None or df_carteiras_acoes.empty) and
+            (df_carteiras_fiis is None or df_carteiras_fiis.empty)):
+            messagebox.showwarning("Aviso", "Não há dados para exportar")
+            return None
 
-            self._show_success_message(filepath, df_acoes_export, df_fiis_export, df_carteiras_acoes_export, df_carteiras_fiis_export)
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Salvar dados como"
+        )
+        return filepath or None
 
-        except Exception as e:
-            messagebox.showerror("Erro de Exportação", f"Erro ao exportar os dados: {str(e)}")
+    def write_workbook(self, filepath, df_acoes, df_fiis, df_carteiras_acoes, df_carteiras_fiis, df_alteracoes=None,
+                       progresso=None):
+        """
+        Grava a pasta de trabalho em modo de memória constante, sem diálogos.
 
-    def _write_dataframe_to_excel_sheet(self, writer, df, sheet_name, config_key='colunas_personalizadas'):
-        """Escreve um DataFrame em uma aba específica do Excel com formatação."""
-        if df.empty:
-            return
+        As linhas são escritas uma a uma, direto dos DataFrames tipados, sem cópias
+        e sem montar a planilha inteira em memória. Pode ser chamada fora da thread do Tk.
 
-        workbook = writer.book
-        format_text = workbook.add_format({'num_format': '@'})
-        format_number = workbook.add_format({'num_format': '#,##0.00'})
-        format_currency = workbook.add_format({'num_format': 'R$ #,##0.00'})
-        format_percentage = workbook.add_format({'num_format': '0.00%'})
+        Args:
+            filepath (str): Caminho do arquivo .xlsx
+            df_acoes, df_fiis, df_carteiras_acoes, df_carteiras_fiis (pd.DataFrame): Resultados
+            df_alteracoes (pd.DataFrame): Alterações desde a extração anterior (opcional)
+            progresso (callable): Recebe (mensagem, porcentagem) durante a gravação (opcional)
+        """
+        abas = [
+            (df_acoes, 'Acoes', 'colunas_personalizadas'),
+            (df_fiis, 'FIIs', 'colunas_personalizadas_fiis'),
+            (df_carteiras_acoes, 'Carteira_Acoes', None),
+            (df_carteiras_fiis, 'Carteira_FIIs', None),
+        ]
+        total_linhas = sum(len(df) for df, _, _ in abas if df is not None) or 1
+        concluidas = 0
+
+        workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True})
+        try:
+            formatos_celula = self._criar_formatos(workbook)
+            for df, sheet_name, config_key in abas:
+                def linhas_escritas(quantidade, sheet_name=sheet_name):
+                    nonlocal concluidas
+                    concluidas += quantidade
+                    if progresso:
+                        # Os últimos 5% ficam para o fechamento do arquivo (compactação do zip)
+                        progresso(f"Gravando aba {sheet_name}...", int(concluidas * 95 / total_linhas))
+
+                self._write_dataframe_sheet(workbook, formatos_celula, df, sheet_name, config_key, linhas_escritas)
+
+            if df_alteracoes is not None and not df_alteracoes.empty:
+                self._write_alteracoes_sheet(workbook, formatos_celula, df_alteracoes)
+            if progresso:
+                progresso("Finalizando arquivo Excel...", 95)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _criar_formatos(workbook):
+        """Cria, uma vez por pasta de trabalho, os formatos usados nas abas."""
+        return {
+            "Cabecalho": workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}),
+            "Texto": workbook.add_format({'num_format': '@'}),
+            "Número": workbook.add_format({'num_format': '#,##0.00'}),
+            "Moeda": workbook.add_format({'num_format': 'R$ #,##0.00'}),
+            "Porcentagem": workbook.add_format({'num_format': '0.00%'}),
+        }
+
+    def _resolver_colunas(self, df, colunas_config, formatos_celula):
+        """
+        Resolve uma única vez, por coluna, o formato, a largura e os valores a gravar.
 
-        coluna_configs = {col_conf["nome"]: col_conf for col_conf in self.config.get(config_key, [])}
-        df_processed = df.copy()
+        Returns:
+            list: Tuplas (título, valores, é_numérica, formato de célula, largura).
+        """
+        colunas = []
+        for col_name in df.columns:
+            if col_name in COLUNAS_NAO_EXPORTADAS:
+                continue
+            formato_excel = formato_coluna(df, col_name, colunas_config)
+            serie = df[col_name]
+
+            if formato_excel in LARGURAS_FORMATO and formato_excel != "Texto":
+                # Colunas já tipadas após a extração são usadas diretamente; textos são convertidos
+                numeric_series = converter_serie(serie)
+                if not numeric_series.isnull().all():
+                    valores = numeric_series.to_numpy(dtype='float64')
+                    if formato_excel == "Porcentagem":
+                        valores = valores / 100.0
+                    colunas.append((col_name, valores, True, formatos_celula[formato_excel], LARGURAS_FORMATO[formato_excel]))
+                    continue
 
-        for col_name in df_processed.columns:
-            col_conf = coluna_configs.get(col_name)
-            formato_excel = col_conf.get("formato_excel", "Texto") if col_conf else "Texto"
+            valores = serie.astype(object).where(serie.notna(), None).to_numpy()
+            colunas.append((col_name, valores, False, formatos_celula["Texto"], LARGURAS_FORMATO["Texto"]))
+        return colunas
 
-            if formato_excel in ["Número", "Moeda", "Porcentagem"]:
-                original_series = df_processed[col_name].copy()
-                try:
-                    current_col_as_str = df_processed[col_name].astype(str)
-                    cleaned_col = current_col_as_str.str.replace('R$', '', regex=False)
-                    cleaned_col = cleaned_col.str.replace('%', '', regex=False)
-                    cleaned_col = cleaned_col.str.strip()
-                    cleaned_col = cleaned_col.str.replace(r'(?<=\d)\.(?=\d{3}(?!\d))', '', regex=True)
-                    cleaned_col = cleaned_col.str.replace(',', '.', regex=False)
+    def _write_dataframe_sheet(self, workbook, formatos_celula, df, sheet_name, config_key=None, linhas_escritas=None):
+        """
+        Escreve um DataFrame em uma aba, linha a linha, com os formatos resolvidos por coluna.
 
-                    numeric_series = pd.to_numeric(cleaned_col, errors='coerce')
+        ``linhas_escritas(quantidade)`` é chamada a cada ``LINHAS_POR_PROGRESSO`` linhas.
+        """
+        if df is None or df.empty:
+            return
 
-                    if formato_excel == "Porcentagem":
-                        df_processed[col_name] = numeric_series / 100.0
-                    else:
-                        df_processed[col_name] = numeric_series
-
-                    if df_processed[col_name].isnull().all() and not original_series.isnull().all():
-                        df_processed[col_name] = original_series
-                except Exception:
-                    df_processed[col_name] = original_series
-
-        df_processed.to_excel(writer, sheet_name=sheet_name, index=False)
-        worksheet = writer.sheets[sheet_name]
-
-        for col_num, column_title in enumerate(df_processed.columns):
-            col_conf = coluna_configs.get(column_title)
-            formato_excel = col_conf.get("formato_excel", "Texto") if col_conf else "Texto"
-
-            is_numeric_and_valid = pd.api.types.is_numeric_dtype(df_processed[column_title]) and not df_processed[column_title].isnull().all()
-            if df[column_title].isnull().all() and formato_excel != "Texto":
-                is_numeric_and_valid = False
-
-            if formato_excel == "Moeda" and is_numeric_and_valid:
-                worksheet.set_column(col_num, col_num, 18, format_currency)
-            elif formato_excel == "Porcentagem" and is_numeric_and_valid:
-                worksheet.set_column(col_num, col_num, 12, format_percentage)
-            elif formato_excel == "Número" and is_numeric_and_valid:
-                worksheet.set_column(col_num, col_num, 15, format_number)
-            else:
-                worksheet.set_column(col_num, col_num, 15, format_text)
+        colunas_config = self.config.get(config_key, []) if config_key else []
+        colunas = self._resolver_colunas(df, colunas_config, formatos_celula)
+
+        worksheet = workbook.add_worksheet(sheet_name)
+        for col_num, (titulo, _, _, formato, largura) in enumerate(colunas):
+            worksheet.set_column(col_num, col_num, largura, formato)
+            worksheet.write_string(0, col_num, str(titulo), formatos_celula["Cabecalho"])
+
+        write_number = worksheet.write_number
+        write_string = worksheet.write_string
+        for linha in range(len(df)):
+            row = linha + 1
+            if linhas_escritas and linha and linha % LINHAS_POR_PROGRESSO == 0:
+                linhas_escritas(LINHAS_POR_PROGRESSO)
+            for col_num, (_, valores, numerica, formato, _) in enumerate(colunas):
+                valor = valores[linha]
+                if numerica:
+                    if valor == valor and abs(valor) != float('inf'):  # ignora NaN e infinitos
+                        write_number(row, col_num, valor, formato)
+                elif valor is not None:
+                    write_string(row, col_num, valor if isinstance(valor, str) else str(valor), formato)
+
+        if linhas_escritas and len(df):
+            linhas_escritas(len(df) - (len(df) - 1) // LINHAS_POR_PROGRESSO * LINHAS_POR_PROGRESSO)
+
+    def _write_alteracoes_sheet(self, workbook, formatos_celula, df_alteracoes, sheet_name='Alteracoes'):
+        """Escreve a aba com os valores alterados desde a extração anterior."""
+        formatos_valor = {formato: formatos_celula[formato] for formato in ("Número", "Moeda", "Porcentagem")}
+        format_variacao_alta = workbook.add_format({'num_format': '+0.00%;-0.00%', 'font_color': '#047857'})
+        format_variacao_baixa = workbook.add_format({'num_format': '+0.00%;-0.00%', 'font_color': '#b91c1c'})
+
+        colunas = [c for c in COLUNAS_ALTERACOES if c != "Formato"]
+        worksheet = workbook.add_worksheet(sheet_name)
+        larguras = {"Tipo": 16, "Ticker": 12, "Coluna": 28, "Valor Anterior": 18, "Valor Atual": 18,
+                    "Variação %": 12, "Anterior Em": 20}
+        for col_num, coluna in enumerate(colunas):
+            worksheet.set_column(col_num, col_num, larguras.get(coluna, 15))
+        worksheet.write_row(0, 0, colunas, formatos_celula["Cabecalho"])
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, len(df_alteracoes), len(colunas) - 1)
+
+        for linha, registro in enumerate(df_alteracoes.itertuples(index=False), start=1):
+            valores = dict(zip(df_alteracoes.columns, registro))
+            formato_valor = formatos_valor.get(valores["Formato"])
+            for col_num, coluna in enumerate(colunas):
+                valor = valores[coluna]
+                if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+                    continue
+                if coluna in ("Valor Anterior", "Valor Atual") and formato_valor is not None:
+                    fator = 100.0 if valores["Formato"] == "Porcentagem" else 1.0
+                    worksheet.write_number(linha, col_num, float(valor) / fator, formato_valor)
+                elif coluna == "Variação %":
+                    worksheet.write_number(linha, col_num, float(valor) / 100.0,
+                                           format_variacao_alta if valor >= 0 else format_variacao_baixa)
+                else:
+                    worksheet.write_string(linha, col_num, str(valor))
 
     def _show_success_message(self, filepath, df_acoes, df_fiis=None, df_carteiras_acoes=None, df_carteiras_fiis=None):
         """Exibe a mensagem de sucesso e abre a pasta do arquivo."""
@@ -0,0 +1,259 @@
+"""
+Rastreamento de tempo das extrações.
+
+Registra spans aninhados (configuração do driver, navegação, espera, colunas,
+seletores de fallback, tentativas e estratégias de carteira) e exporta o
+resultado no formato Chrome Trace (abrível em chrome://tracing ou
+https://ui.perfetto.dev), além de uma tabela-resumo com p50/p95 por fase.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Constantes
+PASTA_TRACES_PADRAO = "traces"
+PREFIXO_TRACE = "trace_"
+TRACES_MANTIDOS = 20
+FASES_DETALHADAS = ("ticker", "seletor_fallback", "estrategia_carteira", "seletor_tabela_fiis")
+
+logger = logging.getLogger(__name__)
+
+
+def percentil(valores_ordenados, p):
+    """
+    Calcula o percentil ``p`` (0-100) de uma lista já ordenada por interpolação linear.
+
+    Args:
+        valores_ordenados (list): Valores em ordem crescente
+        p (float): Percentil desejado
+
+    Returns:
+        float: Valor do percentil, ou 0.0 para lista vazia.
+    """
+    if not valores_ordenados:
+        return 0.0
+    if len(valores_ordenados) == 1:
+        return float(valores_ordenados[0])
+
+    posicao = (len(valores_ordenados) - 1) * p / 100.0
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fracao = posicao - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fracao
+
+
+def rastreado(nome, argumento=None):
+    """
+    Decorador que envolve um método de uma classe com ``self.tracer`` em um span.
+
+    Args:
+        nome (str): Nome da fase registrada no trace
+        argumento (str): Se informado, o primeiro argumento posicional do método
+            é gravado no span com este nome (ex: o seletor CSS)
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            atributos = {argumento: str(args[0])[:120]} if argumento and args else {}
+            with self.tracer.span(nome, **atributos):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorador
+
+
+def limpar_traces_antigos(pasta, manter=TRACES_MANTIDOS):
+    """Remove os traces mais antigos (o .json e o _resumo.txt), mantendo os ``manter`` mais recentes."""
+    if not os.path.isdir(pasta):
+        return
+    traces = sorted(nome[:-len(".json")] for nome in os.listdir(pasta)
+                    if nome.startswith(PREFIXO_TRACE) and nome.endswith(".json"))
+    for base in traces[:-manter] if manter > 0 else traces:
+        for caminho in (f"{base}.json", f"{base}_resumo.txt"):
+            try:
+                os.remove(os.path.join(pasta, caminho))
+            except OSError as e:
+                logger.debug(f"Erro ao remover trace antigo {caminho}: {e}")
+
+
+class Tracer:
+    """
+    Coletor de spans de tempo, seguro para uso a partir de várias threads.
+    """
+
+    def __init__(self, ativo=True):
+        """
+        Inicializa o coletor.
+
+        Args:
+            ativo (bool): Se False, os spans não são registrados
+        """
+        self.ativo = ativo
+        self._eventos = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origem = time.perf_counter()
+
+    def _pilha(self):
+        """Retorna a pilha de spans abertos da thread atual."""
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def span(self, nome, categoria="extracao", **args):
+        """
+        Registra a duração do bloco como um span.
+
+        Args:
+            nome (str): Nome da fase (ex: "navegacao", "espera")
+            categoria (str): Categoria do evento no trace
+            **args: Atributos extras (ticker, seletor, tentativa...)
+        """
+        if not self.ativo:
+            yield
+            return
+
+        pilha = self._pilha()
+        pilha.append(nome)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter()
+            pilha.pop()
+            evento = {
+                "name": nome,
+                "cat": categoria,
+                "ph": "X",
+                "ts": (inicio - self._origem) * 1e6,
+                "dur": (fim - inicio) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {**args, "profundidade": len(pilha)},
+            }
+            with self._lock:
+                self._eventos.append(evento)
+
+    def eventos(self):
+        """Retorna uma cópia dos eventos registrados."""
+        with self._lock:
+            return list(self._eventos)
+
+    def limpar(self):
+        """Descarta os eventos registrados."""
+        with self._lock:
+            self._eventos.clear()
+        self._origem = time.perf_counter()
+
+    def resumo(self):
+        """
+        Agrega as durações por fase.
+
+        Returns:
+            list: Dicionários com fase, chamadas, total, p50, p95 e máximo (em ms),
+            ordenados pelo tempo total decrescente.
+        """
+        duracoes = {}
+        for evento in self.eventos():
+            duracoes.setdefault(evento["name"], []).append(evento["dur"] / 1000.0)
+
+        linhas = []
+        for fase, valores in duracoes.items():
+            valores.sort()
+            linhas.append({
+                "fase": fase,
+                "chamadas": len(valores),
+                "total_ms": sum(valores),
+                "p50_ms": percentil(valores, 50),
+                "p95_ms": percentil(valores, 95),
+                "max_ms": valores[-1],
+            })
+
+        linhas.sort(key=lambda linha: linha["total_ms"], reverse=True)
+        return linhas
+
+    def mais_lentos(self, fases=FASES_DETALHADAS, quantidade=10):
+        """
+        Retorna os spans mais lentos das fases indicadas.
+
+        Args:
+            fases (tuple): Nomes das fases consideradas
+            quantidade (int): Número máximo de spans retornados
+
+        Returns:
+            list: Eventos ordenados pela duração decrescente.
+        """
+        eventos = [evento for evento in self.eventos() if evento["name"] in fases]
+        eventos.sort(key=lambda evento: evento["dur"], reverse=True)
+        return eventos[:quantidade]
+
+    def tabela_resumo(self):
+        """Formata o resumo por fase e os spans mais lentos como uma tabela de texto."""
+        cabecalho = f"{'Fase':<28}{'Chamadas':>10}{'Total (ms)':>14}{'p50 (ms)':>12}{'p95 (ms)':>12}{'Máx (ms)':>12}"
+        linhas = [cabecalho, "-" * len(cabecalho)]
+        for linha in self.resumo():
+            linhas.append(
+                f"{linha['fase']:<28}{linha['chamadas']:>10}{linha['total_ms']:>14.1f}"
+                f"{linha['p50_ms']:>12.1f}{linha['p95_ms']:>12.1f}{linha['max_ms']:>12.1f}"
+            )
+
+        lentos = self.mais_lentos()
+        if lentos:
+            linhas.append("")
+            linhas.append("Spans mais lentos:")
+            for evento in lentos:
+                detalhes = ", ".join(f"{chave}={valor}" for chave, valor in evento["args"].items()
+                                     if chave != "profundidade")
+                linhas.append(f"  {evento['dur'] / 1000.0:>10.1f} ms  {evento['name']}  {detalhes}")
+        return "\n".join(linhas)
+
+    def exportar_chrome_trace(self, caminho):
+        """
+        Grava os eventos no formato JSON do Chrome Trace.
+
+        Args:
+            caminho (str): Caminho do arquivo de saída
+        """
+        dados = {
+            "traceEvents": self.eventos(),
+            "displayTimeUnit": "ms",
+            "otherData": {"resumo": self.resumo()},
+        }
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+
+    def salvar_execucao(self, pasta=PASTA_TRACES_PADRAO, manter=TRACES_MANTIDOS):
+        """
+        Grava o trace e a tabela-resumo da execução atual em ``pasta``.
+
+        As execuções mais antigas são removidas, mantendo as ``manter`` mais recentes
+        (incluindo a atual).
+
+        Args:
+            pasta (str): Pasta de destino
+            manter (int): Execuções mantidas em disco
+
+        Returns:
+            str or None: Caminho do arquivo de trace, ou None se não havia eventos.
+        """
+        if not self.ativo or not self.eventos():
+            return None
+
+        os.makedirs(pasta, exist_ok=True)
+        limpar_traces_antigos(pasta, max(manter - 1, 0))
+        base = os.path.join(pasta, f"{PREFIXO_TRACE}{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        caminho_trace = f"{base}.json"
+        self.exportar_chrome_trace(caminho_trace)
+
+        tabela = self.tabela_resumo()
+        with open(f"{base}_resumo.txt", "w", encoding="utf-8") as f:
+            f.write(tabela + "\n")
+
+        logger.info(f"Trace da extração salvo em {caminho_trace}\n{tabela}")
+        return caminho_trace
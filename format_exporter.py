@@ -0,0 +1,211 @@
+"""
+Exportação dos resultados para CSV, JSON Lines, Parquet e Feather.
+
+Grava os quatro conjuntos (Acoes, FIIs, Carteira_Acoes, Carteira_FIIs) nos
+formatos escolhidos mantendo as colunas tipadas: números saem como números
+(não como "R$ 1.234,56") e o formato de exibição de cada coluna vai nos
+metadados dos arquivos Parquet e Feather. Pode ser usado sem interface:
+
+    python format_exporter.py --formatos csv parquet --saida exportacao
+    python format_exporter.py --registros registros/execucao_20250131_103000 --formatos feather
+"""
+
+import argparse
+import json
+import logging
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from history_store import CHAVE_METADADOS_FORMATOS
+from number_parsing import ATRIBUTO_FORMATOS, float64_decimal
+from record_sink import ler_registros
+from result_frames import construir_frame
+from snapshot_db import BancoSnapshots
+
+# Constantes
+FORMATOS_SUPORTADOS = ("csv", "jsonl", "parquet", "feather")
+FORMATOS_ARROW = ("parquet", "feather")
+NOMES_CONJUNTOS = {
+    "acoes": "Acoes",
+    "fiis": "FIIs",
+    "carteira_acoes": "Carteira_Acoes",
+    "carteira_fiis": "Carteira_FIIs",
+}
+COLUNAS_NAO_EXPORTADAS = ("Origem",)
+PASTA_SAIDA_PADRAO = "exportacao"
+
+logger = logging.getLogger(__name__)
+
+
+class ExportadorFormatos:
+    """
+    Exporta os resultados tipados para formatos de dados (sem diálogos).
+    """
+
+    def __init__(self, formatos=("csv", "parquet")):
+        """
+        Inicializa o exportador.
+
+        Args:
+            formatos (iterable): Formatos desejados (ver ``FORMATOS_SUPORTADOS``)
+        """
+        formatos = [f.lower().lstrip(".") for f in formatos]
+        invalidos = [f for f in formatos if f not in FORMATOS_SUPORTADOS]
+        if invalidos:
+            raise ValueError(f"Formatos não suportados: {', '.join(invalidos)}")
+        if not PYARROW_AVAILABLE and any(f in FORMATOS_ARROW for f in formatos):
+            logger.warning("pyarrow não instalado; Parquet e Feather serão ignorados")
+            formatos = [f for f in formatos if f not in FORMATOS_ARROW]
+        self.formatos = formatos
+
+    @staticmethod
+    def _preparar(df):
+        """Remove colunas que não são exportadas, sem copiar os dados."""
+        colunas = [c for c in df.columns if c not in COLUNAS_NAO_EXPORTADAS]
+        return df[colunas] if len(colunas) != len(df.columns) else df
+
+    @staticmethod
+    def _float64(df):
+        """Converte colunas float32 em float64 sem introduzir dígitos espúrios (para JSON)."""
+        colunas_float32 = [c for c in df.columns if df[c].dtype == "float32"]
+        if not colunas_float32:
+            return df
+        return df.assign(**{c: float64_decimal(df[c]) for c in colunas_float32})
+
+    @classmethod
+    def _gravar_jsonl(cls, df, caminho):
+        """
+        Grava o DataFrame em JSON Lines com a representação mais curta de cada número.
+
+        ``json.dumps`` usa ``repr`` dos floats (38.12 sai como 38.12); ausentes saem como null.
+        """
+        df = cls._float64(df).astype(object)
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            for registro in df.where(df.notna(), None).to_dict(orient="records"):
+                arquivo.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":"), default=str) + "\n")
+
+    @staticmethod
+    def _tabela_arrow(df):
+        """Converte o DataFrame em tabela Arrow com os formatos das colunas nos metadados."""
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        formatos = df.attrs.get(ATRIBUTO_FORMATOS, {})
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[CHAVE_METADADOS_FORMATOS] = json.dumps(formatos, ensure_ascii=False).encode("utf-8")
+        return tabela.replace_schema_metadata(metadados)
+
+    def exportar_conjunto(self, df, caminho_base):
+        """
+        Grava um DataFrame em todos os formatos escolhidos.
+
+        Args:
+            df (pd.DataFrame): DataFrame tipado
+            caminho_base (str): Caminho sem extensão (ex: "exportacao/Acoes")
+
+        Returns:
+            list: Arquivos gravados.
+        """
+        df = self._preparar(df)
+        arquivos = []
+        for formato in self.formatos:
+            caminho = f"{caminho_base}.{formato}"
+            if formato == "csv":
+                df.to_csv(caminho, index=False, encoding="utf-8-sig")
+            elif formato == "jsonl":
+                self._gravar_jsonl(df, caminho)
+            elif formato == "parquet":
+                pq.write_table(self._tabela_arrow(df), caminho, compression="zstd")
+            elif formato == "feather":
+                feather.write_feather(self._tabela_arrow(df), caminho, compression="zstd")
+            arquivos.append(caminho)
+        return arquivos
+
+    def exportar(self, frames, pasta=PASTA_SAIDA_PADRAO, prefixo=""):
+        """
+        Grava os conjuntos de resultados.
+
+        Args:
+            frames (dict): Tipo ("acoes", "fiis", "carteira_acoes", "carteira_fiis") -> DataFrame
+            pasta (str): Pasta de saída (criada se não existir)
+            prefixo (str): Prefixo dos arquivos (ex: "dados_" -> "dados_Acoes.csv")
+
+        Returns:
+            list: Arquivos gravados.
+        """
+        os.makedirs(pasta, exist_ok=True)
+        arquivos = []
+        for tipo, df in frames.items():
+            if df is None or df.empty:
+                continue
+            nome = NOMES_CONJUNTOS.get(tipo, tipo)
+            arquivos.extend(self.exportar_conjunto(df, os.path.join(pasta, f"{prefixo}{nome}")))
+        logger.info(f"{len(arquivos)} arquivo(s) exportado(s) em {pasta}")
+        return arquivos
+
+
+def frames_do_banco(arquivo_banco):
+    """
+    Monta os conjuntos a partir do último snapshot de cada ticker no banco SQLite.
+
+    Returns:
+        dict: Tipo de ativo -> DataFrame.
+    """
+    frames = {}
+    with BancoSnapshots(arquivo_banco) as banco:
+        for tipo in NOMES_CONJUNTOS:
+            df = banco.ultimo_snapshot(tipo)
+            coluna_ticker = "Ativo" if tipo.startswith("carteira") else "Ticker"
+            frames[tipo] = df.rename(columns={"ticker": coluna_ticker})
+    return frames
+
+
+def frames_dos_registros(pasta_execucao, config):
+    """
+    Monta os conjuntos de ações e FIIs a partir dos registros gravados em uma execução.
+
+    Returns:
+        dict: Tipo de ativo -> DataFrame.
+    """
+    return {
+        "acoes": construir_frame(ler_registros(os.path.join(pasta_execucao, "acoes.jsonl")),
+                                 config.get("colunas_personalizadas"), nome="ações"),
+        "fiis": construir_frame(ler_registros(os.path.join(pasta_execucao, "fiis.jsonl")),
+                                config.get("colunas_personalizadas_fiis"), nome="FIIs"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os resultados para CSV, JSON Lines, Parquet e Feather")
+    parser.add_argument("--formatos", nargs="+", default=["csv", "parquet"], choices=FORMATOS_SUPORTADOS)
+    parser.add_argument("--saida", default=PASTA_SAIDA_PADRAO, help="Pasta de saída")
+    parser.add_argument("--prefixo", default="", help="Prefixo dos nomes dos arquivos")
+    parser.add_argument("--banco", default="snapshots.db", help="Banco de snapshots usado como origem (padrão)")
+    parser.add_argument("--registros", help="Pasta de uma execução em registros/ usada como origem")
+    parser.add_argument("--config", default="config.json", help="Configuração com as colunas personalizadas")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.registros:
+        config = {}
+        if os.path.exists(args.config):
+            with open(args.config, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        frames = frames_dos_registros(args.registros, config)
+    else:
+        if not os.path.exists(args.banco):
+            parser.error(f"Banco de snapshots não encontrado: {args.banco}")
+        frames = frames_do_banco(args.banco)
+
+    arquivos = ExportadorFormatos(args.formatos).exportar(frames, args.saida, args.prefixo)
+    for arquivo in arquivos:
+        print(arquivo)
+
+
+if __name__ == "__main__":
+    main()
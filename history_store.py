@@ -0,0 +1,335 @@
+"""
+Histórico colunar das extrações (Parquet particionado por tipo de ativo e data).
+
+Cada execução grava um arquivo Parquet por tipo de ativo em
+``<pasta>/tipo=<tipo>/data=<AAAA-MM-DD>/``. Os esquemas de execuções diferentes
+são unificados na leitura, então colunas adicionadas ou removidas em
+``colunas_personalizadas`` não quebram o histórico: valores ausentes viram nulos.
+
+A leitura usa ``pyarrow.dataset``: as partições fora do intervalo de datas e dos
+tipos pedidos não são abertas (os arquivos são escolhidos pelos nomes das
+pastas), só as colunas pedidas são lidas e os filtros são aplicados durante a
+varredura. O esquema de cada arquivo é lido uma vez e guardado em memória.
+"""
+
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+
+from number_parsing import ATRIBUTO_FORMATOS, float64_decimal
+
+# Constantes
+PASTA_HISTORICO_PADRAO = "historico"
+COLUNA_EXTRAIDO_EM = "extraido_em"
+CHAVE_METADADOS_FORMATOS = b"formatos_colunas"
+TIPOS_ATIVO = ("acoes", "fiis", "carteira_acoes", "carteira_fiis")
+LINHAS_POR_LOTE = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+def _texto_data(valor):
+    """Normaliza uma data (date, datetime ou texto ISO) para 'AAAA-MM-DD'."""
+    if valor is None:
+        return None
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime("%Y-%m-%d")
+    return str(valor)[:10]
+
+
+def _tipo_unificado(tipos):
+    """Escolhe um tipo Arrow comum para um campo com tipos divergentes entre execuções."""
+    tipos = [t for t in tipos if not pa.types.is_null(t)]
+    if not tipos:
+        return pa.null()
+    if all(t == tipos[0] for t in tipos):
+        return tipos[0]
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in tipos):
+        return pa.float64()
+    return pa.string()
+
+
+def unificar_esquemas(esquemas):
+    """
+    Unifica os esquemas de várias execuções.
+
+    Campos novos são acrescentados ao final; campos com tipos divergentes (ex:
+    uma coluna que era texto e passou a ser numérica) são promovidos para
+    float64 quando todos são numéricos, ou para string caso contrário.
+
+    Args:
+        esquemas (list): Esquemas pyarrow dos arquivos
+
+    Returns:
+        pa.Schema: Esquema unificado, com os formatos de coluna mesclados nos metadados.
+    """
+    tipos_por_campo = {}
+    formatos = {}
+    for esquema in esquemas:
+        for campo in esquema:
+            tipos_por_campo.setdefault(campo.name, []).append(campo.type)
+        metadados = esquema.metadata or {}
+        if CHAVE_METADADOS_FORMATOS in metadados:
+            formatos.update(json.loads(metadados[CHAVE_METADADOS_FORMATOS]))
+
+    campos = [pa.field(nome, _tipo_unificado(tipos)) for nome, tipos in tipos_por_campo.items()]
+    return pa.schema(campos, metadata={CHAVE_METADADOS_FORMATOS: json.dumps(formatos, ensure_ascii=False)})
+
+
+class HistoricoColunar:
+    """
+    Conjunto de dados Parquet com o histórico de todas as extrações.
+    """
+
+    def __init__(self, pasta=PASTA_HISTORICO_PADRAO):
+        """
+        Inicializa o histórico.
+
+        Args:
+            pasta (str): Pasta raiz do conjunto de dados
+        """
+        self.pasta = pasta
+        self._esquemas = {}  # caminho -> (mtime, esquema do arquivo)
+
+    @staticmethod
+    def disponivel():
+        """Indica se o pyarrow está instalado."""
+        return PYARROW_AVAILABLE
+
+    def _tabela_arrow(self, df, extraido_em):
+        """Converte um DataFrame tipado em tabela Arrow com tipos estáveis."""
+        colunas = {}
+        campos = []
+        for coluna in df.columns:
+            serie = df[coluna]
+            if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                colunas[coluna] = pa.array(float64_decimal(serie), type=pa.float64(), from_pandas=True)
+                campos.append(pa.field(coluna, pa.float64()))
+            else:
+                colunas[coluna] = pa.array(serie.astype("string"), type=pa.string(), from_pandas=True)
+                campos.append(pa.field(coluna, pa.string()))
+
+        colunas[COLUNA_EXTRAIDO_EM] = pa.array([extraido_em] * len(df), type=pa.timestamp("us"))
+        campos.append(pa.field(COLUNA_EXTRAIDO_EM, pa.timestamp("us")))
+
+        formatos = df.attrs.get(ATRIBUTO_FORMATOS, {})
+        esquema = pa.schema(campos, metadata={CHAVE_METADADOS_FORMATOS: json.dumps(formatos, ensure_ascii=False)})
+        return pa.Table.from_arrays(list(colunas.values()), schema=esquema)
+
+    def registrar_execucao(self, frames, extraido_em=None):
+        """
+        Acrescenta os resultados de uma execução ao histórico.
+
+        Args:
+            frames (dict): Tipo de ativo (ver ``TIPOS_ATIVO``) -> DataFrame tipado
+            extraido_em (datetime): Momento da extração (padrão: agora)
+
+        Returns:
+            list: Caminhos dos arquivos gravados.
+        """
+        if not PYARROW_AVAILABLE:
+            logger.warning("pyarrow não instalado; histórico colunar desativado")
+            return []
+
+        extraido_em = (extraido_em or datetime.now()).replace(microsecond=0)
+        caminhos = []
+        for tipo, df in frames.items():
+            if df is None or df.empty:
+                continue
+
+            pasta_particao = os.path.join(self.pasta, f"tipo={tipo}", f"data={_texto_data(extraido_em)}")
+            os.makedirs(pasta_particao, exist_ok=True)
+            # Sufixo aleatório: duas execuções no mesmo segundo não se sobrescrevem
+            nome_arquivo = f"execucao_{extraido_em.strftime('%H%M%S')}_{uuid.uuid4().hex[:8]}.parquet"
+            caminho = os.path.join(pasta_particao, nome_arquivo)
+            pq.write_table(self._tabela_arrow(df, extraido_em), caminho, compression="zstd")
+            caminhos.append(caminho)
+
+        if caminhos:
+            logger.info(f"Histórico colunar atualizado: {len(caminhos)} arquivo(s) em {self.pasta}")
+        return caminhos
+
+    def _arquivos(self, tipos=None, inicio=None, fim=None):
+        """
+        Lista os arquivos das partições pedidas, sem abri-los.
+
+        Args:
+            tipos (list): Tipos de ativo (padrão: todos)
+            inicio (str): Primeira data 'AAAA-MM-DD' incluída
+            fim (str): Última data 'AAAA-MM-DD' incluída
+
+        Returns:
+            list: Caminhos dos arquivos Parquet, em ordem cronológica dentro de cada tipo.
+        """
+        if tipos is None:
+            tipos = sorted(nome[5:] for nome in os.listdir(self.pasta) if nome.startswith("tipo="))
+        arquivos = []
+        for tipo in tipos:
+            pasta_tipo = os.path.join(self.pasta, f"tipo={tipo}")
+            if not os.path.isdir(pasta_tipo):
+                continue
+            for nome_data in sorted(os.listdir(pasta_tipo)):
+                data = nome_data[5:]
+                if not nome_data.startswith("data=") or (inicio and data < inicio) or (fim and data > fim):
+                    continue
+                pasta_data = os.path.join(pasta_tipo, nome_data)
+                arquivos.extend(os.path.join(pasta_data, nome) for nome in sorted(os.listdir(pasta_data))
+                                if nome.endswith(".parquet"))
+        return arquivos
+
+    def _esquema_arquivo(self, caminho):
+        """Esquema de um arquivo, lido do rodapé só na primeira vez (ou se o arquivo mudou)."""
+        mtime = os.path.getmtime(caminho)
+        guardado = self._esquemas.get(caminho)
+        if guardado is None or guardado[0] != mtime:
+            guardado = (mtime, pq.read_schema(caminho))
+            self._esquemas[caminho] = guardado
+        return guardado[1]
+
+    def _dataset(self, tipos=None, inicio=None, fim=None):
+        """
+        Abre as partições pedidas com o esquema unificado dos seus arquivos.
+
+        Returns:
+            pyarrow.dataset.Dataset or None: Conjunto de dados, ou None se não há arquivos.
+        """
+        arquivos = self._arquivos(tipos, inicio, fim)
+        if not arquivos:
+            return None
+        particionamento = ds.partitioning(pa.schema([("tipo", pa.string()), ("data", pa.string())]), flavor="hive")
+        esquema = unificar_esquemas([self._esquema_arquivo(caminho) for caminho in arquivos])
+        for campo in particionamento.schema:
+            esquema = esquema.append(campo)
+        return ds.dataset(arquivos, format="parquet", partitioning=particionamento,
+                          partition_base_dir=self.pasta, schema=esquema)
+
+    def _dataset_tipo(self, tipo):
+        """Abre só a partição de um tipo de ativo, com o esquema unificado das suas execuções."""
+        arquivos = self._arquivos([tipo])
+        if not arquivos:
+            return None
+        esquema = unificar_esquemas([self._esquema_arquivo(caminho) for caminho in arquivos])
+        return ds.dataset(arquivos, format="parquet", schema=esquema)
+
+    def esquema(self, tipo=None):
+        """
+        Retorna o esquema unificado do histórico.
+
+        Args:
+            tipo (str): Restringe às execuções de um tipo de ativo
+
+        Returns:
+            pa.Schema or None: Esquema, ou None se o histórico está vazio.
+        """
+        if not PYARROW_AVAILABLE or not os.path.isdir(self.pasta):
+            return None
+        dataset = self._dataset_tipo(tipo) if tipo else self._dataset()
+        return dataset.schema if dataset is not None else None
+
+    def lotes(self, tipo, linhas_por_lote=LINHAS_POR_LOTE):
+        """
+        Percorre o histórico de um tipo de ativo em lotes, em ordem cronológica.
+
+        Só um lote fica em memória por vez.
+
+        Args:
+            tipo (str): Tipo de ativo
+            linhas_por_lote (int): Linhas máximas por lote
+
+        Yields:
+            pd.DataFrame: Linhas do lote, com os formatos das colunas em ``attrs``.
+        """
+        if not PYARROW_AVAILABLE:
+            return
+        dataset = self._dataset_tipo(tipo)
+        if dataset is None:
+            return
+
+        metadados = dataset.schema.metadata or {}
+        formatos = json.loads(metadados[CHAVE_METADADOS_FORMATOS]) if CHAVE_METADADOS_FORMATOS in metadados else {}
+        for lote in dataset.to_batches(batch_size=linhas_por_lote):
+            df = lote.to_pandas()
+            df.attrs[ATRIBUTO_FORMATOS] = formatos
+            yield df
+
+    def datas(self, tipo=None):
+        """
+        Lista as datas com extrações gravadas.
+
+        Args:
+            tipo (str): Restringe a um tipo de ativo
+
+        Returns:
+            list: Datas 'AAAA-MM-DD' em ordem crescente.
+        """
+        if not os.path.isdir(self.pasta):
+            return []
+        tipos = [tipo] if tipo else [nome[5:] for nome in os.listdir(self.pasta) if nome.startswith("tipo=")]
+        datas = set()
+        for tipo_atual in tipos:
+            pasta_tipo = os.path.join(self.pasta, f"tipo={tipo_atual}")
+            if os.path.isdir(pasta_tipo):
+                datas.update(nome[5:] for nome in os.listdir(pasta_tipo) if nome.startswith("data="))
+        return sorted(datas)
+
+    def ler(self, inicio=None, fim=None, tipos=None, colunas=None, tickers=None, filtro=None):
+        """
+        Lê um intervalo do histórico.
+
+        Args:
+            inicio (date or str): Primeira data incluída (padrão: sem limite)
+            fim (date or str): Última data incluída (padrão: sem limite)
+            tipos (list): Tipos de ativo a ler (padrão: todos)
+            colunas (list): Colunas a carregar (padrão: todas); "tipo" e "data" também podem ser pedidas
+            tickers (list): Restringe aos tickers informados (coluna "Ticker" ou "Ativo")
+            filtro (pyarrow.dataset.Expression): Filtro adicional, aplicado na varredura
+
+        Returns:
+            pd.DataFrame: Linhas selecionadas, com os formatos das colunas em ``attrs``.
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow não está instalado")
+        if not os.path.isdir(self.pasta):
+            return pd.DataFrame(columns=colunas or [])
+
+        # Datas e tipos escolhem os arquivos: as demais partições nem são abertas
+        dataset = self._dataset(list(tipos) if tipos else None, _texto_data(inicio), _texto_data(fim))
+        if dataset is None:
+            return pd.DataFrame(columns=colunas or [])
+        nomes = set(dataset.schema.names)
+
+        condicoes = []
+        if tickers:
+            # Ações/FIIs usam "Ticker" e as carteiras "Ativo": com tipos misturados, vale qualquer das duas
+            por_coluna = [ds.field(coluna).isin(list(tickers)) for coluna in ("Ticker", "Ativo") if coluna in nomes]
+            if por_coluna:
+                condicoes.append(por_coluna[0] | por_coluna[1] if len(por_coluna) == 2 else por_coluna[0])
+        if filtro is not None:
+            condicoes.append(filtro)
+
+        expressao = None
+        for condicao in condicoes:
+            expressao = condicao if expressao is None else expressao & condicao
+
+        colunas_lidas = [c for c in colunas if c in nomes] if colunas else None
+        tabela = dataset.to_table(columns=colunas_lidas, filter=expressao)
+        df = tabela.to_pandas()
+
+        metadados = dataset.schema.metadata or {}
+        if CHAVE_METADADOS_FORMATOS in metadados:
+            formatos = json.loads(metadados[CHAVE_METADADOS_FORMATOS])
+            df.attrs[ATRIBUTO_FORMATOS] = {c: f for c, f in formatos.items() if c in df.columns}
+        return df
@@ -0,0 +1,223 @@
+"""
+Planilha Excel de histórico que cresce a cada extração.
+
+Cada execução acrescenta suas linhas, com a data da extração na primeira
+coluna, às abas ``Hist_Acoes``, ``Hist_FIIs``, ``Hist_Carteira_Acoes`` e
+``Hist_Carteira_FIIs`` de uma única pasta de trabalho. As linhas existentes não
+passam pelo pandas: a pasta é aberta com openpyxl, só as linhas novas são
+escritas (com os formatos de número de cada coluna) e o arquivo é substituído
+de forma atômica.
+
+Quando acrescentar não é possível (arquivo corrompido ou com abas em outro
+layout), a planilha é regenerada a partir do histórico colunar (Parquet), lote
+a lote, com xlsxwriter em modo de memória constante.
+"""
+
+import logging
+import os
+import zipfile
+from datetime import datetime
+
+import xlsxwriter
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+from openpyxl.utils.exceptions import InvalidFileException
+
+from format_exporter import NOMES_CONJUNTOS
+from history_store import COLUNA_EXTRAIDO_EM
+from number_parsing import ATRIBUTO_FORMATOS, FORMATOS_NUMERICOS, float64_decimal
+
+# Constantes
+COLUNA_DATA = "Data da Extração"
+PREFIXO_ABA = "Hist_"
+COLUNAS_IGNORADAS = ("Origem", COLUNA_EXTRAIDO_EM, "tipo", "data")
+FORMATOS_EXCEL = {"Número": "#,##0.00", "Moeda": "R$ #,##0.00", "Porcentagem": "0.00%"}
+FORMATO_DATA = "dd/mm/yyyy hh:mm"
+LARGURA_COLUNA = 15
+
+logger = logging.getLogger(__name__)
+
+
+class LayoutIncompativel(Exception):
+    """A planilha existente não tem o layout esperado e não pode receber linhas novas."""
+
+
+def _colunas_exportadas(colunas):
+    return [c for c in colunas if c not in COLUNAS_IGNORADAS]
+
+
+def _valores_colunas(df, colunas, formatos):
+    """
+    Prepara, por coluna, os valores a gravar (porcentagens divididas por 100, nulos como None).
+
+    Returns:
+        list: Listas de valores, uma por coluna.
+    """
+    valores = []
+    for coluna in colunas:
+        if coluna not in df.columns:
+            valores.append([None] * len(df))
+            continue
+        serie = df[coluna]
+        formato = formatos.get(coluna)
+        if formato in FORMATOS_NUMERICOS and serie.dtype.kind == "f":
+            numeros = float64_decimal(serie)
+            if formato == "Porcentagem":
+                numeros = numeros / 100.0
+            valores.append([None if v != v else float(v) for v in numeros.to_numpy()])
+        else:
+            valores.append(serie.astype(object).where(serie.notna(), None).tolist())
+    return valores
+
+
+class PlanilhaHistorico:
+    """
+    Pasta de trabalho Excel com o histórico de todas as extrações.
+    """
+
+    def __init__(self, caminho, historico=None):
+        """
+        Inicializa a planilha de histórico.
+
+        Args:
+            caminho (str): Arquivo .xlsx da planilha
+            historico (HistoricoColunar): Histórico usado para regenerar a planilha (opcional)
+        """
+        self.caminho = caminho
+        self.historico = historico
+
+    @staticmethod
+    def _nome_aba(tipo):
+        return f"{PREFIXO_ABA}{NOMES_CONJUNTOS.get(tipo, tipo)}"[:31]
+
+    def acrescentar(self, frames, extraido_em=None):
+        """
+        Acrescenta os resultados de uma execução à planilha.
+
+        Args:
+            frames (dict): Tipo de ativo -> DataFrame tipado
+            extraido_em (datetime): Momento da extração (padrão: agora)
+
+        Returns:
+            str: "acrescentada", "criada" ou "regenerada".
+        """
+        extraido_em = (extraido_em or datetime.now()).replace(microsecond=0)
+        if not os.path.exists(self.caminho):
+            self.regenerar(frames, extraido_em)
+            return "criada"
+
+        try:
+            self._acrescentar_openpyxl(frames, extraido_em)
+            return "acrescentada"
+        except (InvalidFileException, zipfile.BadZipFile, KeyError, LayoutIncompativel) as e:
+            logger.warning(f"Não foi possível acrescentar à planilha {self.caminho} ({e}); regenerando")
+            self.regenerar(frames, extraido_em)
+            return "regenerada"
+
+    def _acrescentar_openpyxl(self, frames, extraido_em):
+        """Abre a planilha existente e grava apenas as linhas da execução atual."""
+        workbook = load_workbook(self.caminho)
+        for tipo, df in frames.items():
+            if df is None or df.empty:
+                continue
+
+            nome_aba = self._nome_aba(tipo)
+            if nome_aba in workbook.sheetnames:
+                worksheet = workbook[nome_aba]
+                cabecalho = [celula.value for celula in worksheet[1]]
+                if not cabecalho or cabecalho[0] != COLUNA_DATA:
+                    raise LayoutIncompativel(f"aba {nome_aba} sem a coluna '{COLUNA_DATA}'")
+            else:
+                worksheet = workbook.create_sheet(nome_aba)
+                cabecalho = [COLUNA_DATA]
+                worksheet.append(cabecalho)
+                worksheet.freeze_panes = "A2"
+                worksheet.column_dimensions["A"].width = 18
+
+            # Colunas novas (ex: coluna personalizada adicionada) entram no fim do cabeçalho
+            for coluna in _colunas_exportadas(df.columns):
+                if coluna not in cabecalho:
+                    cabecalho.append(coluna)
+                    celula = worksheet.cell(row=1, column=len(cabecalho), value=coluna)
+                    celula.font = Font(bold=True)
+
+            colunas = cabecalho[1:]
+            formatos = df.attrs.get(ATRIBUTO_FORMATOS, {})
+            valores = _valores_colunas(df, colunas, formatos)
+            formatos_coluna = [FORMATOS_EXCEL.get(formatos.get(coluna)) for coluna in colunas]
+
+            primeira_linha = worksheet.max_row + 1
+            for linha, registro in enumerate(zip(*valores), start=primeira_linha):
+                worksheet.cell(row=linha, column=1, value=extraido_em).number_format = FORMATO_DATA
+                for col_num, (valor, formato) in enumerate(zip(registro, formatos_coluna), start=2):
+                    if valor is None:
+                        continue
+                    celula = worksheet.cell(row=linha, column=col_num, value=valor)
+                    if formato:
+                        celula.number_format = formato
+
+        temporario = f"{self.caminho}.tmp"
+        workbook.save(temporario)
+        os.replace(temporario, self.caminho)
+        logger.info(f"Planilha de histórico atualizada: {self.caminho}")
+
+    def regenerar(self, frames=None, extraido_em=None):
+        """
+        Regrava a planilha inteira a partir do histórico colunar, em modo de memória constante.
+
+        Tipos de ativo sem histórico gravado usam os DataFrames da execução atual.
+
+        Args:
+            frames (dict): Tipo de ativo -> DataFrame da execução atual (opcional)
+            extraido_em (datetime): Momento da execução atual
+        """
+        frames = frames or {}
+        extraido_em = (extraido_em or datetime.now()).replace(microsecond=0)
+        temporario = f"{self.caminho}.tmp"
+        workbook = xlsxwriter.Workbook(temporario, {'constant_memory': True})
+        try:
+            formato_cabecalho = workbook.add_format({'bold': True})
+            formato_data = workbook.add_format({'num_format': FORMATO_DATA})
+            formatos_celula = {nome: workbook.add_format({'num_format': f}) for nome, f in FORMATOS_EXCEL.items()}
+
+            for tipo in NOMES_CONJUNTOS:
+                esquema = self.historico.esquema(tipo) if self.historico is not None else None
+                if esquema is not None:
+                    colunas = _colunas_exportadas(esquema.names)
+                    lotes = self.historico.lotes(tipo)
+                elif frames.get(tipo) is not None and not frames[tipo].empty:
+                    df = frames[tipo].assign(**{COLUNA_EXTRAIDO_EM: extraido_em})
+                    colunas = _colunas_exportadas(df.columns)
+                    lotes = [df]
+                else:
+                    continue
+
+                worksheet = workbook.add_worksheet(self._nome_aba(tipo))
+                worksheet.freeze_panes(1, 0)
+                worksheet.set_column(0, 0, 18)
+                worksheet.set_column(1, len(colunas), LARGURA_COLUNA)
+                worksheet.write_row(0, 0, [COLUNA_DATA] + colunas, formato_cabecalho)
+
+                linha = 1
+                for lote in lotes:
+                    formatos = lote.attrs.get(ATRIBUTO_FORMATOS, {})
+                    valores = _valores_colunas(lote, colunas, formatos)
+                    formatos_coluna = [formatos_celula.get(formatos.get(coluna)) for coluna in colunas]
+                    datas = lote[COLUNA_EXTRAIDO_EM].tolist()
+                    for data, registro in zip(datas, zip(*valores)):
+                        worksheet.write_datetime(linha, 0, data, formato_data)
+                        for col_num, (valor, formato) in enumerate(zip(registro, formatos_coluna), start=1):
+                            if valor is None:
+                                continue
+                            if isinstance(valor, float):
+                                worksheet.write_number(linha, col_num, valor, formato)
+                            else:
+                                worksheet.write_string(linha, col_num, str(valor))
+                        linha += 1
+        finally:
+            workbook.close()
+
+        if os.path.exists(self.caminho):
+            os.replace(self.caminho, f"{self.caminho}.bak")
+        os.replace(temporario, self.caminho)
+        logger.info(f"Planilha de histórico regenerada: {self.caminho}")
@@ -0,0 +1,391 @@
+"""
+Sessão HTTP autenticada do Investidor10.
+
+Reaproveita os cookies do login feito no navegador (Selenium) em uma sessão
+``requests`` com pool de conexões, permitindo buscar páginas autenticadas
+sem abrir o Chrome. O navegador só precisa ser aberto novamente quando a
+sessão salva expira.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+    requests = None
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    import cssselect  # noqa: F401 - necessário para lxml.html.cssselect
+    CSSSELECT_AVAILABLE = True
+except ImportError:
+    CSSSELECT_AVAILABLE = False
+
+# Constantes
+BASE_URL = "https://investidor10.com.br"
+ARQUIVO_SESSAO = "sessao_investidor10.json"
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 10
+HTTP_MAX_RETRIES = 2
+# Os seletores copiados do DevTools trazem o <tbody> que o navegador insere e o libxml2 não
+PADRAO_TBODY = re.compile(r"\s*>\s*tbody(?::nth-child\(1\))?(?=\s*>)")
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+logger = logging.getLogger(__name__)
+
+
+class SessaoExpirada(Exception):
+    """O site redirecionou para o login: os cookies salvos não valem mais."""
+
+
+def _redirecionou_login(resposta):
+    """Indica se a resposta veio da página de login (sessão expirada)."""
+    return "login" in resposta.url.lower()
+
+
+def extrair_tabela_html(tabela):
+    """
+    Converte um elemento <table> do lxml em uma lista de dicionários.
+
+    Segue as mesmas regras de ``DataExtractor._extrair_dados_tabela_selenium``:
+    cabeçalhos de ``thead th`` (ou da primeira linha) e colunas sem cabeçalho
+    nomeadas como "Coluna N".
+
+    Args:
+        tabela: Elemento lxml da tabela
+
+    Returns:
+        list: Lista de dicionários, um por linha da tabela.
+    """
+    headers_text = [h.text_content().strip() for h in tabela.xpath("./thead//th")]
+    headers_text = [h for h in headers_text if h]
+
+    if not headers_text:
+        primeira_linha = tabela.xpath(".//tr[1]")
+        if primeira_linha:
+            celulas = primeira_linha[0].xpath("./th") or primeira_linha[0].xpath("./td")
+            headers_text = [c.text_content().strip() for c in celulas if c.text_content().strip()]
+
+    rows = tabela.xpath("./tbody/tr")
+    if not rows:
+        rows = tabela.xpath(".//tr")
+        if headers_text:
+            rows = rows[1:]
+
+    result = []
+    for row in rows:
+        cells = row.xpath("./td")
+        if not cells:
+            continue
+
+        row_data = {}
+        for i, cell in enumerate(cells):
+            key = headers_text[i] if headers_text and i < len(headers_text) else f"Coluna {i+1}"
+            row_data[key] = cell.text_content().strip()
+        result.append(row_data)
+
+    return result
+
+
+class SessaoHttp:
+    """
+    Sessão HTTP com pool de conexões que reutiliza os cookies do login feito no Chrome.
+    """
+
+    def __init__(self, base_url=BASE_URL, arquivo_sessao=ARQUIVO_SESSAO):
+        """
+        Inicializa a sessão HTTP.
+
+        Args:
+            base_url (str): URL base do site
+            arquivo_sessao (str): Arquivo JSON onde os cookies são persistidos
+        """
+        self.base_url = base_url.rstrip("/")
+        self.arquivo_sessao = arquivo_sessao
+        self.session = None
+        self._html_carteiras = None
+        self.contagem_colunas = {}  # nome -> [páginas, páginas com valor]
+
+        if REQUESTS_AVAILABLE:
+            self.session = self._criar_sessao()
+
+    @staticmethod
+    def disponivel():
+        """Indica se as dependências da sessão HTTP estão instaladas (sem cssselect as colunas avançadas ficariam N/A)."""
+        return REQUESTS_AVAILABLE and LXML_AVAILABLE and CSSSELECT_AVAILABLE
+
+    def _criar_sessao(self):
+        """Cria a sessão requests com pool de conexões e retentativas."""
+        session = requests.Session()
+        retry = Retry(total=HTTP_MAX_RETRIES, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET"]))
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+        })
+        return session
+
+    def importar_cookies_driver(self, driver):
+        """
+        Copia os cookies do WebDriver logado para a sessão HTTP.
+
+        Args:
+            driver: Instância do WebDriver já autenticada
+
+        Returns:
+            int: Quantidade de cookies importados.
+        """
+        if not self.session:
+            return 0
+
+        cookies = driver.get_cookies()
+        self.session.cookies.clear()
+        for cookie in cookies:
+            self._adicionar_cookie(cookie)
+        self._html_carteiras = None
+        logger.info(f"{len(cookies)} cookies importados do navegador para a sessão HTTP")
+        return len(cookies)
+
+    def _adicionar_cookie(self, cookie):
+        """Adiciona um cookie no formato do Selenium ao cookie jar da sessão."""
+        if cookie.get("expiry") and cookie["expiry"] < time.time():
+            return
+        self.session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+            expires=cookie.get("expiry"),
+        )
+
+    def salvar(self):
+        """Persiste os cookies da sessão no arquivo de sessão."""
+        if not self.session:
+            return False
+
+        cookies = [
+            {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path,
+                "secure": c.secure,
+                "expiry": c.expires,
+            }
+            for c in self.session.cookies
+        ]
+        try:
+            with open(self.arquivo_sessao, "w", encoding="utf-8") as f:
+                json.dump({"salvo_em": time.time(), "cookies": cookies}, f, indent=4)
+            return True
+        except OSError as e:
+            logger.warning(f"Erro ao salvar sessão HTTP: {e}")
+            return False
+
+    def carregar(self):
+        """
+        Carrega os cookies salvos no arquivo de sessão.
+
+        Returns:
+            bool: True se algum cookie válido foi carregado.
+        """
+        if not self.session or not os.path.exists(self.arquivo_sessao):
+            return False
+
+        try:
+            with open(self.arquivo_sessao, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Erro ao carregar sessão HTTP: {e}")
+            return False
+
+        self.session.cookies.clear()
+        for cookie in dados.get("cookies", []):
+            self._adicionar_cookie(cookie)
+        self._html_carteiras = None
+        return len(self.session.cookies) > 0
+
+    def limpar(self):
+        """Descarta a sessão salva (usado quando o login expira)."""
+        if self.session:
+            self.session.cookies.clear()
+        self._html_carteiras = None
+        try:
+            if os.path.exists(self.arquivo_sessao):
+                os.remove(self.arquivo_sessao)
+        except OSError as e:
+            logger.debug(f"Erro ao remover arquivo de sessão: {e}")
+
+    def obter_html(self, caminho):
+        """
+        Busca uma página do site.
+
+        Args:
+            caminho (str): Caminho relativo (ex: "/acoes/ITUB4/") ou URL completa
+
+        Returns:
+            requests.Response: Resposta HTTP.
+        """
+        url = caminho if caminho.startswith("http") else f"{self.base_url}{caminho}"
+        return self.session.get(url, timeout=HTTP_TIMEOUT)
+
+    def sessao_valida(self):
+        """
+        Verifica se os cookies ainda dão acesso à página de carteiras.
+
+        Considera a sessão expirada quando o site redireciona para o login
+        ou quando a página não contém a área de carteiras.
+
+        Returns:
+            bool: True se a sessão está autenticada.
+        """
+        if not self.session or not len(self.session.cookies):
+            return False
+
+        try:
+            resposta = self.obter_html("/carteiras/resumo/")
+        except requests.RequestException as e:
+            logger.warning(f"Erro ao validar sessão HTTP: {e}")
+            return False
+
+        if resposta.status_code != 200 or _redirecionou_login(resposta):
+            return False
+
+        html = resposta.text
+        if "Ticker-tickers" not in html and "section-actives" not in html:
+            return False
+
+        # Guardar o HTML para evitar uma segunda requisição na extração de carteiras
+        self._html_carteiras = html
+        return True
+
+    def extrair_carteiras(self):
+        """
+        Extrai as tabelas de carteira de ações e de FIIs via HTTP.
+
+        Returns:
+            tuple: (dados_carteiras_acoes, dados_carteiras_fiis)
+        """
+        html = self._html_carteiras
+        if html is None:
+            resposta = self.obter_html("/carteiras/resumo/")
+            resposta.raise_for_status()
+            html = resposta.text
+        self._html_carteiras = None
+
+        documento = lxml.html.fromstring(html)
+        tabelas_acoes = documento.xpath("//table[@id='Ticker-tickers']")
+        tabelas_fiis = documento.xpath("//table[@id='Fii-tickers']")
+
+        dados_acoes = extrair_tabela_html(tabelas_acoes[0]) if tabelas_acoes else []
+        dados_fiis = extrair_tabela_html(tabelas_fiis[0]) if tabelas_fiis else []
+        return dados_acoes, dados_fiis
+
+    def extrair_colunas(self, caminho, colunas_personalizadas, resultado):
+        """
+        Extrai colunas personalizadas de uma página de ativo usando lxml.
+
+        Equivalente HTTP de ``DataExtractor.extrair_colunas_personalizadas_otimizado``.
+
+        Args:
+            caminho (str): Caminho da página do ativo
+            colunas_personalizadas (list): Configuração das colunas
+            resultado (dict): Dicionário que recebe os valores extraídos
+
+        Returns:
+            dict: O próprio dicionário ``resultado``.
+
+        Raises:
+            SessaoExpirada: Se o site redirecionou para o login.
+        """
+        resposta = self.obter_html(caminho)
+        # Com a sessão expirada o site responde 200 com a página de login, não a do ativo
+        if _redirecionou_login(resposta):
+            raise SessaoExpirada(f"Redirecionado para o login ao acessar {caminho}")
+        if resposta.status_code != 200:
+            raise requests.HTTPError(f"HTTP {resposta.status_code} ao acessar {caminho}", response=resposta)
+
+        documento = lxml.html.fromstring(resposta.text)
+
+        for coluna in colunas_personalizadas:
+            valor = "N/A"
+            try:
+                if coluna["tipo"] == "simples":
+                    valor = self._extrair_coluna_simples(documento, coluna)
+                elif coluna.get("seletor_css") and CSSSELECT_AVAILABLE:
+                    valor = self._extrair_coluna_css(documento, coluna["seletor_css"])
+            except Exception as e:
+                logger.debug(f"Erro ao extrair coluna {coluna['nome']} via HTTP: {e}")
+            resultado[coluna["nome"]] = valor
+
+            contagem = self.contagem_colunas.setdefault(coluna["nome"], [0, 0])
+            contagem[0] += 1
+            if valor != "N/A":
+                contagem[1] += 1
+
+        return resultado
+
+    @staticmethod
+    def _extrair_coluna_css(documento, seletor):
+        """Extrai uma coluna por seletor CSS, tentando de novo sem o passo ``tbody`` se nada casar."""
+        elementos = documento.cssselect(seletor)
+        if not elementos:
+            sem_tbody = PADRAO_TBODY.sub("", seletor)
+            if sem_tbody != seletor:
+                elementos = documento.cssselect(sem_tbody)
+        if elementos:
+            return elementos[0].text_content().strip() or "N/A"
+        return "N/A"
+
+    def colunas_sem_valor(self):
+        """
+        Colunas que ficaram "N/A" em todas as páginas lidas desde ``reiniciar_contagem``.
+
+        Normalmente indicam um seletor que funciona no navegador mas não no HTML baixado.
+
+        Returns:
+            list: Nomes das colunas.
+        """
+        return [nome for nome, (paginas, com_valor) in self.contagem_colunas.items() if paginas and not com_valor]
+
+    def reiniciar_contagem(self):
+        """Zera a contagem de valores encontrados por coluna."""
+        self.contagem_colunas = {}
+
+    def _extrair_coluna_simples(self, documento, coluna):
+        """Extrai uma coluna do tipo simples (classe de busca + classe de retorno)."""
+        if not coluna.get("classe_busca") or not coluna.get("classe_retorno"):
+            return "N/A"
+
+        xpath_classe = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+        for elem in documento.xpath(f"//*[{xpath_classe.format(coluna['classe_busca'])}]"):
+            retornos = elem.xpath(f".//*[{xpath_classe.format(coluna['classe_retorno'])}]")
+            if retornos:
+                texto = retornos[0].text_content().strip()
+                if texto:
+                    return texto
+        return "N/A"
+
+    def fechar(self):
+        """Fecha o pool de conexões."""
+        if self.session:
+            self.session.close()
@@ -6,9 +6,19 @@ import os
 from tkinter import font as tkfont
 import threading
 import time
+from datetime import datetime
 from data_extractor import DataExtractor
 from excel_exporter import ExcelExporter
 from data_viewer import DataViewer
+from progress_events import BarramentoProgresso, coalescer, INTERVALO_QUADRO_MS
+from result_frames import construir_frame
+from history_store import HistoricoColunar
+from snapshot_db import BancoSnapshots
+from snapshot_diff import alteracoes_desde_ultimo
+from record_sink import SinkRegistros
+from format_exporter import ExportadorFormatos
+from history_workbook import PlanilhaHistorico
+from lazy_tabs import AbasSobDemanda
 
 
 class ToolTip:
@@ -94,6 +104,11 @@ class InvestidorApp:
         self.cancelar_extracao = threading.Event()
         self.extracao_em_andamento = False
 
+        # Barramento de eventos de progresso, drenado pela interface em taxa fixa de quadros
+        self.barramento = BarramentoProgresso()
+        self.fila_progresso = self.barramento.criar_fila()
+        self._estilo_barra_atual = None
+
         # Carregar configurações
         self.config_file = "config.json"
         self.config = self.carregar_config()
@@ -106,11 +121,15 @@ class InvestidorApp:
         self.df_fiis = pd.DataFrame()
         self.df_carteiras_acoes = pd.DataFrame()
         self.df_carteiras_fiis = pd.DataFrame()
+        self.df_alteracoes = pd.DataFrame()
 
         # Criar interface
         self.criar_interface()
         self.configurar_atalhos()
 
+        # Iniciar a entrega dos eventos de progresso para a interface
+        self.root.after(INTERVALO_QUADRO_MS, self._drenar_eventos_progresso)
+
     def centralizar_janela(self):
         """Centraliza a janela na tela."""
         try:
@@ -335,6 +354,23 @@ class InvestidorApp:
             "colunas_personalizadas": [],
             "colunas_personalizadas_fiis": [],
             "headless": False,
+            "usar_sessao_http": False,
+            "gerar_trace": True,
+            "pasta_traces": "traces",
+            "salvar_historico": True,
+            "pasta_historico": "historico",
+            "salvar_snapshots": True,
+            "arquivo_snapshots": "snapshots.db",
+            "gravar_registros": True,
+            "pasta_registros": "registros",
+            "formatos_exportacao": [],
+            "planilha_historico": "",
+            "ia_provedor": "gemini",
+            "ia_url_local": "http://127.0.0.1:8766",
+            "ia_orcamento_tokens": 30000,
+            "ia_usar_cache": True,
+            "ia_cache_mb": 50,
+            "arquivo_cache_ia": "ia_cache.db",
             "tema": "escuro",
             "mostrar_mensagem_inicial": True
         }
@@ -414,17 +450,19 @@ class InvestidorApp:
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
 
+        # Abas construídas na primeira seleção (listas e editores de colunas são pesados)
+        self.abas = AbasSobDemanda(self.notebook, ao_construir=self._ao_construir_aba)
+
         # Aba de Ações
         self.tab_acoes = tk.Frame(self.notebook, bg=self.cor_fundo_secundario)
-        self.notebook.add(self.tab_acoes, text="📈 Ações")
+        self.abas.adicionar(self.tab_acoes, lambda frame: self.configurar_tab_acoes(), text="📈 Ações")
 
         # Aba de FIIs
         self.tab_fiis = tk.Frame(self.notebook, bg=self.cor_fundo_secundario)
-        self.notebook.add(self.tab_fiis, text="🏢 FIIs")
+        self.abas.adicionar(self.tab_fiis, lambda frame: self.configurar_tab_fiis(), text="🏢 FIIs")
 
-        # Configurar interfaces das abas (SEM as opções compartilhadas)
-        self.configurar_tab_acoes()
-        self.configurar_tab_fiis()
+        # Configurar apenas a aba visível (SEM as opções compartilhadas)
+        self.abas.construir_selecionada()
 
         # Criar área compartilhada na parte inferior (ÚNICA)
         self._criar_area_compartilhada_inferior(main_frame)
@@ -432,6 +470,11 @@ class InvestidorApp:
         # Adicionar menu de ajuda
         self.criar_menu_ajuda()
 
+    def _ao_construir_aba(self, frame):
+        """Aba construída durante uma extração nasce desabilitada, como o resto da interface."""
+        if self.extracao_em_andamento:
+            self._toggle_widgets_recursively(frame, False)
+
     def criar_menu_ajuda(self):
         """Cria o menu de ajuda com informações sobre atalhos e uso."""
         menubar = tk.Menu(self.root)
@@ -1383,6 +1426,20 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
         chk_headless.pack(anchor=tk.W, pady=(0, 5))
         ToolTip(chk_headless, "Executa o navegador em modo headless (sem interface gráfica)")
 
+        self.var_sessao_http = tk.BooleanVar(value=self.config.get("usar_sessao_http", False))
+        chk_sessao_http = tk.Checkbutton(frame_opcoes_config,
+                                        text="⚡  Reutilizar sessão de login (HTTP)",
+                                        variable=self.var_sessao_http,
+                                        bg=self.cor_fundo_secundario,
+                                        fg=self.cor_texto,
+                                        selectcolor=self.cor_entrada,
+                                        activebackground=self.cor_fundo_secundario,
+                                        activeforeground=self.cor_texto,
+                                        font=self.default_font,
+                                        cursor="hand2")
+        chk_sessao_http.pack(anchor=tk.W, pady=(0, 5))
+        ToolTip(chk_sessao_http, "Reaproveita os cookies do último login para extrair via HTTP, abrindo o navegador só quando a sessão expirar")
+
         # Botão tema com design moderno
         btn_tema = tk.Button(frame_opcoes_config,
                             text="🎨  Alternar Tema",
@@ -1554,56 +1611,74 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
         ToolTip(self.btn_cancelar_extracao, "Cancela a extração de dados em andamento")
 
     def atualizar_status(self, mensagem, progresso=None):
-        """Atualiza a mensagem de status e a barra de progresso de forma thread-safe com feedback visual melhorado."""
-        def _atualizar():
-            try:
-                self.lbl_status.config(text=mensagem)
-
-                if progresso is not None:
-                    self.barra_progresso["value"] = progresso
-                    self.lbl_porcentagem.config(text=f"{int(progresso)}%")
-
-                    # Atualizar a cor da barra de progresso e ícone baseado no valor
-                    if progresso == 0:
-                        self.barra_progresso["style"] = "red.Horizontal.TProgressbar"
-                        self.lbl_icone_status.config(text="⏸️")
-                    elif progresso < 30:
-                        self.barra_progresso["style"] = "red.Horizontal.TProgressbar"
-                        self.lbl_icone_status.config(text="🔄")
-                    elif progresso < 70:
-                        self.barra_progresso["style"] = "yellow.Horizontal.TProgressbar"
-                        self.lbl_icone_status.config(text="⚡")
-                    elif progresso < 100:
-                        self.barra_progresso["style"] = "green.Horizontal.TProgressbar"
-                        self.lbl_icone_status.config(text="🚀")
-                    else:
-                        self.barra_progresso["style"] = "green.Horizontal.TProgressbar"
-                        self.lbl_icone_status.config(text="✅")
-                else:
-                    # Definir ícone baseado no tipo de mensagem quando não há progresso
-                    if "erro" in mensagem.lower() or "❌" in mensagem:
-                        self.lbl_icone_status.config(text="❌")
-                    elif "sucesso" in mensagem.lower() or "✅" in mensagem:
-                        self.lbl_icone_status.config(text="✅")
-                    elif "cancelado" in mensagem.lower() or "⏳" in mensagem:
-                        self.lbl_icone_status.config(text="⏹️")
-                    elif "pronto" in mensagem.lower() or "✨" in mensagem:
-                        self.lbl_icone_status.config(text="✨")
-                    else:
-                        self.lbl_icone_status.config(text="ℹ️")
-
-                self.root.update_idletasks()
-            except Exception as e:
-                # Log do erro sem usar print
-                import logging
-                logging.error(f"Erro ao atualizar status: {e}")
+        """
+        Publica uma atualização de status no barramento de progresso.
 
-        # Se estamos na thread principal, executar diretamente
-        if threading.current_thread() == threading.main_thread():
-            _atualizar()
-        else:
-            # Se estamos em uma thread secundária, usar after para thread safety
-            self.root.after(0, _atualizar)
+        Pode ser chamada de qualquer thread: a interface aplica o estado mais recente
+        no próximo quadro (ver ``_drenar_eventos_progresso``).
+        """
+        self.barramento.status(mensagem, progresso)
+
+    def _drenar_eventos_progresso(self):
+        """Drena os eventos pendentes, coalesce-os e atualiza a barra de status uma vez por quadro."""
+        try:
+            eventos = self.fila_progresso.drenar()
+            if eventos:
+                estado = coalescer(eventos)
+                if estado.mensagem is not None or estado.progresso is not None:
+                    self._aplicar_status(estado.mensagem, estado.progresso)
+        except Exception as e:
+            import logging
+            logging.error(f"Erro ao atualizar status: {e}")
+        finally:
+            try:
+                self.root.after(INTERVALO_QUADRO_MS, self._drenar_eventos_progresso)
+            except tk.TclError:
+                pass  # Janela já foi destruída
+
+    def _definir_estilo_barra(self, estilo):
+        """Altera o estilo da barra de progresso apenas quando ele muda."""
+        if estilo != self._estilo_barra_atual:
+            self.barra_progresso["style"] = estilo
+            self._estilo_barra_atual = estilo
+
+    def _aplicar_status(self, mensagem, progresso=None):
+        """Aplica mensagem e progresso na barra de status com feedback visual (thread principal)."""
+        if mensagem is not None:
+            self.lbl_status.config(text=mensagem)
+
+        if progresso is not None:
+            self.barra_progresso["value"] = progresso
+            self.lbl_porcentagem.config(text=f"{int(progresso)}%")
+
+            # Atualizar a cor da barra de progresso e ícone baseado no valor
+            if progresso == 0:
+                self._definir_estilo_barra("red.Horizontal.TProgressbar")
+                self.lbl_icone_status.config(text="⏸️")
+            elif progresso < 30:
+                self._definir_estilo_barra("red.Horizontal.TProgressbar")
+                self.lbl_icone_status.config(text="🔄")
+            elif progresso < 70:
+                self._definir_estilo_barra("yellow.Horizontal.TProgressbar")
+                self.lbl_icone_status.config(text="⚡")
+            elif progresso < 100:
+                self._definir_estilo_barra("green.Horizontal.TProgressbar")
+                self.lbl_icone_status.config(text="🚀")
+            else:
+                self._definir_estilo_barra("green.Horizontal.TProgressbar")
+                self.lbl_icone_status.config(text="✅")
+        elif mensagem is not None:
+            # Definir ícone baseado no tipo de mensagem quando não há progresso
+            if "erro" in mensagem.lower() or "❌" in mensagem:
+                self.lbl_icone_status.config(text="❌")
+            elif "sucesso" in mensagem.lower() or "✅" in mensagem:
+                self.lbl_icone_status.config(text="✅")
+            elif "cancelado" in mensagem.lower() or "⏳" in mensagem:
+                self.lbl_icone_status.config(text="⏹️")
+            elif "pronto" in mensagem.lower() or "✨" in mensagem:
+                self.lbl_icone_status.config(text="✨")
+            else:
+                self.lbl_icone_status.config(text="ℹ️")
 
     def cancelar_extracao_atual(self):
         """Cancela a extração de dados em andamento."""
@@ -1931,6 +2006,7 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
         try:
             # Atualizar configurações
             self.config["headless"] = self.var_headless.get()
+            self.config["usar_sessao_http"] = self.var_sessao_http.get()
             self.config["tema"] = "escuro" if self.tema_escuro else "claro"
 
             # Salvar no arquivo
@@ -2009,6 +2085,7 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
         data_acoes_list = []
         data_fiis_list = []
         data_carteiras_list = []
+        sink = None
 
         try:
             # Verificar se o cancelamento foi solicitado antes de começar
@@ -2016,24 +2093,26 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
                 self.atualizar_status("Extração cancelada pelo usuário antes de iniciar.", 0)
                 return
 
+            # Registros por ticker vão direto para o disco em vez de se acumularem em listas
+            if self.config.get("gravar_registros", True):
+                sink = SinkRegistros(self.config.get("pasta_registros", "registros"))
+
             # Criar instância do extrator de dados
             self.data_extractor = DataExtractor(
                 config=self.config,
-                status_callback=self.atualizar_status,
-                cancelamento_event=self.cancelar_extracao
+                cancelamento_event=self.cancelar_extracao,
+                barramento=self.barramento,
+                sink=sink
             )
 
-            # Configurar driver
-            self.data_extractor.setup_driver()
+            # Reutilizar sessão salva via HTTP ou configurar driver e aguardar login
+            self.data_extractor.preparar_sessao()
 
-            # Verificar cancelamento após configurar o driver
+            # Verificar cancelamento após preparar a sessão
             if self.verificar_cancelamento():
                 self.atualizar_status("Extração cancelada pelo usuário.", 0)
                 return
 
-            # Acessar site e aguardar login
-            self.data_extractor.access_site_and_await_login()
-
             # Extrair Dados de Ações
             if self.config.get("acoes"):
                 data_acoes_list = self.data_extractor.extract_stock_data()
@@ -2049,6 +2128,12 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
             # Extrair Dados de Carteiras (Ações e FIIs separadamente)
             data_carteiras_acoes_list, data_carteiras_fiis_list = self.data_extractor.extract_portfolio_data()
 
+            # Os DataFrames são montados a partir dos arquivos gravados durante a extração
+            if sink:
+                sink.fechar()
+                data_acoes_list = sink.registros("acoes")
+                data_fiis_list = sink.registros("fiis")
+
             # Processar e Exportar Resultados
             self._process_and_export_data(data_acoes_list, data_fiis_list, data_carteiras_acoes_list, data_carteiras_fiis_list)
 
@@ -2057,7 +2142,10 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
             self.root.after(0, lambda: messagebox.showerror("Erro na Extração Combinada", f"Ocorreu um erro geral: {str(e)}"))
             self.atualizar_status(f"Erro geral na extração: {e}", 0)
         finally:
+            if sink:
+                sink.fechar()
             if self.data_extractor:
+                self.data_extractor.salvar_trace()
                 self.data_extractor.cleanup()
             # Ocultar botão de cancelamento
             self.root.after(0, self.ocultar_botao_cancelar)
@@ -2074,8 +2162,8 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
         e chama a função para exportar para Excel.
 
         Args:
-            data_acoes_list (list): Lista de dados de ações.
-            data_fiis_list (list): Lista de dados de FIIs.
+            data_acoes_list (iterable): Dados de ações (lista ou registros lidos do sink).
+            data_fiis_list (iterable): Dados de FIIs (lista ou registros lidos do sink).
             data_carteiras_acoes_list (list): Lista de dados de carteiras de ações.
             data_carteiras_fiis_list (list): Lista de dados de carteiras de FIIs.
         """
@@ -2086,35 +2174,24 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
 
         self.atualizar_status("Processando resultados...", 95)
 
-        if data_acoes_list:
-            self.df_acoes = pd.DataFrame(data_acoes_list)
-        else:
-            self.df_acoes = pd.DataFrame()
-
-        if data_fiis_list:
-            self.df_fiis = pd.DataFrame(data_fiis_list)
-        else:
-            self.df_fiis = pd.DataFrame()
-
+        # Etapa tipada: números no formato brasileiro são convertidos uma única vez, textos repetidos
+        # viram categorias e o mesmo DataFrame compacto alimenta a exportação, o visualizador e a IA
+        self.df_acoes = construir_frame(data_acoes_list, self.config.get("colunas_personalizadas"), nome="ações")
+        self.df_fiis = construir_frame(data_fiis_list, self.config.get("colunas_personalizadas_fiis"), nome="FIIs")
+        self.df_carteiras_acoes = construir_frame(data_carteiras_acoes_list, nome="carteira de ações")
+        self.df_carteiras_fiis = construir_frame(data_carteiras_fiis_list, nome="carteira de FIIs")
 
-
-        # Criar DataFrames separados para exportação
-        if data_carteiras_acoes_list:
-            self.df_carteiras_acoes = pd.DataFrame(data_carteiras_acoes_list)
-        else:
-            self.df_carteiras_acoes = pd.DataFrame()
-
-        if data_carteiras_fiis_list:
-            self.df_carteiras_fiis = pd.DataFrame(data_carteiras_fiis_list)
-        else:
-            self.df_carteiras_fiis = pd.DataFrame()
+        if not self.verificar_cancelamento():
+            self._registrar_historico()
 
         if self.verificar_cancelamento():
             self.atualizar_status("Extração foi cancelada durante o processamento.", 0)
         else:
             self.atualizar_status("Extração combinada concluída!", 100)
 
-        if (data_acoes_list or data_fiis_list or data_carteiras_acoes_list or data_carteiras_fiis_list) and not self.verificar_cancelamento():
+        possui_dados = not (self.df_acoes.empty and self.df_fiis.empty and
+                            self.df_carteiras_acoes.empty and self.df_carteiras_fiis.empty)
+        if possui_dados and not self.verificar_cancelamento():
             # Executar exportação na thread principal
             self.root.after(0, self.exportar_excel)
         elif self.verificar_cancelamento():
@@ -2124,20 +2201,105 @@ desenvolvimento contínuo, considere fazer uma doação via PIX! ❤️"""
             # Usar after para mostrar messagebox de forma thread-safe
             self.root.after(0, lambda: messagebox.showinfo("Extração Concluída", "Nenhum dado foi extraído (nem de ações, nem de FIIs, nem de carteiras)."))
 
+    def _registrar_historico(self):
+        """Grava a execução no histórico colunar, no banco de snapshots e na planilha de histórico, calculando as alterações."""
+        frames = {
+            "acoes": self.df_acoes,
+            "fiis": self.df_fiis,
+            "carteira_acoes": self.df_carteiras_acoes,
+            "carteira_fiis": self.df_carteiras_fiis,
+        }
+        extraido_em = datetime.now()
+
+        historico = None
+        if self.config.get("salvar_historico", True) and HistoricoColunar.disponivel():
+            try:
+                historico = HistoricoColunar(self.config.get("pasta_historico", "historico"))
+                historico.registrar_execucao(frames, extraido_em)
+            except Exception as e:
+                historico = None
+                print(f"Erro ao gravar histórico da extração: {e}")
+
+        self.df_alteracoes = pd.DataFrame()
+        if self.config.get("salvar_snapshots", True):
+            try:
+                with BancoSnapshots(self.config.get("arquivo_snapshots", "snapshots.db")) as banco:
+                    # Comparar com o snapshot anterior antes de gravar a execução atual
+                    self.df_alteracoes = alteracoes_desde_ultimo(banco, frames)
+                    banco.registrar_execucao(frames, extraido_em)
+            except Exception as e:
+                print(f"Erro ao gravar snapshots da extração: {e}")
+
+        # Planilha única que cresce a cada execução (regenerada do histórico se não puder ser aberta)
+        if self.config.get("planilha_historico"):
+            try:
+                PlanilhaHistorico(self.config["planilha_historico"], historico).acrescentar(frames, extraido_em)
+            except Exception as e:
+                print(f"Erro ao atualizar planilha de histórico: {e}")
+
     def exportar_excel(self):
-        """Exporta os dados para Excel usando o ExcelExporter."""
+        """
+        Exporta os dados para Excel usando o ExcelExporter.
+
+        O arquivo é escolhido na thread do Tk; a gravação roda em segundo plano,
+        publicando o progresso no barramento, e o visualizador só abre ao final.
+        """
         exporter = ExcelExporter(self.config)
-        exporter.export_to_excel(self.df_acoes, self.df_fiis, self.df_carteiras_acoes, self.df_carteiras_fiis)
+        dados = (self.df_acoes, self.df_fiis, self.df_carteiras_acoes, self.df_carteiras_fiis)
+        filepath = exporter.escolher_arquivo(*dados)
+        if not filepath:
+            # Sem arquivo (cancelado ou sem dados): ainda assim mostrar os resultados
+            if any(not df.empty for df in dados):
+                self.abrir_visualizador_dados()
+            return
+
+        self.barramento.fase("exportacao", "Gravando arquivo Excel...", 0)
+        threading.Thread(
+            target=self._gravar_exportacao,
+            args=(exporter, filepath, dados, self.df_alteracoes),
+            name="ExportacaoExcel",
+            daemon=True
+        ).start()
+
+    def _gravar_exportacao(self, exporter, filepath, dados, df_alteracoes):
+        """Grava o Excel e os formatos adicionais (executada fora da thread do Tk)."""
+        try:
+            exporter.write_workbook(filepath, *dados, df_alteracoes, progresso=self.atualizar_status)
+        except Exception as e:
+            mensagem = str(e)
+            print(f"Erro ao exportar para Excel: {mensagem}")
+            self.atualizar_status("Erro na exportação", 100)
+            self.root.after(0, lambda: messagebox.showerror("Erro de Exportação",
+                                                            f"Erro ao exportar os dados: {mensagem}"))
+            return
+
+        self._exportar_formatos_adicionais(filepath, dados)
+        self.atualizar_status("Exportação concluída!", 100)
+        self.root.after(0, lambda: self._concluir_exportacao(exporter, filepath, dados))
+
+    def _exportar_formatos_adicionais(self, filepath, dados):
+        """Grava os formatos adicionais (CSV, JSON Lines, Parquet, Feather) ao lado do arquivo Excel."""
+        formatos = self.config.get("formatos_exportacao", [])
+        if not formatos:
+            return
+        try:
+            base = os.path.splitext(os.path.basename(filepath))[0]
+            ExportadorFormatos(formatos).exportar(
+                dict(zip(("acoes", "fiis", "carteira_acoes", "carteira_fiis"), dados)),
+                os.path.dirname(filepath) or ".", prefixo=f"{base}_")
+        except Exception as e:
+            print(f"Erro ao exportar formatos adicionais: {e}")
 
-        # Abrir tela de visualização de dados após exportação
-        if not self.df_acoes.empty or not self.df_fiis.empty or not self.df_carteiras_acoes.empty or not self.df_carteiras_fiis.empty:
-            self.abrir_visualizador_dados()
+    def _concluir_exportacao(self, exporter, filepath, dados):
+        """Mostra o resumo da exportação e abre o visualizador (na thread do Tk)."""
+        exporter._show_success_message(filepath, *dados)
+        self.abrir_visualizador_dados()
 
     def abrir_visualizador_dados(self):
         """Abre a tela de visualização de dados."""
         try:
             viewer = DataViewer(self.root, self.df_acoes, self.config, self.df_fiis,
-                              self.df_carteiras_acoes, self.df_carteiras_fiis)
+                              self.df_carteiras_acoes, self.df_carteiras_fiis, self.df_alteracoes)
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao abrir visualizador de dados: {str(e)}")
 
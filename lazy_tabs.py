@@ -0,0 +1,66 @@
+"""
+Abas de ttk.Notebook construídas sob demanda.
+
+Cada aba é adicionada ao notebook como um frame vazio; o conteúdo (tabelas,
+listas, área de chat...) só é criado na primeira vez em que a aba é
+selecionada. Janelas com várias abas abrem mostrando apenas a aba visível.
+"""
+
+
+class AbasSobDemanda:
+    """
+    Registra construtores de abas e os executa na primeira seleção de cada aba.
+    """
+
+    def __init__(self, notebook, ao_construir=None):
+        """
+        Associa o controlador ao notebook.
+
+        Args:
+            notebook (ttk.Notebook): Notebook com as abas
+            ao_construir (callable): Chamado com o frame logo após construir uma aba (opcional)
+        """
+        self.notebook = notebook
+        self.ao_construir = ao_construir
+        self._pendentes = {}
+        notebook.bind("<<NotebookTabChanged>>", self._ao_trocar_aba, add="+")
+
+    def adicionar(self, frame, construtor, **opcoes_aba):
+        """
+        Adiciona uma aba cujo conteúdo é criado por ``construtor(frame)`` quando ela for exibida.
+
+        Args:
+            frame: Frame (filho do notebook) da aba
+            construtor (callable): Recebe o frame e cria o conteúdo
+            **opcoes_aba: Opções repassadas a ``notebook.add`` (text, image, ...)
+        """
+        self.notebook.add(frame, **opcoes_aba)
+        self._pendentes[str(frame)] = (frame, construtor)
+
+    def construir(self, frame):
+        """Constrói a aba agora, se ainda não foi construída."""
+        frame, construtor = self._pendentes.pop(str(frame), (frame, None))
+        if construtor is None:
+            return
+        construtor(frame)
+        if self.ao_construir:
+            self.ao_construir(frame)
+
+    def construir_selecionada(self):
+        """Constrói a aba selecionada (chamar depois de adicionar as abas)."""
+        selecionada = self.notebook.select()
+        if selecionada in self._pendentes:
+            self.construir(self._pendentes[selecionada][0])
+
+    def construir_todas(self):
+        """Constrói todas as abas pendentes."""
+        for frame, _ in list(self._pendentes.values()):
+            self.construir(frame)
+
+    @property
+    def pendentes(self):
+        """Quantidade de abas ainda não construídas."""
+        return len(self._pendentes)
+
+    def _ao_trocar_aba(self, event=None):
+        self.construir_selecionada()
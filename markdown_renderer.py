@@ -0,0 +1,233 @@
+"""
+Renderização de Markdown no chat (widget ``tk.Text``), completa ou trecho a trecho.
+
+O texto é dividido uma única vez em segmentos ``(texto, tag)`` com padrões
+pré-compilados; segmentos vizinhos com a mesma tag são unidos e inseridos no
+widget em lote (uma chamada ``insert`` com vários pares texto/tags), em vez de
+um ``insert`` por pedaço. Durante o streaming só as linhas completas são
+renderizadas; a linha ainda incompleta fica como texto simples depois de uma
+marca e é a única parte do chat que volta a ser apagada.
+
+Tags usadas: ``titulo``, ``tabela``, ``lista``, ``negrito``, ``italico`` e
+``codigo`` (configuradas pelo ``DataViewer``); ``normal`` é texto sem tag.
+"""
+
+import re
+import tkinter as tk
+
+# Constantes
+MARCA_PENDENTE = "resposta_ia"
+SEGMENTOS_POR_INSERCAO = 500
+LINHA_HORIZONTAL = "\n" + "─" * 80 + "\n"
+
+PADRAO_CERCA = re.compile(r"```markdown|```")
+PADRAO_TITULO = re.compile(r"^(#{1,6})\s+(.*)")
+PADRAO_LISTA = re.compile(r"^\s*([-\*])\s+(.*)")
+PADRAO_LISTA_ORDENADA = re.compile(r"^\s*(\d+\.)\s+(.*)")
+PADRAO_LINHA_HORIZONTAL = re.compile(r"^\s*([-*_]){3,}\s*$")
+# A ordem é crucial para que `**` seja verificado antes de `*`
+PADRAO_INLINE = re.compile(r"(\*\*.*?\*\*|\*.*?\*|`.*?`)")
+INICIOS_ESPECIAIS = frozenset("#|-*_0123456789")
+
+
+def limpar_resposta(texto):
+    """Remove as cercas de código (```markdown / ```) que a IA às vezes coloca em volta da resposta."""
+    return PADRAO_CERCA.sub("", texto)
+
+
+def formatacao_inline(texto, segmentos):
+    """
+    Acrescenta a ``segmentos`` os pedaços de uma linha com negrito, itálico e código.
+
+    Args:
+        texto (str): Conteúdo da linha (sem a marcação de bloco)
+        segmentos (list): Lista de ``(texto, tag)`` a completar
+    """
+    if "*" not in texto and "`" not in texto:
+        if texto:
+            segmentos.append((texto, "normal"))
+        return
+    for parte in PADRAO_INLINE.split(texto):
+        if not parte:
+            continue
+        if parte.startswith("**") and parte.endswith("**"):
+            segmentos.append((parte[2:-2], "negrito"))
+        elif parte.startswith("*") and parte.endswith("*"):
+            segmentos.append((parte[1:-1], "italico"))
+        elif parte.startswith("`") and parte.endswith("`"):
+            segmentos.append((parte[1:-1], "codigo"))
+        else:
+            segmentos.append((parte, "normal"))
+
+
+def _tokenizar_linha(linha, segmentos):
+    conteudo = linha.strip()
+    if not conteudo:
+        segmentos.append(("\n", "normal"))
+        return
+
+    # Parágrafos comuns (o caso mais frequente) não passam pelos padrões de bloco
+    if conteudo[0] in INICIOS_ESPECIAIS:
+        titulo = PADRAO_TITULO.match(linha)
+        if titulo:
+            formatacao_inline(titulo.group(2).strip(), segmentos)
+            segmentos.append(("\n", "titulo"))
+            return
+
+        # Tabelas (linhas que começam e terminam com |); a linha de separação é ignorada
+        if conteudo[0] == "|" and conteudo[-1] == "|":
+            if "---" not in linha:
+                segmentos.append((conteudo + "\n", "tabela"))
+            return
+
+        lista = PADRAO_LISTA.match(linha)
+        if lista:
+            segmentos.append(("• ", "lista"))
+            formatacao_inline(lista.group(2).strip(), segmentos)
+            segmentos.append(("\n", "lista"))
+            return
+
+        lista_ordenada = PADRAO_LISTA_ORDENADA.match(linha)
+        if lista_ordenada:
+            segmentos.append((f"{lista_ordenada.group(1)} ", "lista"))
+            formatacao_inline(lista_ordenada.group(2).strip(), segmentos)
+            segmentos.append(("\n", "lista"))
+            return
+
+        if PADRAO_LINHA_HORIZONTAL.match(linha):
+            segmentos.append((LINHA_HORIZONTAL, "normal"))
+            return
+
+    formatacao_inline(conteudo, segmentos)
+    segmentos.append(("\n", "normal"))
+
+
+def tokenizar(texto):
+    """
+    Converte Markdown em segmentos formatados.
+
+    Args:
+        texto (str): Texto em Markdown (linhas completas)
+
+    Returns:
+        list: ``(texto, tag)``, com segmentos vizinhos de mesma tag já unidos.
+    """
+    segmentos = []
+    for linha in texto.split("\n"):
+        _tokenizar_linha(linha, segmentos)
+
+    unidos = []
+    for pedaco, tag in segmentos:
+        if unidos and unidos[-1][1] == tag:
+            unidos[-1] = (unidos[-1][0] + pedaco, tag)
+        else:
+            unidos.append((pedaco, tag))
+    return unidos
+
+
+def inserir_segmentos(widget, segmentos, indice=tk.END):
+    """
+    Insere os segmentos no widget em lotes de ``SEGMENTOS_POR_INSERCAO`` pares texto/tags por chamada.
+
+    Args:
+        widget (tk.Text): Widget de destino (habilitado para edição)
+        segmentos (list): ``(texto, tag)`` de ``tokenizar``
+        indice: Posição de inserção
+    """
+    for inicio in range(0, len(segmentos), SEGMENTOS_POR_INSERCAO):
+        argumentos = []
+        for pedaco, tag in segmentos[inicio:inicio + SEGMENTOS_POR_INSERCAO]:
+            argumentos.extend((pedaco, () if tag == "normal" else (tag,)))
+        widget.insert(indice, *argumentos)
+
+
+class RenderizadorMarkdown:
+    """
+    Escreve respostas em Markdown no fim de um ``tk.Text``, de uma vez ou em streaming.
+
+    O widget precisa estar habilitado (``state=normal``) durante as chamadas; habilitá-lo e
+    desabilitá-lo fica a cargo de quem chama.
+    """
+
+    def __init__(self, widget, marca=MARCA_PENDENTE):
+        """
+        Associa o renderizador ao widget.
+
+        Args:
+            widget (tk.Text): Área de texto do chat
+            marca (str): Nome da marca que delimita o trecho provisório da resposta em andamento
+        """
+        self.widget = widget
+        self.marca = marca
+        self.aberta = False
+        self._iniciada = False
+        self._pendente = ""
+
+    def inserir(self, texto):
+        """Renderiza um texto completo no fim do widget."""
+        inserir_segmentos(self.widget, tokenizar(texto))
+
+    def iniciar(self, aviso="", tags_aviso=("destaque",)):
+        """
+        Abre uma resposta em streaming, exibindo um aviso de espera até o primeiro trecho.
+
+        Args:
+            aviso (str): Texto exibido enquanto nada chegou
+            tags_aviso (tuple): Tags do aviso
+        """
+        self.widget.mark_set(self.marca, "end-1c")
+        self.widget.mark_gravity(self.marca, tk.LEFT)
+        if aviso:
+            self.widget.insert(tk.END, aviso, tags_aviso)
+        self.aberta = True
+        self._iniciada = False
+        self._pendente = ""
+
+    def anexar(self, trecho):
+        """
+        Anexa um trecho da resposta: as linhas completas são renderizadas, a incompleta fica provisória.
+
+        Args:
+            trecho (str): Texto recebido (pode terminar no meio de uma linha)
+        """
+        if not self.aberta:
+            self.iniciar()
+        # Remover o aviso de espera (ou a linha incompleta do trecho anterior)
+        self.widget.delete(self.marca, "end-1c")
+
+        completas, separador, self._pendente = (self._pendente + trecho).rpartition("\n")
+        if separador:
+            self._renderizar_linhas(completas)
+
+        self.widget.mark_set(self.marca, "end-1c")
+        if self._pendente:
+            self.widget.insert(tk.END, self._pendente)
+
+    def concluir(self, erro=None):
+        """
+        Fecha a resposta em andamento, renderizando a última linha (e a mensagem de erro, se houver).
+
+        Args:
+            erro (str): Mensagem de erro a acrescentar ao fim da resposta (opcional)
+        """
+        if not self.aberta:
+            self.iniciar()
+        self.widget.delete(self.marca, "end-1c")
+        restante = self._pendente
+        if erro:
+            restante = f"{restante}\n{erro}" if restante else erro
+        if restante:
+            self._renderizar_linhas(restante)
+        self.widget.mark_unset(self.marca)
+        self.aberta = False
+        self._pendente = ""
+
+    def _renderizar_linhas(self, texto):
+        texto = limpar_resposta(texto)
+        if not self._iniciada:
+            # Linhas em branco no começo da resposta não são exibidas
+            texto = texto.lstrip()
+            if not texto:
+                return
+            self._iniciada = True
+        self.inserir(texto)
@@ -0,0 +1,243 @@
+"""
+Conversão vetorizada de números no formato brasileiro.
+
+Transforma colunas de texto extraídas do site ("R$ 1.234,56", "12,3%", "3,2 M",
+"N/A") em colunas float64 de uma só vez, logo após a extração. O DataFrame
+tipado alimenta a exportação, o visualizador e o contexto da IA; o formato de
+cada coluna (Número, Moeda ou Porcentagem) fica em ``df.attrs`` para que os
+consumidores saibam como exibi-la.
+
+Porcentagens são guardadas em pontos percentuais ("12,3%" -> 12.3).
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+# Constantes
+FORMATOS_NUMERICOS = ("Número", "Moeda", "Porcentagem")
+ATRIBUTO_FORMATOS = "formatos_colunas"
+COLUNAS_TEXTO = ("Ticker", "Origem", "Erro", "Ativo")
+LIMIAR_DETECCAO = 0.8
+VALORES_AUSENTES = ("", "n/a", "na", "nan", "none", "null", "-", "--", "—")
+MULTIPLICADORES = {
+    "k": 1e3, "mil": 1e3,
+    "m": 1e6, "mi": 1e6, "milhão": 1e6, "milhao": 1e6, "milhões": 1e6, "milhoes": 1e6,
+    "b": 1e9, "bi": 1e9, "bilhão": 1e9, "bilhao": 1e9, "bilhões": 1e9, "bilhoes": 1e9,
+    "t": 1e12, "tri": 1e12, "trilhão": 1e12, "trilhao": 1e12, "trilhões": 1e12, "trilhoes": 1e12,
+}
+PADRAO_NUMERO = re.compile(
+    r"^(?P<sinal>[-+−])?\s*(?:R\$)?\s*(?P<sinal_interno>[-+−])?\s*"
+    r"(?P<numero>\d[\d.]*(?:,\d+)?|,\d+)\s*"
+    r"(?P<sufixo>milh(?:ão|ao|ões|oes)|mil|mi|bilh(?:ão|ao|ões|oes)|bi|trilh(?:ão|ao|ões|oes)|tri|[kmbt])?\.?\s*"
+    r"(?P<porcentagem>%)?$",
+    re.IGNORECASE,
+)
+PADRAO_MILHAR = r"\d{1,3}(?:\.\d{3})+"
+
+logger = logging.getLogger(__name__)
+
+
+def _texto_normalizado(serie):
+    """Converte a série para texto (StringDtype) sem espaços nas pontas."""
+    return serie.astype("string").str.strip()
+
+
+def mascara_ausentes(texto):
+    """Indica os valores vazios ou sentinelas de ausência ("N/A", "-", ...)."""
+    return texto.isna() | texto.str.lower().isin(VALORES_AUSENTES)
+
+
+def float64_decimal(serie):
+    """
+    Converte uma série numérica em float64 preservando o valor decimal do float32.
+
+    ``np.float32(12.1)`` convertido diretamente vira 12.100000381...; aqui o valor
+    passa pela representação decimal mais curta do float32 e volta como 12.1.
+
+    Returns:
+        pd.Series: Série float64 com o mesmo índice e nome.
+    """
+    if serie.dtype != "float32":
+        return serie.astype("float64")
+    return pd.Series(serie.to_numpy().astype(str).astype("float64"), index=serie.index, name=serie.name)
+
+
+def converter_serie(serie):
+    """
+    Converte uma série de textos no formato brasileiro em float64.
+
+    Trata prefixo "R$", sufixo "%", separador de milhar ".", vírgula decimal,
+    sinais (inclusive o sinal de menos tipográfico) e sufixos de grandeza
+    (mil/k, M/mi/milhões, B/bi/bilhões, T/tri). Valores que não são números
+    ("N/A", "-", textos) viram NaN.
+
+    Args:
+        serie (pd.Series): Série com os valores extraídos
+
+    Returns:
+        pd.Series: Série float64 com o mesmo índice e nome.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return float64_decimal(serie)
+
+    # Colunas extraídas repetem muito os mesmos textos ("N/A", setores): converter só os distintos
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=True)
+    valores_distintos = np.append(_converter_textos(pd.Series(distintos, dtype=object)), np.nan)
+    resultado = valores_distintos[codigos]
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype="float64")
+
+
+def _converter_textos(textos):
+    """Aplica o padrão numérico a uma série de textos, retornando um array float64."""
+    partes = _texto_normalizado(textos).str.extract(PADRAO_NUMERO)
+    numero = partes["numero"]
+
+    # O ponto é separador de milhar quando há vírgula decimal ou quando agrupa exatamente 3 dígitos
+    tem_milhar = numero.str.contains(",", regex=False, na=False) | numero.str.fullmatch(PADRAO_MILHAR, na=False)
+    numero = numero.mask(tem_milhar, numero.str.replace(".", "", regex=False))
+    numero = numero.str.replace(",", ".", regex=False)
+
+    valores = pd.to_numeric(numero.astype(object), errors="coerce").astype("float64").to_numpy()
+    multiplicador = partes["sufixo"].str.lower().map(MULTIPLICADORES).astype("float64").fillna(1.0).to_numpy()
+    negativo = (partes["sinal"].isin(["-", "−"]) | partes["sinal_interno"].isin(["-", "−"])).to_numpy(dtype=bool)
+    return valores * multiplicador * np.where(negativo, -1.0, 1.0)
+
+
+def detectar_formato(serie):
+    """
+    Identifica se uma coluna sem configuração é numérica e qual o seu formato.
+
+    A coluna é considerada numérica quando pelo menos ``LIMIAR_DETECCAO`` dos
+    valores não ausentes podem ser convertidos.
+
+    Args:
+        serie (pd.Series): Série com os valores extraídos
+
+    Returns:
+        str or None: "Moeda", "Porcentagem", "Número" ou None para colunas de texto.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return "Número"
+
+    texto = _texto_normalizado(serie)
+    validos = texto[~mascara_ausentes(texto)]
+    if validos.empty:
+        return None
+
+    if converter_serie(validos).notna().mean() < LIMIAR_DETECCAO:
+        return None
+    if validos.str.contains("R$", regex=False).mean() >= 0.5:
+        return "Moeda"
+    if validos.str.endswith("%").mean() >= 0.5:
+        return "Porcentagem"
+    return "Número"
+
+
+def converter_dataframe(df, colunas_config=None, detectar=True):
+    """
+    Gera a versão tipada de um DataFrame extraído.
+
+    Colunas configuradas como Número, Moeda ou Porcentagem são convertidas;
+    colunas sem configuração (como as das carteiras) são convertidas quando
+    ``detectar_formato`` as reconhece como numéricas. Uma coluna só com
+    sentinelas ("N/A") vira uma coluna numérica vazia; uma coluna com textos
+    que não puderam ser convertidos é mantida como texto.
+
+    Args:
+        df (pd.DataFrame): Dados brutos da extração
+        colunas_config (list): Configuração das colunas personalizadas (com "formato_excel")
+        detectar (bool): Se True, detecta o formato das colunas sem configuração
+
+    Returns:
+        pd.DataFrame: Cópia tipada, com os formatos em ``attrs[ATRIBUTO_FORMATOS]``.
+    """
+    resultado = df.copy()
+    formatos_config = {col["nome"]: col.get("formato_excel", "Texto") for col in colunas_config or []}
+    formatos = {}
+
+    for coluna in resultado.columns:
+        if coluna in COLUNAS_TEXTO:
+            continue
+
+        formato = formatos_config.get(coluna)
+        if formato is None and detectar:
+            formato = detectar_formato(resultado[coluna])
+        if formato not in FORMATOS_NUMERICOS:
+            continue
+
+        convertida = converter_serie(resultado[coluna])
+        if convertida.isna().all() and not mascara_ausentes(_texto_normalizado(resultado[coluna])).all():
+            continue
+
+        resultado[coluna] = convertida
+        formatos[coluna] = formato
+
+    resultado.attrs[ATRIBUTO_FORMATOS] = formatos
+    return resultado
+
+
+def formato_coluna(df, coluna, colunas_config=None):
+    """
+    Retorna o formato de exibição de uma coluna.
+
+    A configuração do usuário tem prioridade; em seguida vale o formato
+    registrado por ``converter_dataframe``.
+
+    Returns:
+        str: "Texto", "Número", "Moeda" ou "Porcentagem".
+    """
+    for col in colunas_config or []:
+        if col["nome"] == coluna:
+            return col.get("formato_excel", "Texto")
+    return df.attrs.get(ATRIBUTO_FORMATOS, {}).get(coluna, "Texto")
+
+
+def formatar_valor(valor, formato="Número", casas=2):
+    """
+    Formata um número no padrão brasileiro para exibição.
+
+    Args:
+        valor: Valor a formatar (NaN/None viram "N/A"; textos são devolvidos como estão)
+        formato (str): "Número", "Moeda" ou "Porcentagem" (em pontos percentuais)
+        casas (int): Casas decimais
+
+    Returns:
+        str: Valor formatado (ex: "R$ 1.234,56", "12,30%").
+    """
+    if valor is None or valor is pd.NA or (isinstance(valor, (float, np.floating)) and np.isnan(valor)):
+        return "N/A"
+    if not isinstance(valor, (int, float, np.number)) or isinstance(valor, bool):
+        return str(valor)
+
+    texto = f"{abs(valor):,.{casas}f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    sinal = "-" if valor < 0 else ""
+    if formato == "Moeda":
+        return f"{sinal}R$ {texto}"
+    if formato == "Porcentagem":
+        return f"{sinal}{texto}%"
+    return f"{sinal}{texto}"
+
+
+def formatar_dataframe(df, colunas_config=None):
+    """
+    Converte um DataFrame tipado em textos formatados para exibição.
+
+    Args:
+        df (pd.DataFrame): DataFrame (tipado ou não)
+        colunas_config (list): Configuração das colunas personalizadas
+
+    Returns:
+        pd.DataFrame: DataFrame de strings com o mesmo índice e colunas.
+    """
+    exibicao = pd.DataFrame(index=df.index)
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            formato = formato_coluna(df, coluna, colunas_config)
+            exibicao[coluna] = [formatar_valor(valor, formato) for valor in serie.to_numpy()]
+        else:
+            exibicao[coluna] = serie.astype(object).where(serie.notna(), "N/A").astype(str)
+    return exibicao
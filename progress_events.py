@@ -0,0 +1,204 @@
+"""
+Barramento de eventos de progresso da extração.
+
+O extrator publica eventos tipados (status, fase, ticker iniciado/concluído/falhou)
+em um barramento thread-safe. Cada assinante recebe todos os eventos: a interface
+gráfica usa uma fila que é drenada e coalescida em uma taxa fixa de quadros,
+enquanto sinks de log ou de linha de comando podem assinar o mesmo barramento.
+"""
+
+import logging
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional
+
+# Constantes
+INTERVALO_QUADRO_MS = 66  # ~15 quadros por segundo na interface
+
+logger = logging.getLogger(__name__)
+
+
+class TipoEvento(Enum):
+    """Tipos de evento publicados durante a extração."""
+    STATUS = "status"
+    FASE = "fase"
+    TICKER_INICIADO = "ticker_iniciado"
+    TICKER_CONCLUIDO = "ticker_concluido"
+    TICKER_FALHOU = "ticker_falhou"
+
+
+@dataclass
+class EventoProgresso:
+    """Evento de progresso publicado no barramento."""
+    tipo: TipoEvento
+    mensagem: str = ""
+    progresso: Optional[float] = None
+    fase: Optional[str] = None
+    ticker: Optional[str] = None
+    concluidos: Optional[int] = None
+    total: Optional[int] = None
+    erro: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class EstadoProgresso:
+    """Resultado da coalescência de vários eventos em um único quadro."""
+    mensagem: Optional[str] = None
+    progresso: Optional[float] = None
+    fase: Optional[str] = None
+    concluidos: Optional[int] = None
+    total: Optional[int] = None
+    falhas: list = field(default_factory=list)
+    eventos: int = 0
+
+
+def coalescer(eventos):
+    """
+    Reduz uma sequência de eventos ao estado mais recente.
+
+    Mantém apenas a última mensagem, o último progresso e a última contagem de
+    tickers, acumulando os tickers que falharam no período.
+
+    Args:
+        eventos (list): Eventos na ordem em que foram publicados
+
+    Returns:
+        EstadoProgresso: Estado resultante.
+    """
+    estado = EstadoProgresso(eventos=len(eventos))
+    for evento in eventos:
+        if evento.mensagem:
+            estado.mensagem = evento.mensagem
+        if evento.progresso is not None:
+            estado.progresso = evento.progresso
+        if evento.fase:
+            estado.fase = evento.fase
+        if evento.total is not None:
+            estado.total = evento.total
+        if evento.concluidos is not None:
+            estado.concluidos = evento.concluidos
+        if evento.tipo == TipoEvento.TICKER_FALHOU and evento.ticker:
+            estado.falhas.append(evento.ticker)
+    return estado
+
+
+class FilaEventos:
+    """
+    Assinante que guarda os eventos em uma fila para serem drenados por outra thread.
+    """
+
+    def __init__(self):
+        self._fila = queue.Queue()
+
+    def __call__(self, evento):
+        self._fila.put_nowait(evento)
+
+    def drenar(self, maximo=None):
+        """
+        Retira todos os eventos pendentes da fila sem bloquear.
+
+        Args:
+            maximo (int): Limite de eventos retirados por chamada (None = todos)
+
+        Returns:
+            list: Eventos retirados, na ordem de publicação.
+        """
+        eventos = []
+        while maximo is None or len(eventos) < maximo:
+            try:
+                eventos.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return eventos
+
+
+class LogSink:
+    """Assinante que registra os eventos no logging."""
+
+    def __init__(self, nivel=logging.INFO):
+        self.nivel = nivel
+
+    def __call__(self, evento):
+        if evento.tipo == TipoEvento.TICKER_FALHOU:
+            logger.warning(f"{evento.ticker}: {evento.erro or evento.mensagem}")
+        elif evento.mensagem:
+            progresso = f" ({int(evento.progresso)}%)" if evento.progresso is not None else ""
+            logger.log(self.nivel, f"{evento.mensagem}{progresso}")
+
+
+class ConsoleSink:
+    """Assinante que mostra o progresso em uma única linha do terminal."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def __call__(self, evento):
+        if evento.tipo == TipoEvento.TICKER_FALHOU:
+            linha = f"\n[FALHA] {evento.ticker}: {evento.erro or evento.mensagem}\n"
+        elif evento.mensagem:
+            progresso = f"{int(evento.progresso):>3}% " if evento.progresso is not None else "     "
+            linha = f"\r{progresso}{evento.mensagem[:100]:<100}"
+        else:
+            return
+        with self._lock:
+            self.stream.write(linha)
+            self.stream.flush()
+
+
+class BarramentoProgresso:
+    """
+    Barramento publish/subscribe thread-safe para eventos de progresso.
+    """
+
+    def __init__(self):
+        self._assinantes = []
+        self._lock = threading.Lock()
+
+    def assinar(self, assinante):
+        """
+        Registra um assinante (qualquer callable que receba um EventoProgresso).
+
+        Returns:
+            callable: O próprio assinante, para uso em ``cancelar_assinatura``.
+        """
+        with self._lock:
+            self._assinantes.append(assinante)
+        return assinante
+
+    def cancelar_assinatura(self, assinante):
+        """Remove um assinante registrado."""
+        with self._lock:
+            if assinante in self._assinantes:
+                self._assinantes.remove(assinante)
+
+    def criar_fila(self):
+        """Cria e assina uma FilaEventos, retornando-a."""
+        return self.assinar(FilaEventos())
+
+    def publicar(self, evento):
+        """Entrega o evento a todos os assinantes."""
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for assinante in assinantes:
+            try:
+                assinante(evento)
+            except Exception as e:
+                logger.debug(f"Erro em assinante de progresso: {e}")
+
+    def status(self, mensagem, progresso=None):
+        """Publica um evento de status (mesma assinatura do ``status_callback`` do extrator)."""
+        self.publicar(EventoProgresso(TipoEvento.STATUS, mensagem=mensagem, progresso=progresso))
+
+    def fase(self, fase, mensagem="", progresso=None):
+        """Publica o início de uma fase da extração."""
+        self.publicar(EventoProgresso(TipoEvento.FASE, mensagem=mensagem, progresso=progresso, fase=fase))
+
+    def ticker(self, tipo, ticker, concluidos=None, total=None, erro=None):
+        """Publica um evento de ticker (iniciado, concluído ou falhou)."""
+        self.publicar(EventoProgresso(tipo, ticker=ticker, concluidos=concluidos, total=total, erro=erro))
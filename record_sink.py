@@ -0,0 +1,165 @@
+"""
+Gravação contínua dos registros extraídos em disco (JSON Lines).
+
+Cada ticker concluído é enviado a uma fila limitada e gravado por uma thread
+própria em ``<pasta>/execucao_AAAAmmdd_HHMMSS/<tipo>.jsonl``. A extração não
+acumula listas em memória, e se o programa cair no meio da execução os
+registros já gravados continuam legíveis. Os DataFrames são montados depois,
+lendo os arquivos sob demanda.
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+
+# Constantes
+PASTA_REGISTROS_PADRAO = "registros"
+TAMANHO_FILA_PADRAO = 256
+EXECUCOES_MANTIDAS = 20
+PREFIXO_EXECUCAO = "execucao_"
+
+logger = logging.getLogger(__name__)
+
+_FIM = object()
+
+
+def ler_registros(caminho):
+    """
+    Lê um arquivo JSON Lines linha a linha.
+
+    Linhas incompletas (ex: a última linha de uma execução interrompida) são ignoradas.
+
+    Args:
+        caminho (str): Arquivo .jsonl
+
+    Yields:
+        dict: Um registro por linha.
+    """
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        for numero, linha in enumerate(arquivo, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                logger.warning(f"Linha {numero} inválida ignorada em {caminho}")
+
+
+def limpar_execucoes_antigas(pasta, manter=EXECUCOES_MANTIDAS):
+    """Remove as pastas de execução mais antigas, mantendo as ``manter`` mais recentes."""
+    if not os.path.isdir(pasta):
+        return
+    execucoes = sorted(nome for nome in os.listdir(pasta) if nome.startswith(PREFIXO_EXECUCAO))
+    for nome in execucoes[:-manter] if manter > 0 else execucoes:
+        shutil.rmtree(os.path.join(pasta, nome), ignore_errors=True)
+
+
+class SinkRegistros:
+    """
+    Destino append-only dos registros de uma execução, com fila limitada e thread de gravação.
+    """
+
+    def __init__(self, pasta=PASTA_REGISTROS_PADRAO, tamanho_fila=TAMANHO_FILA_PADRAO, execucoes_mantidas=EXECUCOES_MANTIDAS):
+        """
+        Cria a pasta da execução e inicia a thread de gravação.
+
+        Args:
+            pasta (str): Pasta raiz dos registros
+            tamanho_fila (int): Registros pendentes antes de ``gravar`` bloquear
+            execucoes_mantidas (int): Execuções antigas mantidas em disco
+        """
+        limpar_execucoes_antigas(pasta, max(execucoes_mantidas - 1, 0))
+        self.pasta_execucao = os.path.join(pasta, f"{PREFIXO_EXECUCAO}{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(self.pasta_execucao, exist_ok=True)
+
+        self.contagem = {}
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._arquivos = {}
+        self._fechado = False
+        self._thread = threading.Thread(target=self._gravar_em_disco, name="SinkRegistros", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def caminho(self, tipo):
+        """Arquivo .jsonl de um tipo de ativo nesta execução."""
+        return os.path.join(self.pasta_execucao, f"{tipo}.jsonl")
+
+    def gravar(self, tipo, registro):
+        """
+        Enfileira um registro para gravação (bloqueia se a fila estiver cheia).
+
+        Args:
+            tipo (str): Tipo de ativo ("acoes", "fiis", ...)
+            registro (dict): Dados de um ticker
+        """
+        if self._fechado:
+            raise RuntimeError("SinkRegistros já foi fechado")
+        self._fila.put((tipo, registro))
+
+    def _arquivo(self, tipo):
+        if tipo not in self._arquivos:
+            self._arquivos[tipo] = open(self.caminho(tipo), "a", encoding="utf-8")
+        return self._arquivos[tipo]
+
+    def _gravar_em_disco(self):
+        """Consome a fila, gravando uma linha JSON por registro."""
+        while True:
+            item = self._fila.get()
+            try:
+                if item is _FIM:
+                    return
+                tipo, registro = item
+                self._arquivo(tipo).write(json.dumps(registro, ensure_ascii=False) + "\n")
+                self.contagem[tipo] = self.contagem.get(tipo, 0) + 1
+                # Descarregar quando a fila esvazia: o disco acompanha a extração sem um flush por linha
+                if self._fila.empty():
+                    for arquivo in self._arquivos.values():
+                        arquivo.flush()
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"Erro ao gravar registro em {self.pasta_execucao}: {e}")
+            finally:
+                self._fila.task_done()
+
+    def sincronizar(self):
+        """Aguarda a gravação de todos os registros enfileirados."""
+        if not self._fechado:
+            self._fila.join()
+            for arquivo in self._arquivos.values():
+                arquivo.flush()
+
+    def fechar(self):
+        """Grava os registros pendentes, encerra a thread e fecha os arquivos."""
+        if self._fechado:
+            return
+        self._fila.put(_FIM)
+        self._thread.join()
+        self._fechado = True
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        self._arquivos.clear()
+        logger.info(f"Registros gravados em {self.pasta_execucao}: {self.contagem}")
+
+    def registros(self, tipo):
+        """
+        Lê de volta os registros de um tipo, sob demanda.
+
+        Args:
+            tipo (str): Tipo de ativo
+
+        Returns:
+            generator: Registros na ordem de gravação.
+        """
+        self.sincronizar()
+        return ler_registros(self.caminho(tipo))
@@ -0,0 +1,145 @@
+"""
+Construção de DataFrames compactos a partir dos registros extraídos.
+
+Os registros chegam como listas de dicionários com textos Python em todas as
+colunas. Aqui eles viram um DataFrame tipado (ver ``number_parsing``) e depois
+compactado:
+
+- textos de baixa cardinalidade (Origem, Setor, Segmento, ...) viram ``category``;
+- sentinelas como "N/A" viram nulos de verdade;
+- indicadores numéricos viram float32 quando a conversão não altera nenhum valor
+  em mais de meio centavo (colunas com valores grandes continuam float64).
+
+O float32 vale só em memória: ao gravar (snapshot, histórico, Excel) as colunas
+voltam a float64 por ``number_parsing.float64_decimal``, sem dígitos espúrios.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from number_parsing import converter_dataframe, mascara_ausentes
+
+# Constantes
+LIMITE_CARDINALIDADE = 0.5  # fração máxima de valores distintos para virar categoria
+COLUNAS_CATEGORICAS = ("Origem", "Setor", "Segmento", "Subsetor", "Tipo", "Erro")
+TOLERANCIA_FLOAT32 = 0.005  # meio centavo
+
+logger = logging.getLogger(__name__)
+
+
+def uso_memoria(df):
+    """
+    Retorna a memória ocupada pelo DataFrame, incluindo os objetos Python.
+
+    Returns:
+        int: Bytes ocupados.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _compactar_numero(serie):
+    """Converte para float32 quando todos os valores cabem na tolerância."""
+    if serie.dtype == "float32":
+        return serie
+    reduzida = serie.astype("float32")
+    diferenca = np.abs(reduzida.to_numpy(dtype="float64") - serie.to_numpy(dtype="float64"))
+    if np.nanmax(diferenca, initial=0.0) <= TOLERANCIA_FLOAT32:
+        return reduzida
+    return serie.astype("float64")
+
+
+def _compactar_texto(serie, limite_cardinalidade):
+    """Troca sentinelas por nulos e converte textos repetitivos em categoria."""
+    textos = serie.astype("string").str.strip()
+    ausentes = mascara_ausentes(textos).to_numpy(dtype=bool)
+    limpa = serie.astype(object).where(~ausentes, None)
+
+    validos = len(limpa) - int(ausentes.sum())
+    if validos == 0:
+        return limpa.astype("category")
+    distintos = limpa.nunique(dropna=True)
+    if serie.name in COLUNAS_CATEGORICAS or distintos / validos <= limite_cardinalidade:
+        return limpa.astype("category")
+    return limpa
+
+
+def compactar_dataframe(df, limite_cardinalidade=LIMITE_CARDINALIDADE):
+    """
+    Reduz a memória de um DataFrame tipado.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado (ex: ``converter_dataframe``)
+        limite_cardinalidade (float): Fração máxima de valores distintos para usar ``category``
+
+    Returns:
+        pd.DataFrame: Cópia compacta, com os mesmos ``attrs``.
+    """
+    resultado = df.copy()
+    for coluna in resultado.columns:
+        serie = resultado[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_float_dtype(serie):
+            resultado[coluna] = _compactar_numero(serie)
+        elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+            resultado[coluna] = _compactar_texto(serie, limite_cardinalidade)
+    return resultado
+
+
+def relatorio_memoria(antes, depois):
+    """
+    Compara a memória de dois DataFrames coluna a coluna.
+
+    Args:
+        antes (pd.DataFrame): DataFrame original
+        depois (pd.DataFrame): DataFrame compacto
+
+    Returns:
+        dict: Bytes antes/depois, redução percentual e detalhes por coluna.
+    """
+    bytes_antes, bytes_depois = uso_memoria(antes), uso_memoria(depois)
+    por_coluna_antes = antes.memory_usage(index=False, deep=True)
+    por_coluna_depois = depois.memory_usage(index=False, deep=True)
+    return {
+        "bytes_antes": bytes_antes,
+        "bytes_depois": bytes_depois,
+        "reducao_percentual": (1 - bytes_depois / bytes_antes) * 100 if bytes_antes else 0.0,
+        "colunas": {
+            coluna: {
+                "bytes_antes": int(por_coluna_antes.get(coluna, 0)),
+                "bytes_depois": int(por_coluna_depois.get(coluna, 0)),
+                "dtype": str(depois[coluna].dtype),
+            }
+            for coluna in depois.columns
+        },
+    }
+
+
+def construir_frame(registros, colunas_config=None, detectar=True, nome=""):
+    """
+    Monta o DataFrame compacto de uma lista de registros extraídos.
+
+    Args:
+        registros (iterable): Dicionários por ticker (lista do DataExtractor ou ``SinkRegistros.registros``)
+        colunas_config (list): Configuração das colunas personalizadas (com "formato_excel")
+        detectar (bool): Se True, detecta o formato das colunas sem configuração
+        nome (str): Nome usado no log do relatório de memória
+
+    Returns:
+        pd.DataFrame: DataFrame tipado e compacto (vazio se não há registros).
+    """
+    bruto = pd.DataFrame(list(registros or []))
+    if bruto.empty:
+        return pd.DataFrame()
+
+    compacto = compactar_dataframe(converter_dataframe(bruto, colunas_config, detectar))
+
+    relatorio = relatorio_memoria(bruto, compacto)
+    logger.info(
+        f"DataFrame {nome or 'extraído'}: {len(compacto)} linhas, "
+        f"{relatorio['bytes_antes'] / 1024:.1f} KiB -> {relatorio['bytes_depois'] / 1024:.1f} KiB "
+        f"({relatorio['reducao_percentual']:.0f}% menor)"
+    )
+    return compacto
@@ -0,0 +1,327 @@
+"""
+Banco SQLite com os snapshots de cada extração.
+
+Guarda os valores no formato longo (ticker, tipo de ativo, momento da extração,
+coluna) com índices para as duas consultas mais comuns: o último snapshot de um
+conjunto de tickers e a série temporal de colunas em um intervalo de datas.
+Cada execução é gravada em lote em uma única transação.
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from number_parsing import ATRIBUTO_FORMATOS, float64_decimal
+
+# Constantes
+ARQUIVO_BANCO_PADRAO = "snapshots.db"
+COLUNAS_IGNORADAS = ("Origem",)
+LOTE_PARAMETROS = 500  # abaixo do limite de variáveis por consulta do SQLite
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    tipo_ativo TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    extraido_em TEXT NOT NULL,
+    PRIMARY KEY (tipo_ativo, ticker, extraido_em)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS valores (
+    tipo_ativo TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    extraido_em TEXT NOT NULL,
+    coluna TEXT NOT NULL,
+    valor_texto TEXT,
+    valor_num REAL,
+    PRIMARY KEY (tipo_ativo, ticker, extraido_em, coluna)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS colunas (
+    tipo_ativo TEXT NOT NULL,
+    coluna TEXT NOT NULL,
+    formato TEXT NOT NULL DEFAULT 'Texto',
+    posicao INTEGER NOT NULL,
+    PRIMARY KEY (tipo_ativo, coluna)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_tempo ON snapshots (tipo_ativo, extraido_em);
+CREATE INDEX IF NOT EXISTS idx_valores_coluna_tempo ON valores (tipo_ativo, coluna, extraido_em);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def identificar_coluna_ticker(df):
+    """
+    Identifica a coluna que contém o ticker do ativo.
+
+    Returns:
+        str or None: "Ticker" (ações/FIIs), "Ativo" (carteiras) ou a primeira coluna.
+    """
+    for candidata in ("Ticker", "Ativo"):
+        if candidata in df.columns:
+            return candidata
+    return df.columns[0] if len(df.columns) else None
+
+
+def _em_lotes(itens, tamanho=LOTE_PARAMETROS):
+    """Divide uma lista em lotes para consultas com IN (...)."""
+    itens = list(itens)
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+class BancoSnapshots:
+    """
+    Banco SQLite de snapshots das extrações, seguro para uso a partir de várias threads.
+    """
+
+    def __init__(self, caminho=ARQUIVO_BANCO_PADRAO):
+        """
+        Abre (ou cria) o banco.
+
+        Args:
+            caminho (str): Arquivo do banco SQLite
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    def _linhas_longas(self, tipo_ativo, df, extraido_em):
+        """Converte um DataFrame tipado nas linhas da tabela ``valores``."""
+        coluna_ticker = identificar_coluna_ticker(df)
+        tickers = df[coluna_ticker].astype(str).to_numpy()
+        linhas = []
+        for coluna in df.columns:
+            if coluna == coluna_ticker or coluna in COLUNAS_IGNORADAS:
+                continue
+            serie = df[coluna]
+            if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                numeros = float64_decimal(serie).to_numpy()
+                linhas.extend((tipo_ativo, ticker, extraido_em, coluna, None, None if pd.isna(valor) else float(valor))
+                              for ticker, valor in zip(tickers, numeros))
+            else:
+                textos = serie.astype(object).where(serie.notna(), None).to_numpy()
+                linhas.extend((tipo_ativo, ticker, extraido_em, coluna, None if valor is None else str(valor), None)
+                              for ticker, valor in zip(tickers, textos))
+        return coluna_ticker, tickers, linhas
+
+    def registrar_execucao(self, frames, extraido_em=None):
+        """
+        Grava os resultados de uma execução em uma única transação.
+
+        Args:
+            frames (dict): Tipo de ativo -> DataFrame tipado
+            extraido_em (datetime): Momento da extração (padrão: agora)
+
+        Returns:
+            int: Quantidade de valores gravados.
+        """
+        momento = (extraido_em or datetime.now()).replace(microsecond=0).isoformat(sep=" ")
+        total = 0
+        with self._lock, self._conexao:
+            for tipo_ativo, df in frames.items():
+                if df is None or df.empty:
+                    continue
+
+                coluna_ticker, tickers, linhas = self._linhas_longas(tipo_ativo, df, momento)
+                formatos = df.attrs.get(ATRIBUTO_FORMATOS, {})
+                colunas = [c for c in df.columns if c != coluna_ticker and c not in COLUNAS_IGNORADAS]
+
+                self._conexao.executemany(
+                    "INSERT OR REPLACE INTO snapshots (tipo_ativo, ticker, extraido_em) VALUES (?, ?, ?)",
+                    [(tipo_ativo, ticker, momento) for ticker in dict.fromkeys(tickers)],
+                )
+                self._conexao.executemany(
+                    "INSERT OR REPLACE INTO valores (tipo_ativo, ticker, extraido_em, coluna, valor_texto, valor_num) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    linhas,
+                )
+                self._conexao.executemany(
+                    "INSERT INTO colunas (tipo_ativo, coluna, formato, posicao) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (tipo_ativo, coluna) DO UPDATE SET formato = excluded.formato, posicao = excluded.posicao",
+                    [(tipo_ativo, coluna, formatos.get(coluna, "Texto"), posicao) for posicao, coluna in enumerate(colunas)],
+                )
+                total += len(linhas)
+
+        logger.info(f"{total} valores gravados no banco de snapshots ({momento})")
+        return total
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def execucoes(self, tipo_ativo=None):
+        """
+        Lista os momentos de extração gravados.
+
+        Returns:
+            list: Momentos 'AAAA-MM-DD HH:MM:SS' em ordem crescente.
+        """
+        if tipo_ativo:
+            linhas = self._consultar("SELECT DISTINCT extraido_em FROM snapshots WHERE tipo_ativo = ? ORDER BY 1",
+                                     (tipo_ativo,))
+        else:
+            linhas = self._consultar("SELECT DISTINCT extraido_em FROM snapshots ORDER BY 1")
+        return [linha[0] for linha in linhas]
+
+    def tickers(self, tipo_ativo):
+        """Lista os tickers com algum snapshot do tipo de ativo."""
+        linhas = self._consultar("SELECT DISTINCT ticker FROM snapshots WHERE tipo_ativo = ? ORDER BY 1", (tipo_ativo,))
+        return [linha[0] for linha in linhas]
+
+    def _formatos(self, tipo_ativo):
+        """Formatos e ordem das colunas conhecidas do tipo de ativo."""
+        linhas = self._consultar("SELECT coluna, formato, posicao FROM colunas WHERE tipo_ativo = ? ORDER BY posicao",
+                                 (tipo_ativo,))
+        return {coluna: formato for coluna, formato, _ in linhas}
+
+    def _valores(self, tipo_ativo, chaves, colunas=None):
+        """Busca os valores de pares (ticker, extraido_em) pela chave primária."""
+        filtro_colunas = ""
+        parametros_colunas = []
+        if colunas:
+            filtro_colunas = f" AND coluna IN ({', '.join('?' * len(colunas))})"
+            parametros_colunas = list(colunas)
+
+        linhas = []
+        for lote in _em_lotes(chaves, LOTE_PARAMETROS // 2):
+            pares = " OR ".join("(ticker = ? AND extraido_em = ?)" for _ in lote)
+            parametros = [tipo_ativo] + [valor for par in lote for valor in par] + parametros_colunas
+            linhas.extend(self._consultar(
+                "SELECT ticker, extraido_em, coluna, valor_texto, valor_num FROM valores "
+                f"WHERE tipo_ativo = ? AND ({pares}){filtro_colunas}",
+                parametros,
+            ))
+        return pd.DataFrame(linhas, columns=["ticker", "extraido_em", "coluna", "valor_texto", "valor_num"])
+
+    def _para_largo(self, longo, tipo_ativo, indice):
+        """Pivota o formato longo em uma linha por ``indice`` e uma coluna por métrica."""
+        formatos = self._formatos(tipo_ativo)
+        if longo.empty:
+            return pd.DataFrame(columns=indice)
+
+        numeros = longo.pivot_table(index=indice, columns="coluna", values="valor_num", aggfunc="first")
+        textos = longo.pivot_table(index=indice, columns="coluna", values="valor_texto", aggfunc="first")
+
+        colunas = [c for c in formatos if c in set(longo["coluna"])]
+        colunas += [c for c in dict.fromkeys(longo["coluna"]) if c not in formatos]
+        largo = pd.DataFrame(index=numeros.index.union(textos.index))
+        for coluna in colunas:
+            if formatos.get(coluna, "Texto") != "Texto" or (coluna in numeros and numeros[coluna].notna().any()):
+                largo[coluna] = numeros[coluna].astype("float64") if coluna in numeros else float("nan")
+            else:
+                largo[coluna] = textos[coluna] if coluna in textos else None
+
+        largo = largo.reset_index()
+        largo.attrs[ATRIBUTO_FORMATOS] = {c: f for c, f in formatos.items() if f != "Texto" and c in largo.columns}
+        return largo
+
+    def ultimo_snapshot(self, tipo_ativo, tickers=None, colunas=None):
+        """
+        Retorna o snapshot mais recente de cada ticker.
+
+        Args:
+            tipo_ativo (str): "acoes", "fiis", "carteira_acoes" ou "carteira_fiis"
+            tickers (list): Tickers desejados (padrão: todos do tipo)
+            colunas (list): Colunas desejadas (padrão: todas)
+
+        Returns:
+            pd.DataFrame: Uma linha por ticker (colunas "ticker" e "extraido_em" + métricas).
+        """
+        if tickers:
+            chaves = []
+            for lote in _em_lotes(tickers):
+                chaves.extend(self._consultar(
+                    "SELECT ticker, MAX(extraido_em) FROM snapshots "
+                    f"WHERE tipo_ativo = ? AND ticker IN ({', '.join('?' * len(lote))}) GROUP BY ticker",
+                    [tipo_ativo] + list(lote),
+                ))
+        else:
+            chaves = self._consultar(
+                "SELECT ticker, MAX(extraido_em) FROM snapshots WHERE tipo_ativo = ? GROUP BY ticker", (tipo_ativo,)
+            )
+
+        longo = self._valores(tipo_ativo, chaves, colunas)
+        return self._para_largo(longo, tipo_ativo, ["ticker", "extraido_em"])
+
+    def snapshot(self, tipo_ativo, extraido_em, colunas=None):
+        """
+        Retorna todos os tickers de uma execução específica.
+
+        Args:
+            tipo_ativo (str): Tipo de ativo
+            extraido_em (str): Momento da extração ('AAAA-MM-DD HH:MM:SS')
+            colunas (list): Colunas desejadas (padrão: todas)
+
+        Returns:
+            pd.DataFrame: Uma linha por ticker.
+        """
+        chaves = self._consultar("SELECT ticker, extraido_em FROM snapshots WHERE tipo_ativo = ? AND extraido_em = ?",
+                                 (tipo_ativo, extraido_em))
+        return self._para_largo(self._valores(tipo_ativo, chaves, colunas), tipo_ativo, ["ticker", "extraido_em"])
+
+    def serie_temporal(self, tipo_ativo, colunas, tickers=None, inicio=None, fim=None):
+        """
+        Retorna a evolução de colunas ao longo do tempo.
+
+        Args:
+            tipo_ativo (str): Tipo de ativo
+            colunas (list): Colunas desejadas
+            tickers (list): Restringe aos tickers informados
+            inicio (str or datetime): Momento inicial incluído
+            fim (str or datetime): Momento final incluído (datas sem hora incluem o dia todo)
+
+        Returns:
+            pd.DataFrame: Uma linha por (ticker, extraido_em), uma coluna por métrica.
+        """
+        condicoes = ["tipo_ativo = ?", f"coluna IN ({', '.join('?' * len(colunas))})"]
+        parametros = [tipo_ativo] + list(colunas)
+        if inicio is not None:
+            condicoes.append("extraido_em >= ?")
+            parametros.append(str(inicio))
+        if fim is not None:
+            fim = str(fim)
+            condicoes.append("extraido_em <= ?")
+            parametros.append(fim if len(fim) > 10 else f"{fim} 23:59:59")
+
+        linhas = []
+        for lote in _em_lotes(tickers) if tickers else [None]:
+            condicoes_lote = list(condicoes)
+            parametros_lote = list(parametros)
+            if lote:
+                condicoes_lote.append(f"ticker IN ({', '.join('?' * len(lote))})")
+                parametros_lote.extend(lote)
+            linhas.extend(self._consultar(
+                "SELECT ticker, extraido_em, coluna, valor_texto, valor_num FROM valores "
+                f"WHERE {' AND '.join(condicoes_lote)} ORDER BY extraido_em, ticker",
+                parametros_lote,
+            ))
+
+        longo = pd.DataFrame(linhas, columns=["ticker", "extraido_em", "coluna", "valor_texto", "valor_num"])
+        return self._para_largo(longo, tipo_ativo, ["ticker", "extraido_em"])
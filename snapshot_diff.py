@@ -0,0 +1,174 @@
+"""
+Comparação entre a extração atual e o snapshot anterior dos mesmos tickers.
+
+Os dois DataFrames são alinhados por ticker e coluna e comparados de uma vez
+(matrizes numpy), gerando uma linha por valor que mudou: ticker, coluna, valor
+anterior, valor atual e variação percentual para colunas numéricas. Com 1.000
+tickers, só o que mudou precisa ser revisado.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from number_parsing import ATRIBUTO_FORMATOS, float64_decimal, formatar_valor
+from result_frames import TOLERANCIA_FLOAT32
+from snapshot_db import COLUNAS_IGNORADAS, identificar_coluna_ticker
+
+# Constantes
+COLUNAS_ALTERACOES = ["Tipo", "Ticker", "Coluna", "Valor Anterior", "Valor Atual", "Variação %", "Anterior Em", "Formato"]
+TOLERANCIA_NUMERICA = TOLERANCIA_FLOAT32  # diferenças de arredondamento do float32 não contam
+NOMES_TIPOS = {
+    "acoes": "Ações",
+    "fiis": "FIIs",
+    "carteira_acoes": "Carteira Ações",
+    "carteira_fiis": "Carteira FIIs",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _e_numerica(serie):
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+
+def _indexar_por_ticker(df):
+    """Indexa o DataFrame pelo ticker, mantendo a última ocorrência de tickers repetidos."""
+    coluna_ticker = identificar_coluna_ticker(df)
+    indexado = df.drop_duplicates(subset=coluna_ticker, keep="last").set_index(coluna_ticker)
+    indexado.index = indexado.index.astype(str)
+    return indexado
+
+
+def calcular_alteracoes(atual, anterior, tipo_ativo="", tolerancia=TOLERANCIA_NUMERICA):
+    """
+    Calcula os valores que mudaram entre dois snapshots.
+
+    Só entram tickers e colunas presentes nos dois lados. Colunas numéricas são
+    comparadas com tolerância; ausente -> ausente não conta como alteração.
+
+    Args:
+        atual (pd.DataFrame): Extração atual (tipada)
+        anterior (pd.DataFrame): Snapshot anterior (ex: ``BancoSnapshots.ultimo_snapshot``)
+        tipo_ativo (str): Tipo de ativo, gravado na coluna "Tipo"
+        tolerancia (float): Diferença absoluta abaixo da qual números são considerados iguais
+
+    Returns:
+        pd.DataFrame: Uma linha por valor alterado (colunas ``COLUNAS_ALTERACOES``).
+    """
+    if atual is None or anterior is None or atual.empty or anterior.empty:
+        return pd.DataFrame(columns=COLUNAS_ALTERACOES)
+
+    atual_idx = _indexar_por_ticker(atual)
+    anterior_idx = _indexar_por_ticker(anterior)
+    tickers = atual_idx.index.intersection(anterior_idx.index)
+    colunas = [c for c in atual_idx.columns if c in anterior_idx.columns and c not in COLUNAS_IGNORADAS]
+    if tickers.empty or not colunas:
+        return pd.DataFrame(columns=COLUNAS_ALTERACOES)
+
+    atual_idx = atual_idx.loc[tickers]
+    anterior_idx = anterior_idx.loc[tickers]
+    anterior_em = anterior_idx["extraido_em"].to_numpy() if "extraido_em" in anterior_idx else np.full(len(tickers), None)
+    formatos = atual.attrs.get(ATRIBUTO_FORMATOS, {})
+
+    partes = []
+    numericas = [c for c in colunas if _e_numerica(atual_idx[c]) and _e_numerica(anterior_idx[c])]
+    textos = [c for c in colunas if c not in numericas]
+
+    if numericas:
+        novos = np.column_stack([float64_decimal(atual_idx[c]).to_numpy() for c in numericas])
+        antigos = np.column_stack([float64_decimal(anterior_idx[c]).to_numpy() for c in numericas])
+        ausentes_novos, ausentes_antigos = np.isnan(novos), np.isnan(antigos)
+        with np.errstate(invalid="ignore"):
+            iguais = (np.abs(novos - antigos) <= tolerancia) | (ausentes_novos & ausentes_antigos)
+        linhas, cols = np.nonzero(~iguais)
+        if len(linhas):
+            valor_antigo, valor_novo = antigos[linhas, cols], novos[linhas, cols]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                variacao = np.where(valor_antigo != 0, (valor_novo - valor_antigo) / np.abs(valor_antigo) * 100, np.nan)
+            nomes = np.asarray(numericas, dtype=object)[cols]
+            partes.append(pd.DataFrame({
+                "Ticker": tickers.to_numpy()[linhas],
+                "Coluna": nomes,
+                "Valor Anterior": pd.Series(valor_antigo, dtype=object).where(~np.isnan(valor_antigo), None),
+                "Valor Atual": pd.Series(valor_novo, dtype=object).where(~np.isnan(valor_novo), None),
+                "Variação %": variacao,
+                "Anterior Em": anterior_em[linhas],
+                "Formato": [formatos.get(nome, "Número") for nome in nomes],
+                "_ordem": cols,
+            }))
+
+    if textos:
+        novos = atual_idx[textos].astype("string").to_numpy(dtype=object, na_value=None)
+        antigos = anterior_idx[textos].astype("string").to_numpy(dtype=object, na_value=None)
+        linhas, cols = np.nonzero(novos != antigos)
+        if len(linhas):
+            partes.append(pd.DataFrame({
+                "Ticker": tickers.to_numpy()[linhas],
+                "Coluna": np.asarray(textos, dtype=object)[cols],
+                "Valor Anterior": antigos[linhas, cols],
+                "Valor Atual": novos[linhas, cols],
+                "Variação %": np.nan,
+                "Anterior Em": anterior_em[linhas],
+                "Formato": "Texto",
+                "_ordem": cols + len(numericas),
+            }))
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_ALTERACOES)
+
+    alteracoes = pd.concat(partes, ignore_index=True)
+    ordem_colunas = {nome: posicao for posicao, nome in enumerate(colunas)}
+    alteracoes["_ordem"] = alteracoes["Coluna"].map(ordem_colunas)
+    alteracoes = alteracoes.sort_values(["Ticker", "_ordem"], kind="stable").drop(columns="_ordem")
+    alteracoes.insert(0, "Tipo", NOMES_TIPOS.get(tipo_ativo, tipo_ativo))
+    return alteracoes.reset_index(drop=True)[COLUNAS_ALTERACOES]
+
+
+def alteracoes_desde_ultimo(banco, frames):
+    """
+    Compara os DataFrames da execução atual com o último snapshot gravado no banco.
+
+    Deve ser chamada antes de ``BancoSnapshots.registrar_execucao`` da execução atual.
+
+    Args:
+        banco (BancoSnapshots): Banco de snapshots
+        frames (dict): Tipo de ativo -> DataFrame tipado da execução atual
+
+    Returns:
+        pd.DataFrame: Alterações de todos os tipos de ativo.
+    """
+    partes = []
+    for tipo_ativo, df in frames.items():
+        if df is None or df.empty:
+            continue
+        tickers = df[identificar_coluna_ticker(df)].astype(str).unique().tolist()
+        anterior = banco.ultimo_snapshot(tipo_ativo, tickers=tickers)
+        if not anterior.empty:
+            partes.append(calcular_alteracoes(df, anterior, tipo_ativo))
+
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_ALTERACOES)
+
+    alteracoes = pd.concat(partes, ignore_index=True)
+    logger.info(f"{len(alteracoes)} valores alterados em {alteracoes['Ticker'].nunique()} tickers desde a última extração")
+    return alteracoes
+
+
+def formatar_alteracoes(alteracoes):
+    """
+    Converte as alterações em textos para exibição (formato brasileiro).
+
+    Returns:
+        pd.DataFrame: Alterações sem a coluna "Formato", com valores formatados.
+    """
+    exibicao = alteracoes.drop(columns="Formato").astype(object)
+    for coluna in ("Valor Anterior", "Valor Atual"):
+        exibicao[coluna] = [formatar_valor(valor, formato)
+                            for valor, formato in zip(alteracoes[coluna], alteracoes["Formato"])]
+    exibicao["Variação %"] = [formatar_valor(valor, "Porcentagem") if pd.notna(valor) else ""
+                              for valor in alteracoes["Variação %"]]
+    exibicao["Anterior Em"] = alteracoes["Anterior Em"].fillna("").astype(str)
+    return exibicao
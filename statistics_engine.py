@@ -0,0 +1,291 @@
+"""
+Estatísticas descritivas dos resultados, calculadas uma vez por versão dos dados.
+
+Para cada coluna do DataFrame tipado o motor calcula contagem, taxa de valores
+ausentes (nulos e sentinelas como "N/A"), medidas descritivas e a distribuição
+(histograma para números, valores mais frequentes para textos). O resultado é
+memorizado pelo hash do conteúdo do DataFrame: o painel de estatísticas e o
+contexto enviado à IA usam o mesmo cálculo, feito em segundo plano.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from number_parsing import ATRIBUTO_FORMATOS, formatar_valor, mascara_ausentes
+
+# Constantes
+FAIXAS_HISTOGRAMA = 10
+VALORES_MAIS_FREQUENTES = 5
+CONJUNTOS_EM_CACHE = 32
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EstatisticasColuna:
+    """Estatísticas de uma coluna."""
+    nome: str
+    numerica: bool
+    contagem: int
+    ausentes: int
+    formato: Optional[str] = None
+    media: Optional[float] = None
+    desvio: Optional[float] = None
+    minimo: Optional[float] = None
+    p25: Optional[float] = None
+    mediana: Optional[float] = None
+    p75: Optional[float] = None
+    maximo: Optional[float] = None
+    distintos: Optional[int] = None
+    histograma: Optional[tuple] = None  # (contagens, limites)
+    mais_frequentes: list = field(default_factory=list)  # [(valor, ocorrências), ...]
+
+    @property
+    def taxa_ausentes(self):
+        total = self.contagem + self.ausentes
+        return self.ausentes / total if total else 0.0
+
+
+@dataclass
+class EstatisticasConjunto:
+    """Estatísticas de um DataFrame inteiro."""
+    hash_dados: str
+    linhas: int
+    colunas: dict  # nome -> EstatisticasColuna
+
+    @property
+    def numericas(self):
+        return [c for c in self.colunas.values() if c.numerica]
+
+    @property
+    def taxa_ausentes(self):
+        celulas = self.linhas * len(self.colunas)
+        return sum(c.ausentes for c in self.colunas.values()) / celulas if celulas else 0.0
+
+
+def hash_dataframe(df):
+    """
+    Calcula o hash do conteúdo do DataFrame (valores, colunas e tipos).
+
+    Returns:
+        str: Hash hexadecimal; DataFrames iguais têm o mesmo hash.
+    """
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    if len(df):
+        resumo.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return resumo.hexdigest()
+
+
+def _e_numerica(serie):
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+
+def _estatisticas_numericas(nome, serie, formato):
+    valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+    validos = valores[~np.isnan(valores)]
+    estatisticas = EstatisticasColuna(nome=nome, numerica=True, contagem=len(validos),
+                                      ausentes=len(valores) - len(validos), formato=formato)
+    if len(validos):
+        p25, mediana, p75 = np.percentile(validos, [25, 50, 75])
+        contagens, limites = np.histogram(validos, bins=FAIXAS_HISTOGRAMA)
+        estatisticas.media = float(validos.mean())
+        estatisticas.desvio = float(validos.std(ddof=1)) if len(validos) > 1 else 0.0
+        estatisticas.minimo = float(validos.min())
+        estatisticas.maximo = float(validos.max())
+        estatisticas.p25, estatisticas.mediana, estatisticas.p75 = float(p25), float(mediana), float(p75)
+        estatisticas.distintos = int(len(np.unique(validos)))
+        estatisticas.histograma = (contagens.tolist(), limites.tolist())
+    return estatisticas
+
+
+def _estatisticas_texto(nome, serie):
+    textos = serie.astype("string")
+    ausentes = textos.isna().to_numpy() | mascara_ausentes(textos.str.strip()).to_numpy(dtype=bool)
+    validos = serie[~ausentes]
+    frequencias = validos.value_counts(sort=True)
+    return EstatisticasColuna(
+        nome=nome, numerica=False, contagem=len(validos), ausentes=int(ausentes.sum()), formato="Texto",
+        distintos=int(len(frequencias[frequencias > 0])),
+        mais_frequentes=[(str(valor), int(ocorrencias))
+                         for valor, ocorrencias in frequencias.head(VALORES_MAIS_FREQUENTES).items() if ocorrencias > 0],
+    )
+
+
+def calcular_estatisticas(df, hash_dados=None):
+    """
+    Calcula as estatísticas de todas as colunas de um DataFrame tipado.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado
+        hash_dados (str): Hash já calculado (opcional)
+
+    Returns:
+        EstatisticasConjunto: Estatísticas por coluna.
+    """
+    formatos = df.attrs.get(ATRIBUTO_FORMATOS, {})
+    colunas = {}
+    for nome in df.columns:
+        serie = df[nome]
+        if _e_numerica(serie):
+            colunas[nome] = _estatisticas_numericas(nome, serie, formatos.get(nome, "Número"))
+        else:
+            colunas[nome] = _estatisticas_texto(nome, serie)
+    return EstatisticasConjunto(hash_dados=hash_dados or hash_dataframe(df), linhas=len(df), colunas=colunas)
+
+
+class MotorEstatisticas:
+    """
+    Calcula e memoriza estatísticas por hash dos dados, com cálculo em segundo plano.
+    """
+
+    def __init__(self, capacidade=CONJUNTOS_EM_CACHE):
+        """
+        Inicializa o motor.
+
+        Args:
+            capacidade (int): Conjuntos de estatísticas mantidos em cache
+        """
+        self.capacidade = capacidade
+        self._cache = OrderedDict()
+        self._em_calculo = {}
+        self._lock = threading.Lock()
+
+    def obter(self, df):
+        """
+        Retorna as estatísticas do DataFrame, calculando só se o conteúdo for novo.
+
+        Se outro thread já estiver calculando os mesmos dados, aguarda o resultado dele.
+
+        Args:
+            df (pd.DataFrame): DataFrame tipado
+
+        Returns:
+            EstatisticasConjunto: Estatísticas memorizadas.
+        """
+        chave = hash_dataframe(df)
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+            evento = self._em_calculo.get(chave)
+            calcular = evento is None
+            if calcular:
+                evento = self._em_calculo[chave] = threading.Event()
+
+        if not calcular:
+            evento.wait()
+            with self._lock:
+                if chave in self._cache:
+                    return self._cache[chave]
+            return self.obter(df)  # o cálculo do outro thread falhou
+
+        try:
+            estatisticas = calcular_estatisticas(df, chave)
+            with self._lock:
+                self._cache[chave] = estatisticas
+                if len(self._cache) > self.capacidade:
+                    self._cache.popitem(last=False)
+            return estatisticas
+        finally:
+            with self._lock:
+                self._em_calculo.pop(chave, None)
+            evento.set()
+
+    def calcular_em_segundo_plano(self, frames, callback=None):
+        """
+        Calcula as estatísticas de vários DataFrames em uma thread separada.
+
+        Args:
+            frames (dict): Nome do conjunto -> DataFrame (vazios são ignorados)
+            callback (callable): Recebe o dict nome -> EstatisticasConjunto ao final
+                (é chamado na thread de cálculo)
+
+        Returns:
+            threading.Thread: Thread iniciada.
+        """
+        def calcular():
+            resultados = {}
+            for nome, df in frames.items():
+                if df is None or df.empty:
+                    continue
+                try:
+                    resultados[nome] = self.obter(df)
+                except Exception as e:
+                    logger.error(f"Erro ao calcular estatísticas de {nome}: {e}")
+            if callback:
+                callback(resultados)
+
+        thread = threading.Thread(target=calcular, name="MotorEstatisticas", daemon=True)
+        thread.start()
+        return thread
+
+
+_motor_compartilhado = None
+
+
+def motor_compartilhado():
+    """Motor usado por toda a aplicação (painel de estatísticas e contexto da IA)."""
+    global _motor_compartilhado
+    if _motor_compartilhado is None:
+        _motor_compartilhado = MotorEstatisticas()
+    return _motor_compartilhado
+
+
+def resumo_painel(nome, estatisticas, colunas_exibidas=6):
+    """
+    Resumo curto de um conjunto para o painel de estatísticas.
+
+    Returns:
+        list: Linhas de texto.
+    """
+    linhas = [f"{nome}: {estatisticas.linhas} registros, {len(estatisticas.colunas)} colunas, "
+              f"{estatisticas.taxa_ausentes * 100:.1f}% de valores ausentes"]
+    for coluna in estatisticas.numericas[:colunas_exibidas]:
+        if coluna.contagem == 0:
+            continue
+        linhas.append(
+            f"   {coluna.nome}: média {formatar_valor(coluna.media, coluna.formato)} | "
+            f"mediana {formatar_valor(coluna.mediana, coluna.formato)} | "
+            f"{formatar_valor(coluna.minimo, coluna.formato)} a {formatar_valor(coluna.maximo, coluna.formato)} | "
+            f"ausentes {coluna.taxa_ausentes * 100:.0f}%"
+        )
+    restantes = len(estatisticas.numericas) - colunas_exibidas
+    if restantes > 0:
+        linhas.append(f"   ... e mais {restantes} colunas numéricas")
+    return linhas
+
+
+def resumo_texto(estatisticas):
+    """
+    Resumo completo em texto (tabela por coluna), usado no contexto da IA.
+
+    Returns:
+        str: Estatísticas descritivas das colunas numéricas e distribuição das colunas de texto.
+    """
+    partes = []
+    numericas = estatisticas.numericas
+    if numericas:
+        partes.append(f"Métricas numéricas: {', '.join(c.nome for c in numericas)}")
+        partes.append("\nEstatísticas descritivas:")
+        tabela = pd.DataFrame(
+            {c.nome: [c.contagem, c.media, c.desvio, c.minimo, c.p25, c.mediana, c.p75, c.maximo,
+                      c.taxa_ausentes * 100] for c in numericas},
+            index=["count", "mean", "std", "min", "25%", "50%", "75%", "max", "% ausentes"],
+        )
+        partes.append(tabela.to_string(float_format=lambda v: f"{v:.4g}"))
+
+    # Colunas de identificadores (todos os valores distintos, como Ticker) não têm distribuição útil
+    textos = [c for c in estatisticas.colunas.values()
+              if not c.numerica and c.mais_frequentes and c.distintos < c.contagem]
+    for coluna in textos:
+        frequentes = ", ".join(f"{valor} ({ocorrencias})" for valor, ocorrencias in coluna.mais_frequentes)
+        partes.append(f"{coluna.nome}: {coluna.distintos} valores distintos; mais frequentes: {frequentes}")
+    return "\n".join(partes)
@@ -0,0 +1,238 @@
+"""
+Ordenação, filtro e busca sobre os DataFrames tipados exibidos no visualizador.
+
+Tudo aqui opera com vetores numpy sobre as colunas tipadas (números como float,
+textos como categoria), sem formatar nem percorrer linhas em Python:
+
+- ``ordem_coluna``: índices de ordenação de uma coluna (nulos sempre no fim);
+- ``compilar_filtro``: transforma ``P/L < 10 e Setor == 'Financeiro'`` em uma
+  função que devolve a máscara booleana;
+- ``IndicePrefixo``: busca incremental de tickers por prefixo (busca binária).
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from number_parsing import mascara_ausentes
+
+# Constantes
+OPERADORES = ("<=", ">=", "!=", "==", "<", ">", "=", "contém", "contem", "contains", "~")
+CONECTORES = {"e": "and", "and": "and", "&": "and", "&&": "and",
+              "ou": "or", "or": "or", "|": "or", "||": "or"}
+PADRAO_CONECTOR_FINAL = re.compile(r"(?:^|\s)(?:e|and|ou|or)$|(?:&&|\|\||&|\|)$", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+class FiltroInvalido(ValueError):
+    """Expressão de filtro que não pôde ser interpretada."""
+
+
+def ordem_coluna(serie, decrescente=False):
+    """
+    Calcula a ordem das linhas por uma coluna tipada.
+
+    Números são ordenados pelo valor; textos e categorias, sem diferenciar
+    maiúsculas. Valores ausentes ficam no fim nos dois sentidos.
+
+    Args:
+        serie (pd.Series): Coluna do DataFrame tipado
+        decrescente (bool): Ordem decrescente
+
+    Returns:
+        np.ndarray: Posições das linhas na ordem pedida.
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        valores = serie.to_numpy(dtype="float64", na_value=np.nan)
+        ausentes = np.isnan(valores)
+    elif isinstance(serie.dtype, pd.CategoricalDtype):
+        # Ordenar só as categorias e usar a posição delas como chave inteira
+        categorias = pd.Series(serie.cat.categories).astype("string").str.casefold().to_numpy(dtype=object)
+        posicao = np.empty(len(categorias), dtype=np.int64)
+        posicao[np.argsort(categorias, kind="stable")] = np.arange(len(categorias))
+        codigos = serie.cat.codes.to_numpy()
+        ausentes = codigos < 0
+        valores = posicao[codigos] if len(posicao) else np.zeros(len(codigos), dtype=np.int64)
+    else:
+        textos = serie.astype("string")
+        ausentes = textos.isna().to_numpy() | mascara_ausentes(textos.str.strip()).to_numpy(dtype=bool)
+        valores = textos.str.casefold().to_numpy(dtype=object, na_value="")
+
+    presentes = np.flatnonzero(~ausentes)
+    ordem = presentes[np.argsort(valores[presentes], kind="stable")]
+    if decrescente:
+        ordem = ordem[::-1]
+    return np.concatenate([ordem, np.flatnonzero(ausentes)])
+
+
+def _dividir(expressao):
+    """Separa a expressão em condições e conectores (and/or), respeitando aspas."""
+    partes = re.split(r"""('[^']*'|"[^"]*")""", expressao)
+    tokens, atual = [], ""
+    for parte in partes:
+        if parte[:1] in ("'", '"'):
+            atual += parte
+            continue
+        pedacos = re.split(r"(\s+(?:e|and|ou|or)\s+|\s*(?:&&|\|\||&|\|)\s*)", parte, flags=re.IGNORECASE)
+        for posicao, pedaco in enumerate(pedacos):
+            if posicao % 2:  # separadores capturados ficam nas posições ímpares
+                tokens.append(atual.strip())
+                tokens.append(CONECTORES[pedaco.strip().lower()])
+                atual = ""
+            else:
+                atual += pedaco
+    tokens.append(atual.strip())
+    return tokens
+
+
+def _valor(texto):
+    """Converte o valor digitado: texto entre aspas, número (aceita vírgula decimal e %) ou texto livre."""
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] and texto[0] in ("'", '"'):
+        return texto[1:-1]
+    numero = texto.rstrip("%").strip()
+    if "," in numero:
+        numero = numero.replace(".", "").replace(",", ".")
+    try:
+        return float(numero)
+    except ValueError:
+        return texto
+
+
+def _condicao(texto, colunas):
+    """Interpreta ``<coluna> <operador> <valor>`` e devolve a função que calcula a máscara."""
+    minusculo = texto.lower()
+    # A coluna mais longa que prefixa a condição (nomes como "P/L" ou "Div. Yield" não são identificadores)
+    candidatas = [c for c in colunas if minusculo.startswith(str(c).lower())]
+    if not candidatas:
+        raise FiltroInvalido(f"Coluna não encontrada em '{texto}'")
+    coluna = max(candidatas, key=lambda c: len(str(c)))
+    resto = texto[len(str(coluna)):].strip()
+
+    operador = next((op for op in OPERADORES if resto.lower().startswith(op)), None)
+    if operador is None:
+        raise FiltroInvalido(f"Operador inválido em '{texto}' (use ==, !=, <, <=, >, >= ou contém)")
+    valor = _valor(resto[len(operador):])
+    if valor == "":
+        raise FiltroInvalido(f"Valor ausente em '{texto}'")
+    operador = {"=": "==", "contem": "contém", "contains": "contém", "~": "contém"}.get(operador, operador)
+
+    def mascara(df):
+        serie = df[coluna]
+        if operador == "contém":
+            return serie.astype("string").str.contains(str(valor), case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+        if isinstance(valor, float):
+            numeros = (serie.to_numpy(dtype="float64", na_value=np.nan)
+                       if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+                       else pd.to_numeric(serie.astype("string"), errors="coerce").to_numpy(dtype="float64", na_value=np.nan))
+            with np.errstate(invalid="ignore"):
+                return _comparar(numeros, operador, valor) & ~np.isnan(numeros)
+        textos = serie.astype("string").str.casefold()
+        resultado = _comparar(textos, operador, str(valor).casefold())
+        return resultado.fillna(operador == "!=").to_numpy(dtype=bool)
+
+    return mascara
+
+
+def _comparar(valores, operador, valor):
+    if operador == "==":
+        return valores == valor
+    if operador == "!=":
+        return valores != valor
+    if operador == "<":
+        return valores < valor
+    if operador == "<=":
+        return valores <= valor
+    if operador == ">":
+        return valores > valor
+    return valores >= valor
+
+
+def compilar_filtro(expressao, colunas):
+    """
+    Compila uma expressão de filtro sobre as colunas de um DataFrame.
+
+    Exemplos: ``P/L < 10 e Setor == 'Financeiro'``, ``DY >= 6% ou Ticker contém 11``.
+    Conectores ``e``/``and`` têm precedência sobre ``ou``/``or``.
+
+    Args:
+        expressao (str): Expressão digitada pelo usuário
+        colunas (iterable): Colunas disponíveis
+
+    Returns:
+        callable: Recebe o DataFrame e devolve a máscara booleana (np.ndarray).
+
+    Raises:
+        FiltroInvalido: Se a expressão não puder ser interpretada.
+    """
+    colunas = list(colunas)
+    expressao = expressao.strip()
+    # Sem isso "P/L < 10 e" viraria a comparação de texto P/L < "10 e", que não casa nada
+    conector_final = PADRAO_CONECTOR_FINAL.search(expressao)
+    if conector_final:
+        raise FiltroInvalido(f"Conector '{conector_final.group().strip()}' sem condição no fim da expressão "
+                             "(para procurar esse texto, use aspas)")
+    tokens = _dividir(expressao)
+    if any(token == "" for token in tokens[::2]):
+        raise FiltroInvalido("Condição vazia na expressão")
+
+    # Grupos de condições ligadas por "and", unidos por "or"
+    grupos, grupo = [], [_condicao(tokens[0], colunas)]
+    for conector, condicao in zip(tokens[1::2], tokens[2::2]):
+        if conector == "or":
+            grupos.append(grupo)
+            grupo = []
+        grupo.append(_condicao(condicao, colunas))
+    grupos.append(grupo)
+
+    def filtro(df):
+        resultado = np.zeros(len(df), dtype=bool)
+        for condicoes in grupos:
+            parcial = np.ones(len(df), dtype=bool)
+            for condicao in condicoes:
+                parcial &= condicao(df)
+            resultado |= parcial
+        return resultado
+
+    return filtro
+
+
+class IndicePrefixo:
+    """
+    Índice ordenado dos tickers para busca por prefixo em O(log n).
+    """
+
+    def __init__(self, serie):
+        """
+        Monta o índice.
+
+        Args:
+            serie (pd.Series): Coluna de tickers
+        """
+        chaves = serie.astype("string").str.upper().to_numpy(dtype=object, na_value="")
+        self._ordem = np.argsort(chaves, kind="stable")
+        self._chaves = chaves[self._ordem].astype(str)
+        self.total = len(chaves)
+
+    def buscar(self, prefixo):
+        """
+        Retorna as posições das linhas cujo ticker começa com ``prefixo``.
+
+        Returns:
+            np.ndarray: Posições (na ordem do índice, sem diferenciar maiúsculas).
+        """
+        prefixo = prefixo.strip().upper()
+        if not prefixo:
+            return np.arange(self.total)
+        inicio = np.searchsorted(self._chaves, prefixo, side="left")
+        fim = np.searchsorted(self._chaves, prefixo + "\uffff", side="left")
+        return self._ordem[inicio:fim]
+
+    def mascara(self, prefixo):
+        """Máscara booleana (na ordem original) das linhas que casam com o prefixo."""
+        mascara = np.zeros(self.total, dtype=bool)
+        mascara[self.buscar(prefixo)] = True
+        return mascara
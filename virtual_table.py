@@ -0,0 +1,329 @@
+"""
+Tabela virtualizada para exibir DataFrames grandes em um ttk.Treeview.
+
+Em vez de inserir uma linha do Treeview por linha do DataFrame, a tabela mantém
+apenas as linhas visíveis (algumas dezenas de itens) e troca os valores delas
+conforme o usuário rola. As linhas são formatadas sob demanda, em páginas
+guardadas em um cache pequeno, então abrir uma tabela de 100 mil linhas custa o
+mesmo que abrir uma de 10.
+
+Ordenação (clique no cabeçalho), filtro por expressão e busca de ticker por
+prefixo (ver ``table_query``) só recalculam o vetor de posições exibidas.
+"""
+
+import logging
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+import numpy as np
+
+from number_parsing import formatar_dataframe
+from snapshot_db import identificar_coluna_ticker
+from table_query import FiltroInvalido, IndicePrefixo, compilar_filtro, ordem_coluna
+
+# Constantes
+TAMANHO_PAGINA = 200
+PAGINAS_EM_CACHE = 16
+LINHAS_VISIVEIS_PADRAO = 15
+LARGURA_COLUNA_PADRAO = 120
+SETA_ORDEM = {False: " ▲", True: " ▼"}
+
+logger = logging.getLogger(__name__)
+
+
+class TabelaVirtual:
+    """
+    Treeview que materializa só as linhas visíveis de um DataFrame.
+    """
+
+    def __init__(self, parent, df, formatador=formatar_dataframe, tags_linha=None, larguras=None,
+                 linhas_visiveis=LINHAS_VISIVEIS_PADRAO, barra_busca=True):
+        """
+        Cria a tabela (Treeview e barras de rolagem) dentro de ``parent``.
+
+        Args:
+            parent: Widget pai
+            df (pd.DataFrame): Dados exibidos (não são copiados)
+            formatador (callable): Converte um trecho do DataFrame no DataFrame exibido
+            tags_linha (callable): Recebe o trecho original e devolve uma tag por linha (opcional)
+            larguras (dict): Coluna -> largura em pixels (padrão: ``LARGURA_COLUNA_PADRAO``)
+            linhas_visiveis (int): Linhas exibidas antes do primeiro redimensionamento
+            barra_busca (bool): Exibe a busca de ticker e o campo de filtro acima da tabela
+        """
+        self.df_original = df
+        self.df = df
+        self.formatador = formatador
+        self.tags_linha = tags_linha
+        self.inicio = 0
+        self.linha_selecionada = None
+        self._linhas_visiveis = linhas_visiveis
+        self._paginas = OrderedDict()
+        self._itens = []
+
+        # Estado da visão: ordenação, filtro e busca sobre o DataFrame original
+        self.ordenacao = None  # (coluna, decrescente)
+        self._ordens = {}
+        self._mascara_filtro = None
+        self._mascara_busca = None
+        self._indice_tickers = None
+
+        self.colunas = list(formatador(df.iloc[:0]).columns)
+        larguras = larguras or {}
+
+        self.frame = tk.Frame(parent)
+        if barra_busca:
+            self._criar_barra_busca()
+        self.tree = ttk.Treeview(self.frame, columns=self.colunas, show="headings",
+                                 height=linhas_visiveis, selectmode="browse")
+        for col in self.colunas:
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar(c))
+            self.tree.column(col, width=larguras.get(col, LARGURA_COLUNA_PADRAO), minwidth=80)
+
+        # A barra vertical controla o deslocamento no DataFrame, não o Treeview
+        self.scrollbar_v = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._rolar_barra)
+        self.scrollbar_h = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.scrollbar_h.set)
+
+        self.scrollbar_v.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar_h.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._ao_redimensionar)
+        self.tree.bind("<MouseWheel>", self._ao_rodar_mouse)
+        self.tree.bind("<Button-4>", lambda e: self._rolar_para(self.inicio - 3))
+        self.tree.bind("<Button-5>", lambda e: self._rolar_para(self.inicio + 3))
+        self.tree.bind("<<TreeviewSelect>>", self._ao_selecionar)
+        self.tree.bind("<Up>", lambda e: self._mover_selecao(-1))
+        self.tree.bind("<Down>", lambda e: self._mover_selecao(1))
+        self.tree.bind("<Prior>", lambda e: self._mover_selecao(-self._linhas_visiveis))
+        self.tree.bind("<Next>", lambda e: self._mover_selecao(self._linhas_visiveis))
+        self.tree.bind("<Home>", lambda e: self._mover_selecao(-len(self.df)))
+        self.tree.bind("<End>", lambda e: self._mover_selecao(len(self.df)))
+
+        self._renderizar()
+
+    def _criar_barra_busca(self):
+        """Cria a busca incremental de ticker, o campo de filtro e o contador de linhas."""
+        barra = ttk.Frame(self.frame)
+        barra.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+
+        ttk.Label(barra, text="🔎 Ticker:").pack(side=tk.LEFT)
+        self.var_busca = tk.StringVar()
+        entrada_busca = ttk.Entry(barra, textvariable=self.var_busca, width=12)
+        entrada_busca.pack(side=tk.LEFT, padx=(5, 15))
+        self.var_busca.trace_add("write", lambda *_: self.buscar_ticker(self.var_busca.get()))
+
+        ttk.Label(barra, text="Filtro:").pack(side=tk.LEFT)
+        self.var_filtro = tk.StringVar()
+        entrada_filtro = ttk.Entry(barra, textvariable=self.var_filtro, width=45)
+        entrada_filtro.pack(side=tk.LEFT, padx=5)
+        entrada_filtro.bind("<Return>", lambda e: self._aplicar_filtro_digitado())
+        ttk.Button(barra, text="Aplicar", command=self._aplicar_filtro_digitado).pack(side=tk.LEFT)
+        ttk.Button(barra, text="Limpar", command=self.limpar_filtros).pack(side=tk.LEFT, padx=5)
+
+        self.lbl_contagem = ttk.Label(barra, text="")
+        self.lbl_contagem.pack(side=tk.RIGHT)
+        self._atualizar_contagem()
+
+    def _atualizar_contagem(self, erro=None):
+        if not hasattr(self, "lbl_contagem"):
+            return
+        if erro:
+            self.lbl_contagem.config(text=f"⚠️ {erro}", foreground="#ef4444")
+        else:
+            self.lbl_contagem.config(text=f"{len(self.df)} de {len(self.df_original)} linhas", foreground="")
+
+    def _aplicar_filtro_digitado(self):
+        try:
+            self.filtrar(self.var_filtro.get())
+        except FiltroInvalido as e:
+            self._atualizar_contagem(erro=str(e))
+
+    def ordenar(self, coluna):
+        """
+        Ordena pela coluna (clique repetido inverte o sentido).
+
+        A ordem de cada coluna e sentido é calculada uma vez sobre o DataFrame original e reaproveitada.
+        """
+        decrescente = bool(self.ordenacao and self.ordenacao[0] == coluna and not self.ordenacao[1])
+        if (coluna, decrescente) not in self._ordens:
+            self._ordens[(coluna, decrescente)] = ordem_coluna(self.df_original[coluna], decrescente)
+
+        if self.ordenacao:
+            self.tree.heading(self.ordenacao[0], text=self.ordenacao[0])
+        self.ordenacao = (coluna, decrescente)
+        self.tree.heading(coluna, text=f"{coluna}{SETA_ORDEM[decrescente]}")
+        self._atualizar_visao()
+
+    def filtrar(self, expressao):
+        """
+        Aplica uma expressão de filtro (ex: ``P/L < 10 e Setor == 'Financeiro'``); vazia remove o filtro.
+
+        Raises:
+            FiltroInvalido: Se a expressão não puder ser interpretada (o filtro anterior é mantido).
+        """
+        if expressao.strip():
+            filtro = compilar_filtro(expressao, self.df_original.columns)
+            self._mascara_filtro = filtro(self.df_original)
+        else:
+            self._mascara_filtro = None
+        self._atualizar_visao()
+
+    def buscar_ticker(self, prefixo):
+        """Mantém só os tickers que começam com ``prefixo`` (busca binária no índice de prefixos)."""
+        if not prefixo.strip():
+            self._mascara_busca = None
+        else:
+            if self._indice_tickers is None:
+                self._indice_tickers = IndicePrefixo(self.df_original[identificar_coluna_ticker(self.df_original)])
+            self._mascara_busca = self._indice_tickers.mascara(prefixo)
+        self._atualizar_visao()
+
+    def limpar_filtros(self):
+        """Remove filtro e busca (a ordenação é mantida)."""
+        if hasattr(self, "var_busca"):
+            self.var_busca.set("")
+            self.var_filtro.set("")
+        self._mascara_filtro = None
+        self._mascara_busca = None
+        self._atualizar_visao()
+
+    def _atualizar_visao(self):
+        """Recalcula as posições exibidas (filtro, busca e ordenação) e volta ao topo."""
+        mascara = None
+        for parcial in (self._mascara_filtro, self._mascara_busca):
+            if parcial is not None:
+                mascara = parcial if mascara is None else mascara & parcial
+
+        if self.ordenacao:
+            posicoes = self._ordens[self.ordenacao]
+            if mascara is not None:
+                posicoes = posicoes[mascara[posicoes]]
+        elif mascara is not None:
+            posicoes = np.flatnonzero(mascara)
+        else:
+            posicoes = None
+
+        self.df = self.df_original if posicoes is None else self.df_original.iloc[posicoes]
+        self._paginas.clear()
+        self.inicio = 0
+        self.linha_selecionada = None
+        self._renderizar()
+        self._atualizar_contagem()
+
+    def pack(self, **kwargs):
+        """Posiciona a tabela (atalho para ``frame.pack``)."""
+        self.frame.pack(**kwargs)
+
+    @property
+    def total_linhas(self):
+        return len(self.df)
+
+    def _pagina(self, numero):
+        """Retorna os valores formatados (e as tags) de uma página, usando o cache."""
+        if numero in self._paginas:
+            self._paginas.move_to_end(numero)
+            return self._paginas[numero]
+
+        trecho = self.df.iloc[numero * TAMANHO_PAGINA:(numero + 1) * TAMANHO_PAGINA]
+        valores = [list(linha) for linha in self.formatador(trecho).itertuples(index=False)]
+        tags = list(self.tags_linha(trecho)) if self.tags_linha else [None] * len(valores)
+        self._paginas[numero] = (valores, tags)
+        if len(self._paginas) > PAGINAS_EM_CACHE:
+            self._paginas.popitem(last=False)
+        return self._paginas[numero]
+
+    def _linha(self, posicao):
+        valores, tags = self._pagina(posicao // TAMANHO_PAGINA)
+        return valores[posicao % TAMANHO_PAGINA], tags[posicao % TAMANHO_PAGINA]
+
+    def _renderizar(self):
+        """Atualiza os itens do Treeview com as linhas a partir de ``self.inicio``."""
+        quantidade = max(0, min(self._linhas_visiveis, self.total_linhas - self.inicio))
+
+        # Reaproveitar os itens existentes; criar ou remover só a diferença
+        while len(self._itens) < quantidade:
+            self._itens.append(self.tree.insert("", tk.END))
+        if len(self._itens) > quantidade:
+            self.tree.delete(*self._itens[quantidade:])
+            del self._itens[quantidade:]
+
+        selecionado = None
+        for deslocamento, item in enumerate(self._itens):
+            posicao = self.inicio + deslocamento
+            valores, tag = self._linha(posicao)
+            self.tree.item(item, values=valores, tags=(tag,) if tag else ())
+            if posicao == self.linha_selecionada:
+                selecionado = item
+
+        if selecionado:
+            self.tree.selection_set(selecionado)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = self.total_linhas or 1
+        self.scrollbar_v.set(self.inicio / total, min(1.0, (self.inicio + quantidade) / total))
+
+    def _rolar_para(self, inicio):
+        """Desloca a janela visível para começar na linha ``inicio``."""
+        inicio = max(0, min(int(inicio), self.total_linhas - self._linhas_visiveis))
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._renderizar()
+        return "break"
+
+    def _rolar_barra(self, acao, quantidade, unidade=None):
+        """Comando da barra vertical ("moveto" fração, ou "scroll" n units/pages)."""
+        if acao == "moveto":
+            self._rolar_para(float(quantidade) * self.total_linhas)
+        elif acao == "scroll":
+            passo = self._linhas_visiveis if unidade == "pages" else 1
+            self._rolar_para(self.inicio + int(quantidade) * passo)
+
+    def _ao_rodar_mouse(self, event):
+        passos = -int(event.delta / 120) if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        return self._rolar_para(self.inicio + passos * 3)
+
+    def _ao_redimensionar(self, event=None):
+        """Recalcula quantas linhas cabem na altura atual do Treeview."""
+        if not self._itens:
+            return
+        caixa = self.tree.bbox(self._itens[0])
+        if not caixa:
+            return
+        _, y, _, altura_linha = caixa
+        linhas = max(1, (self.tree.winfo_height() - y) // max(altura_linha, 1))
+        if linhas != self._linhas_visiveis:
+            self._linhas_visiveis = linhas
+            self.inicio = max(0, min(self.inicio, self.total_linhas - linhas))
+            self._renderizar()
+
+    def _ao_selecionar(self, event=None):
+        selecao = self.tree.selection()
+        if selecao and selecao[0] in self._itens:
+            self.linha_selecionada = self.inicio + self._itens.index(selecao[0])
+
+    def _mover_selecao(self, passos):
+        """Move a seleção pelo teclado, rolando a janela quando ela sai da área visível."""
+        if not self.total_linhas:
+            return "break"
+        atual = self.linha_selecionada if self.linha_selecionada is not None else self.inicio - 1
+        self.linha_selecionada = max(0, min(atual + passos, self.total_linhas - 1))
+        if self.linha_selecionada < self.inicio:
+            self.inicio = self.linha_selecionada
+        elif self.linha_selecionada >= self.inicio + self._linhas_visiveis:
+            self.inicio = self.linha_selecionada - self._linhas_visiveis + 1
+        self._renderizar()
+        return "break"
+
+    def valores_selecionados(self):
+        """
+        Retorna a linha selecionada do DataFrame original.
+
+        Returns:
+            pd.Series or None: Linha selecionada, ou None se não há seleção.
+        """
+        if self.linha_selecionada is None or self.linha_selecionada >= self.total_linhas:
+            return None
+        return self.df.iloc[self.linha_selecionada]